@@ -0,0 +1,66 @@
+"""Flashcard generation from a large imported note collection.
+
+Imports a generated Markdown document full of definition lines, bold terms
+and filler prose, then times generate_flashcards and a second run in which
+every card is a duplicate, and reports the peak traced memory of a run.
+
+Usage: python benchmarks/bench_cardgen.py [--mb N]
+"""
+import argparse
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from gcp_tutor.cardgen import generate_flashcards
+from gcp_tutor.db import close_connections, init_db
+from gcp_tutor.importer import import_file
+from gcp_tutor.seed import seed_all
+
+WORDS = "project quota gke kubectl vpc subnet snapshot monitoring iam role bucket nearline spanner the of and".split()
+
+
+def write_notes(path: Path, megabytes: int) -> None:
+    rng = random.Random(0)
+    with open(path, "w") as f:
+        written, term = 0, 0
+        while written < megabytes * 1_000_000:
+            term += 1
+            prose = " ".join(rng.choices(WORDS, k=18))
+            line = rng.choice((
+                f"- **Term {term}**: {prose}.",
+                f"Term {term} - {prose}.",
+                f"**Term {term}** is {prose}. Use **Tool {term}** to {prose}.",
+                f"{prose.capitalize()}.",
+            ))
+            written += f.write(line + "\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mb", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.db")
+        init_db(db_path)
+        seed_all(db_path)
+        notes = Path(tmp) / "notes.md"
+        write_notes(notes, args.mb)
+        import_file(db_path, str(notes))
+        print(f"{notes.stat().st_size / 1e6:.0f} MB of notes")
+        for run in ("first run", "re-run"):
+            start = time.perf_counter()
+            counts = generate_flashcards(db_path)
+            elapsed = time.perf_counter() - start
+            print(f"  {run:>9}: {elapsed:6.2f} s, {counts['created']} created, {counts['duplicates']} duplicates")
+        tracemalloc.start()
+        generate_flashcards(db_path)
+        print(f"  peak traced memory of a run: {tracemalloc.get_traced_memory()[1] / 1e6:.1f} MB")
+        tracemalloc.stop()
+        close_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Import categorization: earlier keyword scans vs the single-regex pass.
+
+The categorizers are fed the text in CHUNK_CHARS pieces, as ``import_file``
+does. "presence" is the categorizer before frequency weighting (an ``in``
+test per keyword, skipping keywords already found); "prefix scans" counted
+keywords with one ``str.find`` scan per group of keywords sharing their first
+four characters; "current" is ``KeywordCategorizer``. Text is prose over a
+random vocabulary, with or without GCP keywords mixed in; "single text" times
+``classify_content`` on the whole text at once, as card generation uses it.
+
+Usage: python benchmarks/bench_categorize.py [--mb N] [--repeat N]
+"""
+import argparse
+import os
+import random
+import string
+import time
+from collections import Counter
+
+from gcp_tutor.importer import CHUNK_CHARS, DOMAIN_KEYWORDS, KeywordCategorizer, classify_content
+
+KEYWORDS = [keyword for keywords in DOMAIN_KEYWORDS.values() for keyword in keywords]
+
+
+class PresenceCategorizer:
+    """The categorizer before frequency weighting: which keywords occur at all."""
+
+    def __init__(self):
+        self.found = {domain_id: set() for domain_id in DOMAIN_KEYWORDS}
+
+    def feed(self, text: str) -> None:
+        text_lower = text.lower()
+        for domain_id, keywords in DOMAIN_KEYWORDS.items():
+            found = self.found[domain_id]
+            found.update(kw for kw in keywords if kw not in found and kw in text_lower)
+
+
+class PrefixScanCategorizer:
+    """Keyword counting with one ``str.find`` scan per prefix group, as before the single regex."""
+
+    def __init__(self):
+        groups = {}
+        for keyword in KEYWORDS:
+            groups.setdefault(keyword[:4], []).append(keyword)
+        self.groups = {
+            os.path.commonprefix(group): sorted(group, key=len, reverse=True) for group in groups.values()
+        }
+        self.containers = {
+            keyword: [(other, other.find(keyword)) for other in KEYWORDS if other != keyword and keyword in other]
+            for keyword in KEYWORDS
+        }
+        self.counts = Counter()
+
+    def _inside_longer(self, text, keyword, start):
+        return any(
+            offset <= start and text.startswith(other, start - offset) for other, offset in self.containers[keyword]
+        )
+
+    def feed(self, text: str) -> None:
+        text = text.lower()
+        for prefix, group in self.groups.items():
+            start = text.find(prefix)
+            while start >= 0:
+                step = len(prefix)
+                if not (start and (text[start - 1].isalnum() or text[start - 1] == "_")):
+                    for keyword in group:
+                        if text.startswith(keyword, start) and not self._inside_longer(text, keyword, start):
+                            self.counts[keyword] += 1
+                            step = len(keyword)
+                            break
+                start = text.find(prefix, start + step)
+
+
+def make_text(megabytes: int, keyword_share: float) -> str:
+    rng = random.Random(0)
+    vocabulary = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(5000)]
+    words, size = [], 0
+    while size < megabytes * 1_000_000:
+        word = rng.choice(KEYWORDS) if rng.random() < keyword_share else rng.choice(vocabulary)
+        words.append(word.upper() if rng.random() < 0.1 else word)
+        size += len(word) + 1
+    return " ".join(words)
+
+
+def chunked(categorizer_class):
+    def run(text: str) -> None:
+        categorizer = categorizer_class()
+        for start in range(0, len(text), CHUNK_CHARS):
+            categorizer.feed(text[start:start + CHUNK_CHARS])
+    return run
+
+
+def best_time(fn, text: str, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mb", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{args.mb} MB of text, {len(KEYWORDS)} keywords, best of {args.repeat}")
+    runs = (
+        ("presence", chunked(PresenceCategorizer)),
+        ("prefix scans", chunked(PrefixScanCategorizer)),
+        ("current", chunked(KeywordCategorizer)),
+        ("single text", classify_content),
+    )
+    for label, share in (("no keywords", 0.0), ("1% keywords", 0.01)):
+        text = make_text(args.mb, share)
+        print(f"  {label}:")
+        for name, fn in runs:
+            print(f"    {name:>12}: {best_time(fn, text, args.repeat):6.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Compare write throughput and reader/writer concurrency across connection profiles.
+
+Usage: python benchmarks/bench_connection_profile.py [--writes N] [--seconds S]
+"""
+import argparse
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from gcp_tutor.db import (
+    DEFAULT_PROFILE, LEGACY_PROFILE, ConnectionProfile, close_connections,
+    get_connection, init_db, set_connection_profile,
+)
+from gcp_tutor.seed import seed_all
+
+
+def _setup(db_path: str, profile: ConnectionProfile) -> None:
+    set_connection_profile(profile)
+    init_db(db_path)
+    seed_all(db_path)
+    close_connections()
+
+
+def bench_writes(db_path: str, profile: ConnectionProfile, writes: int) -> float:
+    """Commit one flashcard result per transaction; return commits per second."""
+    conn = get_connection(db_path, profile)
+    start = time.perf_counter()
+    for i in range(writes):
+        conn.execute(
+            "INSERT INTO flashcard_results (flashcard_id, rating, reviewed_at) VALUES (?, ?, date('now'))",
+            (i % 100 + 1, 4),
+        )
+        conn.commit()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return writes / elapsed
+
+
+def bench_concurrency(db_path: str, profile: ConnectionProfile, seconds: float) -> dict:
+    """Run a committing writer alongside a dashboard-style reader."""
+    stop = time.perf_counter() + seconds
+    counts = {"writes": 0, "reads": 0, "locked": 0}
+
+    def writer():
+        conn = get_connection(db_path, profile)
+        while time.perf_counter() < stop:
+            try:
+                conn.execute(
+                    "INSERT INTO quiz_results (quiz_question_id, user_answer, is_correct, answered_at) "
+                    "VALUES (1, 'a', 1, datetime('now'))"
+                )
+                conn.commit()
+                counts["writes"] += 1
+            except sqlite3.OperationalError:
+                conn.rollback()
+                counts["locked"] += 1
+        conn.close()
+
+    def reader():
+        conn = get_connection(db_path, profile)
+        while time.perf_counter() < stop:
+            try:
+                conn.execute("SELECT COUNT(*), SUM(is_correct) FROM quiz_results").fetchone()
+                counts["reads"] += 1
+            except sqlite3.OperationalError:
+                counts["locked"] += 1
+        conn.close()
+
+    threads = [threading.Thread(target=writer), threading.Thread(target=reader)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writes", type=int, default=500)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    profiles = {
+        "legacy": LEGACY_PROFILE,
+        "default": DEFAULT_PROFILE,
+    }
+    for name, profile in profiles.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = str(Path(tmp) / "bench.db")
+            _setup(db_path, profile)
+            rate = bench_writes(db_path, profile, args.writes)
+            counts = bench_concurrency(db_path, profile, args.seconds)
+            print(
+                f"{name:<8} writes/s={rate:9.0f}  "
+                f"concurrent writes={counts['writes']:6d} reads={counts['reads']:7d} "
+                f"locked errors={counts['locked']}"
+            )
+    set_connection_profile(DEFAULT_PROFILE)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Provisioning a learner: a fully seeded database vs a progress database
+attached to a shared content database.
+
+Usage: python benchmarks/bench_content_db.py [--learners N]
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from gcp_tutor.dashboard import get_dashboard_snapshot
+from gcp_tutor.db import close_connections, init_db, init_progress_db
+from gcp_tutor.flashcards import get_due_cards
+from gcp_tutor.seed import build_content_db, seed_all
+
+
+def db_bytes(db_path: str) -> int:
+    return sum(os.path.getsize(p) for p in (db_path, f"{db_path}-wal") if os.path.exists(p))
+
+
+def provision_seeded(db_path: str, _content_path: str) -> None:
+    init_db(db_path)
+    seed_all(db_path)
+
+
+def provision_progress(db_path: str, content_path: str) -> None:
+    init_progress_db(db_path, content_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--learners", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        content_path = str(Path(tmp) / "content.db")
+        start = time.perf_counter()
+        build_content_db(content_path)
+        print(f"content database: {(time.perf_counter() - start) * 1000:.1f} ms, "
+              f"{os.path.getsize(content_path) / 1024:.0f} KiB (built once)")
+        print(f"{'layout':>9}  {'provision':>10} {'size':>9} {'due cards':>10} {'dashboard':>10}  (ms, KiB per learner)")
+        for name, provision in (("seeded", provision_seeded), ("progress", provision_progress)):
+            times, sizes, due, dash = [], [], [], []
+            for i in range(args.learners):
+                db_path = str(Path(tmp) / f"{name}-{i}.db")
+                start = time.perf_counter()
+                provision(db_path, content_path)
+                times.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                get_due_cards(db_path, limit=15)
+                due.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                get_dashboard_snapshot(db_path)
+                dash.append(time.perf_counter() - start)
+                close_connections()
+                sizes.append(db_bytes(db_path))
+            n = args.learners
+            print(f"{name:>9}  {sum(times) / n * 1000:10.1f} {sum(sizes) / n / 1024:9.0f} "
+                  f"{sum(due) / n * 1000:10.2f} {sum(dash) / n * 1000:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
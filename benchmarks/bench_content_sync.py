@@ -0,0 +1,60 @@
+"""Content sync cost on an existing database: unchanged content, a small
+edit, and the one-off hashing of a database seeded before content hashes.
+
+Usage: python benchmarks/bench_content_sync.py [--edits 1 10 100] [--runs N]
+"""
+import argparse
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from gcp_tutor import seed
+from gcp_tutor.db import close_connections, connect, init_db
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--edits", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    original = seed.CONTENT_DIR
+    print(f"{'case':>24}  {'ms':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        content = Path(tmp) / "content"
+        shutil.copytree(original, content, ignore=shutil.ignore_patterns("*.db"))
+        seed.CONTENT_DIR = content
+        cards_path = content / "flashcards.json"
+        pristine = cards_path.read_text()
+        try:
+            cases = [("unchanged", 0)] + [(f"{n} edited cards", n) for n in args.edits] + [("unhashed database", None)]
+            for name, edits in cases:
+                total = 0.0
+                for run in range(args.runs):
+                    db_path = str(Path(tmp) / f"bench-{run}.db")
+                    cards_path.write_text(pristine)
+                    init_db(db_path)
+                    seed.seed_all(db_path)
+                    if edits is None:
+                        with connect(db_path) as conn:
+                            conn.execute("UPDATE flashcards SET content_hash = NULL")
+                            conn.execute("UPDATE quiz_questions SET content_hash = NULL")
+                            conn.execute("DELETE FROM content_syncs")
+                    elif edits:
+                        data = json.loads(pristine)
+                        for card in data["flashcards"][:edits]:
+                            card["back"] += f" (rev {run})"
+                        cards_path.write_text(json.dumps(data))
+                    start = time.perf_counter()
+                    seed.sync_content(db_path)
+                    total += time.perf_counter() - start
+                    close_connections()
+                print(f"{name:>24}  {total / args.runs * 1000:8.2f}")
+        finally:
+            seed.CONTENT_DIR = original
+
+
+if __name__ == "__main__":
+    main()
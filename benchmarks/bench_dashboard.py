@@ -0,0 +1,69 @@
+"""Compare the per-function dashboard reads with get_dashboard_snapshot(), cold and cached.
+
+Usage: python benchmarks/bench_dashboard.py [--results 10000 1000000] [--runs N]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from gcp_tutor.dashboard import calc_readiness_score, get_dashboard_snapshot, get_domain_scores, get_study_stats
+from gcp_tutor.cache import clear_cache
+from gcp_tutor.db import close_connections, connect, init_db
+from gcp_tutor.seed import seed_all
+from gcp_tutor.study import get_calendar_days_elapsed, get_current_session_day, get_total_sessions
+
+
+def build(db_path: str, results: int) -> None:
+    init_db(db_path)
+    seed_all(db_path)
+    with connect(db_path) as conn:
+        questions = [row[0] for row in conn.execute("SELECT id FROM quiz_questions")]
+        cards = [row[0] for row in conn.execute("SELECT id FROM flashcards")]
+        conn.executemany(
+            "INSERT INTO quiz_results (quiz_question_id, user_answer, is_correct, answered_at) VALUES (?, 'A', ?, ?)",
+            ((questions[i % len(questions)], i % 3 != 0, f"2026-01-01T00:00:{i:09d}") for i in range(results)),
+        )
+        conn.executemany(
+            "INSERT INTO flashcard_results (flashcard_id, rating, reviewed_at) VALUES (?, ?, '2026-01-01')",
+            ((cards[i % len(cards)], i % 6) for i in range(results)),
+        )
+
+
+def separate(db_path: str) -> None:
+    calc_readiness_score(db_path)
+    get_current_session_day(db_path)
+    get_total_sessions(db_path)
+    get_calendar_days_elapsed(db_path)
+    get_study_stats(db_path)
+    get_domain_scores(db_path)
+
+
+def timed(fn, db_path: str, runs: int, cold: bool = True) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        if cold:
+            clear_cache()
+        fn(db_path)
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--results", type=int, nargs="+", default=[10_000, 1_000_000])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'results':>9}  {'separate ms':>12} {'snapshot ms':>12} {'cached ms':>10}")
+    for results in args.results:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = str(Path(tmp) / "bench.db")
+            build(db_path, results)
+            print(f"{results:>9}  {timed(separate, db_path, args.runs):12.2f} "
+                  f"{timed(get_dashboard_snapshot, db_path, args.runs):12.2f} "
+                  f"{timed(get_dashboard_snapshot, db_path, args.runs, cold=False):10.3f}")
+            close_connections()
+
+
+if __name__ == "__main__":
+    main()
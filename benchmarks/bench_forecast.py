@@ -0,0 +1,69 @@
+"""Time the review-workload forecast on a large synthetic deck.
+
+Usage: python benchmarks/bench_forecast.py [--cards N] [--trials T] [--days D]
+"""
+import argparse
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from gcp_tutor.db import connect, init_db
+from gcp_tutor.forecast import forecast_reviews, np
+from gcp_tutor.seed import seed_domains
+
+
+def build_deck(db_path: str, cards: int) -> None:
+    """Insert ``cards`` flashcards in assorted SM-2 states plus some history."""
+    init_db(db_path)
+    seed_domains(db_path)
+    rng = random.Random(0)
+    today = date.today()
+    rows, results = [], []
+    for i in range(1, cards + 1):
+        if rng.random() < 0.1:
+            rows.append((i, (i % 5) + 1, f"front {i}", "back", 2.5, 0, 0, None))
+            continue
+        interval = rng.choice([1, 6, 15, 38, 90, 200])
+        next_review = (today + timedelta(days=rng.randint(-5, interval))).isoformat()
+        rows.append((i, (i % 5) + 1, f"front {i}", "back", rng.uniform(1.3, 2.8), interval, rng.randint(1, 6), next_review))
+        results.append((i, rng.choice([1, 3, 4, 4, 5]), today.isoformat()))
+    with connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO flashcards (id, domain_id, front, back) VALUES (?, ?, ?, ?)",
+            [row[:4] for row in rows],
+        )
+        conn.executemany(
+            """UPDATE card_state SET ease_factor = ?, interval = ?, repetitions = ?, next_review = ?
+            WHERE user_id = 1 AND flashcard_id = ?""",
+            [(*row[4:], row[0]) for row in rows],
+        )
+        conn.executemany(
+            "INSERT INTO flashcard_results (flashcard_id, rating, reviewed_at) VALUES (?, ?, ?)", results,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cards", type=int, default=50_000)
+    parser.add_argument("--trials", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.db")
+        build_deck(db_path, args.cards)
+        start = time.perf_counter()
+        forecast = forecast_reviews(db_path, days=args.days, trials=args.trials, seed=0)
+        elapsed = time.perf_counter() - start
+    backend = "numpy" if np is not None else "scalar"
+    events = sum(day["expected"] for day in forecast) * args.trials
+    print(f"{args.cards} cards, {args.trials} trials, {args.days} days ({backend}): {elapsed:.2f}s "
+          f"({events / elapsed / 1e6:.1f}M simulated reviews/s)")
+    for day in forecast[:7]:
+        print(f"  {day['date']}  expected {day['expected']:7.1f}  range {day['low']}-{day['high']}")
+
+
+if __name__ == "__main__":
+    main()
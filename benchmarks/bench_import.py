@@ -0,0 +1,67 @@
+"""Directory import: parsing files serially vs in a process pool.
+
+Generates a folder of HTML notes (parsed with BeautifulSoup, like most
+real-world imports CPU-bound) and imports it with each worker count, then
+re-imports the unchanged folder, which only stats each file.
+
+Usage: python benchmarks/bench_import.py [--files N] [--paragraphs N] [--workers 1 2 4]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from gcp_tutor.db import close_connections, init_db
+from gcp_tutor.importer import import_directory
+from gcp_tutor.seed import seed_domains
+
+WORDS = (
+    "project billing quota gke kubectl cloud run pub/sub vpc subnet firewall snapshot monitoring "
+    "logging alert iam role service account permission bucket nearline coldline spanner bigtable"
+).split()
+
+
+def write_notes(folder: Path, files: int, paragraphs: int) -> None:
+    rng = random.Random(0)
+    folder.mkdir()
+    for i in range(files):
+        body = "".join(
+            f"<div class='p'><p>{' '.join(rng.choices(WORDS, k=60))}</p><ul><li>{rng.choice(WORDS)}</li></ul></div>"
+            for _ in range(paragraphs)
+        )
+        (folder / f"note-{i:04d}.html").write_text(f"<html><body><h1>Note {i}</h1>{body}</body></html>")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--paragraphs", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp) / "notes"
+        write_notes(folder, args.files, args.paragraphs)
+        megabytes = sum(p.stat().st_size for p in folder.iterdir()) / 1e6
+        print(f"{args.files} HTML files, {megabytes:.1f} MB, {os.cpu_count()} CPUs")
+        for workers in args.workers:
+            db_path = str(Path(tmp) / f"bench-{workers}.db")
+            init_db(db_path)
+            seed_domains(db_path)
+            start = time.perf_counter()
+            result = import_directory(db_path, str(folder), workers=workers)
+            elapsed = time.perf_counter() - start
+            start = time.perf_counter()
+            again = import_directory(db_path, str(folder), workers=workers)
+            resync = time.perf_counter() - start
+            close_connections()
+            print(
+                f"  workers={workers:<3} {elapsed:7.2f} s  ({len(result['imported']) / elapsed:6.1f} files/s), "
+                f"re-import {resync:5.2f} s ({len(again['skipped'])} skipped)"
+            )
+
+
+if __name__ == "__main__":
+    main()
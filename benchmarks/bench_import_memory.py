@@ -0,0 +1,69 @@
+"""Peak memory importing one large document: streamed in chunks vs read whole.
+
+Usage: python benchmarks/bench_import_memory.py [--mb N] [--format txt|html]
+"""
+import argparse
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from gcp_tutor.db import close_connections, connect, init_db
+from gcp_tutor.importer import categorize_content, import_file, read_file_content
+from gcp_tutor.seed import seed_domains
+
+WORDS = "project quota gke kubectl vpc subnet snapshot monitoring iam role bucket nearline spanner".split()
+
+
+def write_document(path: Path, megabytes: int, html: bool) -> None:
+    rng = random.Random(0)
+    with open(path, "w") as f:
+        written = 0
+        while written < megabytes * 1_000_000:
+            line = " ".join(rng.choices(WORDS, k=14))
+            line = f"<p>{line}</p>\n" if html else f"{line}\n"
+            written += f.write(line)
+
+
+def read_whole(db_path: str, file_path: str) -> None:
+    """The previous approach: the whole text in memory, stored in one cell."""
+    content = read_file_content(file_path)
+    categorize_content(content)
+    with connect(db_path) as conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS whole (content_text TEXT)")
+        conn.execute("INSERT INTO whole VALUES (?)", (content,))
+
+
+def measure(fn, *args) -> tuple[float, float]:
+    """(seconds, peak traced MB) for one call."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mb", type=int, default=50)
+    parser.add_argument("--format", choices=("txt", "html"), default="txt")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        doc = Path(tmp) / f"big.{args.format}"
+        write_document(doc, args.mb, args.format == "html")
+        print(f"{doc.name}: {doc.stat().st_size / 1e6:.0f} MB (times include tracemalloc overhead)")
+        for name, fn in (("streamed", import_file), ("read whole", read_whole)):
+            db_path = str(Path(tmp) / f"{name}.db")
+            init_db(db_path)
+            seed_domains(db_path)
+            elapsed, peak = measure(fn, db_path, str(doc))
+            close_connections()
+            print(f"  {name:>10}: {elapsed:6.2f} s, peak {peak:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Linking imported notes to subtopics, and looking notes up for weak subtopics.
+
+Imports a generated document built from the seeded content's own vocabulary,
+times linking its passages with NumPy and with the pure-Python postings, then
+times get_subtopic_notes for every subtopic against the precomputed links.
+
+Usage: python benchmarks/bench_linking.py [--kb N]
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from gcp_tutor import linking
+from gcp_tutor.db import close_connections, connect, init_db
+from gcp_tutor.importer import import_file
+from gcp_tutor.linking import clear_subtopic_indexes, get_subtopic_notes, link_imports, subtopic_documents, terms
+from gcp_tutor.seed import seed_all
+
+
+def write_notes(path: Path, kilobytes: int, vocabulary: list[str]) -> None:
+    rng = random.Random(0)
+    with open(path, "w") as f:
+        written = 0
+        while written < kilobytes * 1000:
+            paragraph = " ".join(rng.choices(vocabulary, k=rng.randint(40, 160)))
+            written += f.write(paragraph + ".\n\n")
+
+
+def timed(fn, *args) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--kb", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.db")
+        init_db(db_path)
+        seed_all(db_path)
+        with connect(db_path) as conn:
+            documents = subtopic_documents(conn)
+            subtopic_ids = list(documents)
+        vocabulary = [term for document in documents.values() for term in terms(document)]
+        notes = Path(tmp) / "notes.md"
+        write_notes(notes, args.kb, vocabulary + ["lorem", "ipsum", "dolor"] * 200)
+        import_file(db_path, str(notes))
+        with connect(db_path) as conn:
+            chunks = [row[0] for row in conn.execute("SELECT unpack_text(text) FROM imported_chunks")]
+        passages = sum(len(list(linking.split_passages(text))) for text in chunks)
+        print(f"{args.kb} KB of notes, {passages} passages, {len(subtopic_ids)} subtopics")
+
+        for name, numpy in (("numpy", linking.load_numpy()), ("postings", None)):
+            if name == "numpy" and numpy is None:
+                print("  numpy: not installed")
+                continue
+            linking.np = numpy
+            clear_subtopic_indexes()
+            elapsed, links = timed(link_imports, db_path)
+            print(f"  link ({name:>8}): {elapsed:6.2f} s  ({passages / elapsed:8.0f} passages/s, {links} links)")
+
+        elapsed, _ = timed(get_subtopic_notes, db_path, subtopic_ids)
+        print(f"  notes for all {len(subtopic_ids)} subtopics: {elapsed * 1000:6.2f} ms")
+        close_connections()
+
+
+if __name__ == "__main__":
+    main()
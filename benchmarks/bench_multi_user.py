@@ -0,0 +1,79 @@
+"""Per-learner query cost as the number of learners in one database grows.
+
+Usage: python benchmarks/bench_multi_user.py [--users 1 1000 10000] [--results-per-user N] [--runs N]
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from gcp_tutor.cache import clear_cache
+from gcp_tutor.dashboard import get_dashboard_snapshot
+from gcp_tutor.db import close_connections, connect, init_db
+from gcp_tutor.flashcards import get_due_cards, record_flashcard_result
+from gcp_tutor.quiz import get_quiz_score
+from gcp_tutor.review import get_weak_domains
+from gcp_tutor.seed import seed_all
+
+
+def build(db_path: str, users: int, results_per_user: int) -> None:
+    init_db(db_path)
+    seed_all(db_path)
+    rng = random.Random(0)
+    with connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO users (name) VALUES (?)", ((f"learner {i}",) for i in range(2, users + 1)),
+        )
+        questions = [row[0] for row in conn.execute("SELECT id FROM quiz_questions")]
+        cards = [row[0] for row in conn.execute("SELECT id FROM flashcards")]
+        conn.executemany(
+            """INSERT INTO quiz_results (user_id, quiz_question_id, user_answer, is_correct, answered_at)
+            VALUES (?, ?, 'A', ?, ?)""",
+            (
+                (user, rng.choice(questions), rng.random() < 0.7, f"2026-01-01T{user}:{i}")
+                for user in range(1, users + 1) for i in range(results_per_user)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO flashcard_results (user_id, flashcard_id, rating, reviewed_at) VALUES (?, ?, ?, '2026-01-01')",
+            (
+                (user, rng.choice(cards), rng.randint(0, 5))
+                for user in range(1, users + 1) for _ in range(results_per_user)
+            ),
+        )
+
+
+def timed(fn, runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        clear_cache()
+        fn()
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 1_000, 10_000])
+    parser.add_argument("--results-per-user", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'users':>7}  {'due cards':>10} {'record':>8} {'dashboard':>10} {'weak':>7} {'score':>7}  (ms, learner 1)")
+    for users in args.users:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = str(Path(tmp) / "bench.db")
+            build(db_path, users, args.results_per_user)
+            row = [
+                timed(lambda: get_due_cards(db_path, limit=15, user_id=1), args.runs),
+                timed(lambda: record_flashcard_result(db_path, 1, 1, user_id=1), args.runs),
+                timed(lambda: get_dashboard_snapshot(db_path, user_id=1), args.runs),
+                timed(lambda: get_weak_domains(db_path, user_id=1), args.runs),
+                timed(lambda: get_quiz_score(db_path, user_id=1), args.runs),
+            ]
+            print(f"{users:>7}  {row[0]:10.3f} {row[1]:8.3f} {row[2]:10.3f} {row[3]:7.3f} {row[4]:7.3f}")
+            close_connections()
+
+
+if __name__ == "__main__":
+    main()
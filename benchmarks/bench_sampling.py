@@ -0,0 +1,76 @@
+"""Compare ORDER BY RANDOM() with the sampling layer at several bank sizes.
+
+Usage: python benchmarks/bench_sampling.py [--sizes 1000 100000 1000000] [--draws N]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from gcp_tutor.db import connect, init_db
+from gcp_tutor.sampling import make_rng, sample_due_cards, sample_rows
+from gcp_tutor.seed import seed_domains
+
+
+def build(db_path: str, size: int) -> None:
+    init_db(db_path)
+    seed_domains(db_path)
+    with connect(db_path) as conn:
+        conn.executemany(
+            """INSERT INTO quiz_questions (domain_id, stem, choice_a, choice_b, choice_c, choice_d, correct_answer)
+            VALUES (?, ?, 'a', 'b', 'c', 'd', 'a')""",
+            ((i % 5 + 1, f"question {i}") for i in range(size)),
+        )
+        conn.executemany(
+            "INSERT INTO flashcards (domain_id, front, back) VALUES (?, ?, 'back')",
+            ((i % 5 + 1, f"card {i}") for i in range(size)),
+        )
+
+
+def timed(fn, draws: int) -> float:
+    start = time.perf_counter()
+    for _ in range(draws):
+        fn()
+    return (time.perf_counter() - start) / draws * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--draws", type=int, default=20)
+    args = parser.parse_args()
+    rng = make_rng(0)
+
+    print(f"{'rows':>9}  {'query':<22} {'RANDOM() ms':>12} {'sampler ms':>11}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = str(Path(tmp) / "bench.db")
+            build(db_path, size)
+            with connect(db_path) as conn:
+                cases = [
+                    (
+                        "10 questions, domain 3",
+                        lambda: conn.execute(
+                            "SELECT * FROM quiz_questions WHERE domain_id = 3 ORDER BY RANDOM() LIMIT 10"
+                        ).fetchall(),
+                        lambda: sample_rows(conn, db_path, "quiz_questions", 10, rng, "domain_id", 3),
+                    ),
+                    (
+                        "12 due cards",
+                        lambda: conn.execute(
+                            """SELECT * FROM card_state WHERE user_id = 1
+                            AND (next_review IS NULL OR next_review <= '2100-01-01')
+                            ORDER BY next_review ASC NULLS FIRST, RANDOM() LIMIT 12"""
+                        ).fetchall(),
+                        lambda: sample_due_cards(
+                            conn, "next_review IS NULL OR next_review <= ?", ("2100-01-01",), 12, rng,
+                        ),
+                    ),
+                ]
+                for name, baseline, sampler in cases:
+                    sampler()  # build the id index once
+                    print(f"{size:>9}  {name:<22} {timed(baseline, args.draws):12.2f} {timed(sampler, args.draws):11.3f}")
+
+
+if __name__ == "__main__":
+    main()
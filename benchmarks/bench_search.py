@@ -0,0 +1,84 @@
+"""Search latency: the FTS5 index vs a LIKE scan, as imported notes grow.
+
+Usage: python benchmarks/bench_search.py [--docs N] [--words N] [--runs N]
+"""
+import argparse
+import random
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+from gcp_tutor.db import close_connections, connect, init_db, pack_text
+from gcp_tutor.search import search
+from gcp_tutor.seed import seed_all
+
+QUERIES = ("service account impersonation", "nearline", "pub/sub", "autoscaling node pool")
+
+LIKE_QUERY = """
+SELECT 'flashcard', id FROM flashcards WHERE NOT retired AND (front LIKE :p OR back LIKE :p)
+UNION ALL
+SELECT 'question', id FROM quiz_questions WHERE NOT retired AND (stem LIKE :p OR explanation LIKE :p)
+UNION ALL
+SELECT 'reading', id FROM reading_blobs WHERE body LIKE :p
+UNION ALL
+SELECT 'import', id FROM imported_chunks WHERE unpack_text(text) LIKE :p
+"""
+
+
+def fill_imports(db_path: str, docs: int, words: int) -> float:
+    """Insert ``docs`` synthetic notes built from the seeded vocabulary; return seconds taken.
+
+    Words follow a Zipf distribution, as in natural text: a few are in every
+    note, most are rare.
+    """
+    rng = random.Random(0)
+    with connect(db_path) as conn:
+        text = " ".join(row[0] for row in conn.execute("SELECT front || ' ' || back FROM flashcards"))
+    counts = Counter(text.lower().split())
+    vocabulary = [word for word, _ in counts.most_common()]
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    start = time.perf_counter()
+    with connect(db_path) as conn:
+        for i in range(docs):
+            import_id = conn.execute("INSERT INTO imported_content (filename) VALUES (?)", (f"note-{i}.md",)).lastrowid
+            conn.execute(
+                "INSERT INTO imported_chunks (import_id, seq, text) VALUES (?, 0, ?)",
+                (import_id, pack_text(" ".join(rng.choices(vocabulary, weights, k=words)))),
+            )
+    return time.perf_counter() - start
+
+
+def best_ms(fn, runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--words", type=int, default=400)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.db")
+        init_db(db_path)
+        seed_all(db_path)
+        seconds = fill_imports(db_path, args.docs, args.words)
+        print(f"imported {args.docs} notes of {args.words} words in {seconds * 1000:.0f} ms (index kept by triggers)")
+        print(f"{'query':>32}  {'fts5':>8} {'like':>8}  (ms, best of {args.runs})")
+        for query in QUERIES:
+            fts = best_ms(lambda: search(db_path, query), args.runs)
+            with connect(db_path) as conn:
+                like = best_ms(lambda: conn.execute(LIKE_QUERY, {"p": f"%{query}%"}).fetchall(), args.runs)
+            print(f"{query:>32}  {fts:8.2f} {like:8.2f}")
+        close_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""First-run latency: creating and seeding a new database, stage by stage,
+vs copying the prebuilt template.
+
+Usage: python benchmarks/bench_seed.py [--runs N]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from gcp_tutor import seed
+from gcp_tutor.db import close_connections, init_db
+
+STAGES = ("seed_domains", "seed_study_plan", "seed_flashcards", "seed_questions", "ensure_reading_content")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    timings: dict[str, list[float]] = {}
+
+    def timed(name, fn, *fn_args):
+        start = time.perf_counter()
+        fn(*fn_args)
+        timings.setdefault(name, []).append((time.perf_counter() - start) * 1000)
+
+    template_dir = tempfile.TemporaryDirectory()
+    template_path = str(Path(template_dir.name) / "template.db")
+    seed.build_template(template_path)
+
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = str(Path(tmp) / "bench.db")
+            timed("init_db", init_db, db_path)
+            for stage in STAGES:
+                timed(stage, getattr(seed, stage), db_path)
+            close_connections()
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = str(Path(tmp) / "bench.db")
+            start = time.perf_counter()
+            init_db(db_path)
+            seed.seed_all(db_path)
+            timings.setdefault("first run (init_db + seed_all)", []).append((time.perf_counter() - start) * 1000)
+            close_connections()
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = str(Path(tmp) / "bench.db")
+            start = time.perf_counter()
+            assert seed.install_template(db_path, template_path)
+            init_db(db_path)
+            seed.seed_all(db_path)
+            timings.setdefault("first run (template copy)", []).append((time.perf_counter() - start) * 1000)
+            close_connections()
+    template_dir.cleanup()
+
+    print(f"{'stage':>32}  {'median':>8} {'min':>8}  (ms, {args.runs} runs)")
+    for name, values in timings.items():
+        values.sort()
+        print(f"{name:>32}  {values[len(values) // 2]:8.2f} {values[0]:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
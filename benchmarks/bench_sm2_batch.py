@@ -0,0 +1,54 @@
+"""Compare scalar and batch SM-2 when replaying review histories.
+
+Usage: python benchmarks/bench_sm2_batch.py [--cards N] [--reviews R]
+"""
+import argparse
+import random
+import time
+
+from gcp_tutor import sm2
+from gcp_tutor.sm2 import batch_array, sm2_update, sm2_update_batch
+
+
+def replay_scalar(ratings: list[list[int]]) -> None:
+    for history in ratings:
+        state = {"interval": 0, "repetitions": 0, "ease_factor": 2.5}
+        for q in history:
+            state = sm2_update(q, state["repetitions"], state["ease_factor"], state["interval"])
+
+
+def replay_batch(ratings: list[list[int]], reviews: int) -> None:
+    n = len(ratings)
+    interval = batch_array([0] * n, "i")
+    repetitions = batch_array([0] * n, "i")
+    ease_factor = batch_array([2.5] * n, "d")
+    for step in range(reviews):
+        quality = [history[step] for history in ratings]
+        interval, repetitions, ease_factor = sm2_update_batch(quality, repetitions, ease_factor, interval)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cards", type=int, default=100_000)
+    parser.add_argument("--reviews", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    ratings = [[rng.randint(0, 5) for _ in range(args.reviews)] for _ in range(args.cards)]
+    backend = "numpy" if sm2.load_numpy() is not None else "array"
+
+    start = time.perf_counter()
+    replay_scalar(ratings)
+    scalar = time.perf_counter() - start
+
+    start = time.perf_counter()
+    replay_batch(ratings, args.reviews)
+    batch = time.perf_counter() - start
+
+    print(f"{args.cards} cards x {args.reviews} reviews")
+    print(f"  scalar sm2_update:         {scalar:7.3f}s")
+    print(f"  sm2_update_batch ({backend}): {batch:7.3f}s  ({scalar / batch:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Startup cost: importing the app, and preparing the database on launch.
+
+The import budget is enforced in tests/test_app.py.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--top N]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from gcp_tutor.db import close_connections, init_db
+from gcp_tutor.seed import content_hash, is_current, is_seeded, seed_all
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "tests"))
+from conftest import import_times  # noqa: E402
+
+
+def timed(fn, runs: int, cold: bool = False) -> float:
+    """Best of ``runs`` in ms; ``cold`` closes the thread's connections before each run."""
+    best = float("inf")
+    for _ in range(runs):
+        if cold:
+            close_connections()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    totals = []
+    for _ in range(args.runs):
+        times = import_times("gcp_tutor.app")
+        totals.append(times["gcp_tutor.app"])
+    totals.sort()
+    print(f"import gcp_tutor.app: median {totals[len(totals) // 2] / 1000:.1f} ms, min {totals[0] / 1000:.1f} ms")
+    print("slowest imports (cumulative ms, last run):")
+    for name, cumulative in sorted(times.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {cumulative / 1000:8.1f}  {name}")
+
+    def full_path():
+        init_db(db_path)
+        is_seeded(db_path)
+        seed_all(db_path)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.db")
+        init_db(db_path)
+        seed_all(db_path)
+        # The connection opened here is the one the app goes on to use.
+        open_ms = timed(lambda: is_seeded(db_path), args.runs, cold=True)
+        print(f"opening the database connection:                {open_ms:.3f} ms (needed on every path)")
+        print(f"database check, full path (init_db + seed_all): {timed(full_path, args.runs):.3f} ms")
+        print(f"database check, fast path (is_current):         {timed(lambda: is_current(db_path), args.runs):.3f} ms")
+        print(f"  of which hashing content/*.json, when touched: {timed(content_hash, args.runs):.3f} ms")
+        close_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Database size before and after schema 14: reading text stored once, large imported chunks compressed.
+
+Seeds a database and imports generated notes made of sentences from the
+seeded flashcards and questions, then copies its study plan and imports
+into a database at schema 13 (reading text on every study day, chunks as
+plain text) and migrates that copy, reporting the space each table and its
+search index takes before and after.
+
+Usage: python benchmarks/bench_storage.py [--kb N]
+"""
+import argparse
+import random
+import re
+import tempfile
+import time
+from pathlib import Path
+
+from gcp_tutor.db import (
+    MIGRATIONS, close_connections, connect, get_connection, init_db, migrate, storage_report,
+)
+from gcp_tutor.importer import import_file
+from gcp_tutor.seed import seed_all
+
+TABLES = (
+    "study_days", "study_days_fts", "reading_blobs", "reading_blobs_fts", "imported_chunks", "imported_chunks_fts",
+)
+
+COPY_TO_SCHEMA_13 = """
+INSERT INTO domains (id, name, section_number, exam_weight, description)
+SELECT id, name, section_number, exam_weight, description FROM current.domains;
+INSERT INTO study_days (day_number, domain_id, status, reading_content)
+SELECT sd.day_number, sd.domain_id, sd.status, rb.body
+FROM current.study_days sd LEFT JOIN current.reading_blobs rb ON rb.id = sd.reading_blob_id;
+INSERT INTO imported_content (id, filename, domain_id) SELECT id, filename, domain_id FROM current.imported_content;
+INSERT INTO imported_chunks (id, import_id, seq, text)
+SELECT id, import_id, seq, unpack_text(text) FROM current.imported_chunks;
+"""
+
+
+def write_notes(path: Path, kilobytes: int, sentences: list[str]) -> None:
+    rng = random.Random(0)
+    with open(path, "w") as f:
+        written = 0
+        while written < kilobytes * 1000:
+            written += f.write(" ".join(rng.choices(sentences, k=rng.randint(2, 6))) + "\n\n")
+
+
+def report(conn, db_path: str) -> dict[str, int]:
+    conn.commit()
+    conn.execute("VACUUM")
+    return storage_report(db_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--kb", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        current = str(Path(tmp) / "current.db")
+        init_db(current)
+        seed_all(current)
+        with connect(current) as conn:
+            text = " ".join(
+                row[0] for row in conn.execute("SELECT back FROM flashcards UNION ALL SELECT stem FROM quiz_questions")
+            )
+        notes = Path(tmp) / "notes.md"
+        write_notes(notes, args.kb, [s for s in re.split(r"(?<=[.!?])\s+", text) if s])
+        import_file(current, str(notes))
+        close_connections()
+
+        old = str(Path(tmp) / "old.db")
+        conn = get_connection(old)
+        for version, script in enumerate(MIGRATIONS[:13], start=1):
+            conn.executescript(f"BEGIN; {script}; PRAGMA user_version = {version}; COMMIT;")
+        conn.execute("ATTACH DATABASE ? AS current", (current,))
+        conn.executescript(COPY_TO_SCHEMA_13)
+        conn.commit()
+        conn.execute("DETACH DATABASE current")
+        before = report(conn, old)
+        start = time.perf_counter()
+        migrate(conn)
+        elapsed = time.perf_counter() - start
+        after = report(conn, old)
+        conn.close()
+        close_connections()
+
+        print(f"{notes.stat().st_size / 1e6:.1f} MB of notes; migrating to schema 14 took {elapsed:.2f} s")
+        print(f"{'':>20} {'schema 13':>10} {'schema 14':>10}  (KB)")
+        for name in TABLES:
+            print(f"{name:>20} {before.get(name, 0) / 1024:10.0f} {after.get(name, 0) / 1024:10.0f}")
+        total_before, total_after = sum(before.values()), sum(after.values())
+        print(f"{'database':>20} {total_before / 1024:10.0f} {total_after / 1024:10.0f}"
+              f"  ({1 - total_after / total_before:.0%} smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""Build hook: ship the ready-seeded database template with the package.
+
+Project metadata lives in pyproject.toml. ``build_py`` additionally writes
+``gcp_tutor/content/template.db`` (see ``gcp_tutor.seed.build_template``)
+into the build directory, so every wheel carries a template matching its
+content and schema.
+"""
+import sys
+from pathlib import Path
+
+from setuptools import setup
+from setuptools.command.build_py import build_py
+
+SRC = Path(__file__).resolve().parent / "src"
+
+
+class build_py_with_template(build_py):
+    def run(self):
+        super().run()
+        if self.dry_run:
+            return
+        sys.path.insert(0, str(SRC))
+        from gcp_tutor.seed import build_template
+        template = Path(self.build_lib) / "gcp_tutor" / "content" / "template.db"
+        template.parent.mkdir(parents=True, exist_ok=True)
+        build_template(str(template))
+
+
+setup(cmdclass={"build_py": build_py_with_template})
@@ -1,16 +1,19 @@
 """Interactive CLI application."""
+import argparse
+import glob
 import sys
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from rich.console import Console
+from rich.markup import escape
 from rich.panel import Panel
-from rich.table import Table
 from rich.prompt import Prompt, IntPrompt
-from rich.progress import Progress, BarColumn, TextColumn
-from rich.text import Text
 
-from gcp_tutor.db import init_db, DEFAULT_DB_PATH
-from gcp_tutor.seed import seed_all, is_seeded
+from gcp_tutor.db import (
+    init_db, init_progress_db, connect, close_connections, linked_content_path, DEFAULT_DB_PATH, DEFAULT_USER_ID,
+)
+from gcp_tutor.seed import build_content_db, install_template, is_current, seed_all, is_seeded
 from gcp_tutor.study import (
     get_current_session_day, get_todays_plan, start_new_session,
     complete_session_component, get_calendar_days_elapsed, get_completed_sessions,
@@ -22,12 +25,13 @@ from gcp_tutor.flashcards import get_due_cards, get_cards_for_domain, record_fla
 from gcp_tutor.quiz import (
     get_quiz_questions, get_questions_for_domain, record_quiz_answer, get_quiz_score,
 )
-from gcp_tutor.dashboard import (
-    calc_readiness_score, get_readiness_label, get_readiness_color,
-    get_domain_scores, get_study_stats,
-)
+from gcp_tutor.dashboard import FORECAST_DAYS, get_readiness_color, get_dashboard_snapshot, get_review_forecast
 from gcp_tutor.review import get_weak_subtopics, get_weak_domains
-from gcp_tutor.importer import import_file
+
+# Importing, card generation, note linking, search, journaling and learner
+# lookup are imported where they are used, keeping them off startup.
+if TYPE_CHECKING:
+    from gcp_tutor.recorder import ResultRecorder
 
 console = Console()
 
@@ -67,6 +71,7 @@ def show_menu():
         ("dashboard", "Readiness score + progress"),
         ("review", "Drill weak areas"),
         ("import", "Add study material"),
+        ("search", "Find cards, questions, reading and notes"),
         ("plan", "View/reset 30-day plan"),
         ("quit", "Exit"),
     ]
@@ -74,14 +79,17 @@ def show_menu():
         console.print(f"  [cyan]{cmd:<14}[/cyan] {desc}")
 
 
-def run_flashcard_session(db_path: str, cards: list, session_day: int = None, allow_exit: bool = False) -> None:
+def run_flashcard_session(
+    db_path: str, cards: list, session_day: int = None, allow_exit: bool = False,
+    recorder: "ResultRecorder" = None, user_id: int = DEFAULT_USER_ID,
+) -> None:
     if not cards:
         console.print("[yellow]No flashcards due right now![/yellow]")
         return
 
     # Filter out already-completed cards when resuming
     if session_day is not None:
-        done_ids = get_completed_session_items(db_path, session_day, "flashcard")
+        done_ids = get_completed_session_items(db_path, session_day, "flashcard", user_id=user_id)
         cards = [c for c in cards if c["id"] not in done_ids]
         if not cards:
             console.print("[yellow]All flashcards already completed![/yellow]")
@@ -96,28 +104,38 @@ def run_flashcard_session(db_path: str, cards: list, session_day: int = None, al
         lambda p, **kw: IntPrompt.ask(p, **kw)
     )
 
-    for i, card in enumerate(cards, 1):
-        console.print(Panel(card["front"], title=f"Card {i}/{total}", border_style="cyan"))
-        prompt_fn("[dim]Press Enter to reveal answer (or 'q' to save & exit)[/dim]")
-        console.print(Panel(card["back"], border_style="green"))
-        rating = int_prompt_fn(
-            "Rate yourself (0=forgot, 3=hard, 4=good, 5=easy)",
-            choices=["0", "1", "2", "3", "4", "5"],
-        )
-        record_flashcard_result(db_path, card["id"], rating)
-        if session_day is not None:
-            record_session_item(db_path, session_day, "flashcard", card["id"])
-        console.print()
-
-
-def run_quiz_session(db_path: str, questions: list, session_day: int = None, allow_exit: bool = False) -> tuple[int, int]:
+    try:
+        for i, card in enumerate(cards, 1):
+            console.print(Panel(card["front"], title=f"Card {i}/{total}", border_style="cyan"))
+            prompt_fn("[dim]Press Enter to reveal answer (or 'q' to save & exit)[/dim]")
+            console.print(Panel(card["back"], border_style="green"))
+            rating = int_prompt_fn(
+                "Rate yourself (0=forgot, 3=hard, 4=good, 5=easy)",
+                choices=["0", "1", "2", "3", "4", "5"],
+            )
+            if recorder is not None:
+                recorder.record_flashcard_result(card["id"], rating, session_day)
+            else:
+                record_flashcard_result(db_path, card["id"], rating, user_id=user_id)
+                if session_day is not None:
+                    record_session_item(db_path, session_day, "flashcard", card["id"], user_id=user_id)
+            console.print()
+    finally:
+        if recorder is not None:
+            recorder.flush()
+
+
+def run_quiz_session(
+    db_path: str, questions: list, session_day: int = None, allow_exit: bool = False,
+    recorder: "ResultRecorder" = None, user_id: int = DEFAULT_USER_ID,
+) -> tuple[int, int]:
     if not questions:
         console.print("[yellow]No questions available![/yellow]")
         return 0, 0
 
     # Filter out already-completed questions when resuming
     if session_day is not None:
-        done_ids = get_completed_session_items(db_path, session_day, "quiz")
+        done_ids = get_completed_session_items(db_path, session_day, "quiz", user_id=user_id)
         questions = [q for q in questions if q["id"] not in done_ids]
         if not questions:
             console.print("[yellow]All quiz questions already completed![/yellow]")
@@ -130,58 +148,68 @@ def run_quiz_session(db_path: str, questions: list, session_day: int = None, all
     use_session_prompts = session_day is not None or allow_exit
     prompt_fn = session_prompt if use_session_prompts else Prompt.ask
 
-    for i, q in enumerate(questions, 1):
-        console.print(f"[bold]Q{i}.[/bold] {q['stem']}\n")
-        console.print(f"  [cyan]a)[/cyan] {q['choice_a']}")
-        console.print(f"  [cyan]b)[/cyan] {q['choice_b']}")
-        console.print(f"  [cyan]c)[/cyan] {q['choice_c']}")
-        console.print(f"  [cyan]d)[/cyan] {q['choice_d']}")
-        quiz_choices = ["a", "b", "c", "d"]
-        if use_session_prompts:
-            quiz_choices = quiz_choices + ["q", "menu"]
-        answer = prompt_fn("\nYour answer", choices=quiz_choices)
-        is_correct = record_quiz_answer(db_path, q["id"], answer)
-        if session_day is not None:
-            record_session_item(db_path, session_day, "quiz", q["id"])
-        if is_correct:
-            console.print("[green]Correct![/green]")
-            correct += 1
-        else:
-            console.print(f"[red]Incorrect.[/red] Answer: [green]{q['correct_answer']}[/green]")
-        if q["explanation"]:
-            console.print(f"[dim]{q['explanation']}[/dim]")
-        console.print()
+    try:
+        for i, q in enumerate(questions, 1):
+            console.print(f"[bold]Q{i}.[/bold] {q['stem']}\n")
+            console.print(f"  [cyan]a)[/cyan] {q['choice_a']}")
+            console.print(f"  [cyan]b)[/cyan] {q['choice_b']}")
+            console.print(f"  [cyan]c)[/cyan] {q['choice_c']}")
+            console.print(f"  [cyan]d)[/cyan] {q['choice_d']}")
+            quiz_choices = ["a", "b", "c", "d"]
+            if use_session_prompts:
+                quiz_choices = quiz_choices + ["q", "menu"]
+            answer = prompt_fn("\nYour answer", choices=quiz_choices)
+            if recorder is not None:
+                is_correct = recorder.record_quiz_answer(q, answer, session_day)
+            else:
+                is_correct = record_quiz_answer(db_path, q["id"], answer, user_id=user_id)
+                if session_day is not None:
+                    record_session_item(db_path, session_day, "quiz", q["id"], user_id=user_id)
+            if is_correct:
+                console.print("[green]Correct![/green]")
+                correct += 1
+            else:
+                console.print(f"[red]Incorrect.[/red] Answer: [green]{q['correct_answer']}[/green]")
+            if q["explanation"]:
+                console.print(f"[dim]{q['explanation']}[/dim]")
+            console.print()
+    finally:
+        if recorder is not None:
+            recorder.flush()
     console.print(f"[bold]Score: {correct}/{total} ({correct/total*100:.0f}%)[/bold]\n")
     return correct, total
 
 
-def cmd_study(db_path: str):
-    plan = get_todays_plan(db_path)
+def cmd_study(db_path: str, user_id: int = DEFAULT_USER_ID):
+    from gcp_tutor.recorder import ResultRecorder
+
+    plan = get_todays_plan(db_path, user_id=user_id)
     if not plan:
         console.print("[yellow]You've completed all sessions! Use 'review' to keep studying.[/yellow]")
         return
-    day = get_current_session_day(db_path)
+    day = get_current_session_day(db_path, user_id=user_id)
     total = get_total_sessions(db_path)
-    cal_days = get_calendar_days_elapsed(db_path)
+    cal_days = get_calendar_days_elapsed(db_path, user_id=user_id)
     console.print(Panel(
         f"Session Day [bold]{day}[/bold] of {total}" + (f" (Calendar Day {cal_days})" if cal_days else "")
         + (f"\n[cyan]Domain: {plan.get('domain_name', 'Mixed Review')}[/cyan]" if plan.get("domain_name") else "\n[cyan]Mixed Review / Practice Exam[/cyan]"),
         title="Today's Study Session",
     ))
-    progress = start_new_session(db_path)
+    progress = start_new_session(db_path, user_id=user_id)
 
     # Detect incomplete session and offer resume/restart
-    if is_session_incomplete(db_path) and (
+    if is_session_incomplete(db_path, user_id=user_id) and (
         progress.get("reading_done") or progress.get("flashcards_done") or progress.get("quiz_done")
     ):
         console.print("[yellow]You have an incomplete session in progress.[/yellow]")
         choice = Prompt.ask("Resume where you left off or restart?", choices=["resume", "restart"], default="resume")
         if choice == "restart":
-            restart_session(db_path, day)
-            progress = start_new_session(db_path)
+            restart_session(db_path, day, user_id=user_id)
+            progress = start_new_session(db_path, user_id=user_id)
 
     console.print("[dim]Type 'q' or 'menu' at any prompt to save progress and return to the main menu.[/dim]\n")
 
+    recorder = ResultRecorder(db_path, user_id=user_id)
     try:
         # Reading
         if not progress.get("reading_done"):
@@ -191,18 +219,18 @@ def cmd_study(db_path: str):
             else:
                 console.print(f"[dim]Review the key concepts for: {plan.get('domain_name', 'all domains')}[/dim]")
             session_prompt("[dim]Press Enter when done reading (or 'q' to exit)[/dim]")
-            complete_session_component(db_path, day, "reading")
+            complete_session_component(db_path, day, "reading", user_id=user_id)
             console.print("[green]Reading complete![/green]\n")
 
         # Flashcards
         if not progress.get("flashcards_done"):
             console.print("[bold]2. Flashcards[/bold]")
             if plan.get("domain_id"):
-                cards = get_cards_for_domain(db_path, plan["domain_id"], limit=12)
+                cards = get_cards_for_domain(db_path, plan["domain_id"], limit=12, user_id=user_id)
             else:
-                cards = get_due_cards(db_path, limit=12)
-            run_flashcard_session(db_path, cards, session_day=day)
-            complete_session_component(db_path, day, "flashcards")
+                cards = get_due_cards(db_path, limit=12, user_id=user_id)
+            run_flashcard_session(db_path, cards, session_day=day, recorder=recorder, user_id=user_id)
+            complete_session_component(db_path, day, "flashcards", user_id=user_id)
             console.print("[green]Flashcards complete![/green]\n")
 
         # Quiz
@@ -212,68 +240,76 @@ def cmd_study(db_path: str):
                 questions = get_questions_for_domain(db_path, plan["domain_id"], count=8)
             else:
                 questions = get_quiz_questions(db_path, count=8)
-            run_quiz_session(db_path, questions, session_day=day)
-            complete_session_component(db_path, day, "quiz")
+            run_quiz_session(db_path, questions, session_day=day, recorder=recorder, user_id=user_id)
+            complete_session_component(db_path, day, "quiz", user_id=user_id)
             console.print("[green]Quiz complete! Session done.[/green]")
 
     except SessionExitRequested:
         console.print("\n[yellow]Session paused. Your progress has been saved.[/yellow]")
         console.print("[dim]Run 'study' again to resume where you left off.[/dim]")
+    finally:
+        recorder.close()
 
 
-def cmd_quiz(db_path: str):
+def cmd_quiz(db_path: str, user_id: int = DEFAULT_USER_ID):
+    from gcp_tutor.recorder import ResultRecorder
+
     console.print("\n[bold]Practice Quiz[/bold]")
     mode = Prompt.ask("Quiz mode", choices=["all", "domain"], default="all")
     count = IntPrompt.ask("Number of questions", default=10)
     if mode == "domain":
-        from gcp_tutor.db import get_connection
-        conn = get_connection(db_path)
-        domains = conn.execute("SELECT * FROM domains ORDER BY section_number").fetchall()
-        conn.close()
+        with connect(db_path) as conn:
+            domains = conn.execute("SELECT * FROM domains ORDER BY section_number").fetchall()
         for d in domains:
             console.print(f"  [cyan]{d['id']}[/cyan]) {d['name']}")
         domain_id = IntPrompt.ask("Select domain", choices=[str(d["id"]) for d in domains])
         questions = get_questions_for_domain(db_path, domain_id, count=count)
     else:
         questions = get_quiz_questions(db_path, count=count)
+    recorder = ResultRecorder(db_path, user_id=user_id)
     try:
-        run_quiz_session(db_path, questions, allow_exit=True)
+        run_quiz_session(db_path, questions, allow_exit=True, recorder=recorder, user_id=user_id)
     except SessionExitRequested:
         console.print("\n[yellow]Quiz session ended. Returning to menu.[/yellow]")
+    finally:
+        recorder.close()
+
 
+def cmd_flashcards(db_path: str, user_id: int = DEFAULT_USER_ID):
+    from gcp_tutor.recorder import ResultRecorder
 
-def cmd_flashcards(db_path: str):
     console.print("\n[bold]Flashcard Drill[/bold]")
-    cards = get_due_cards(db_path, limit=15)
+    cards = get_due_cards(db_path, limit=15, user_id=user_id)
+    recorder = ResultRecorder(db_path, user_id=user_id)
     try:
-        run_flashcard_session(db_path, cards, allow_exit=True)
+        run_flashcard_session(db_path, cards, allow_exit=True, recorder=recorder, user_id=user_id)
     except SessionExitRequested:
         console.print("\n[yellow]Flashcard session ended. Returning to menu.[/yellow]")
+    finally:
+        recorder.close()
 
 
-def cmd_dashboard(db_path: str):
-    score = calc_readiness_score(db_path)
-    label = get_readiness_label(score)
-    color = get_readiness_color(score)
-    day = get_current_session_day(db_path)
-    total = get_total_sessions(db_path)
-    cal_days = get_calendar_days_elapsed(db_path)
-    stats = get_study_stats(db_path)
+def cmd_dashboard(db_path: str, user_id: int = DEFAULT_USER_ID):
+    from rich.table import Table
+
+    snap = get_dashboard_snapshot(db_path, user_id=user_id)
+    score = snap.readiness_score
+    color = snap.readiness_color
 
     # Header
-    header = f"Session Day {day} of {total}"
-    if cal_days:
-        header += f" (Calendar Day {cal_days})"
+    header = f"Session Day {snap.session_day} of {snap.total_sessions}"
+    if snap.calendar_days:
+        header += f" (Calendar Day {snap.calendar_days})"
     console.print(Panel(f"[bold]{header}[/bold]", title="GCP ACE Readiness Dashboard", border_style="blue"))
 
     # Overall score
     bar_filled = int(score / 5)
     bar_empty = 20 - bar_filled
     bar = f"[{color}]{'█' * bar_filled}{'░' * bar_empty}[/{color}]"
-    console.print(f"\n  Overall Readiness: [bold]{score}%[/bold] {bar} [{color}]{label}[/{color}]\n")
+    console.print(f"\n  Overall Readiness: [bold]{score}%[/bold] {bar} [{color}]{snap.readiness_label}[/{color}]\n")
 
     # Domain table
-    domain_scores = get_domain_scores(db_path)
+    domain_scores = snap.domain_scores
     table = Table(title="Domain Breakdown")
     table.add_column("Domain", style="cyan")
     table.add_column("Score", justify="right")
@@ -288,10 +324,21 @@ def cmd_dashboard(db_path: str):
     console.print(table)
 
     # Stats
-    console.print(f"\n  Sessions: [bold]{stats['sessions_completed']}[/bold]  |  "
-                  f"Flashcards: [bold]{stats['flashcards_reviewed']}[/bold]  |  "
-                  f"Quizzes: [bold]{stats['quizzes_taken']}[/bold]  |  "
-                  f"Avg Quiz: [bold]{stats['avg_quiz_score']}%[/bold]")
+    console.print(f"\n  Sessions: [bold]{snap.sessions_completed}[/bold]  |  "
+                  f"Flashcards: [bold]{snap.flashcards_reviewed}[/bold]  |  "
+                  f"Quizzes: [bold]{snap.quizzes_taken}[/bold]  |  "
+                  f"Avg Quiz: [bold]{snap.avg_quiz_score}%[/bold]")
+
+    # Upcoming workload
+    forecast = get_review_forecast(db_path, user_id)
+    forecast_table = Table(title=f"Review Forecast (next {FORECAST_DAYS} days)")
+    forecast_table.add_column("Date")
+    forecast_table.add_column("Expected", justify="right")
+    forecast_table.add_column("Likely range", justify="right")
+    for day in forecast:
+        forecast_table.add_row(day["date"], f"{day['expected']:.0f}", f"{day['low']}–{day['high']}")
+    console.print()
+    console.print(forecast_table)
 
     # Recommendation
     if domain_scores:
@@ -300,9 +347,14 @@ def cmd_dashboard(db_path: str):
             console.print(f"\n  [yellow]Recommendation: Focus on {weakest['name']}[/yellow]")
 
 
-def cmd_review(db_path: str):
+def cmd_review(db_path: str, user_id: int = DEFAULT_USER_ID):
+    from rich.table import Table
+
+    from gcp_tutor.linking import get_subtopic_notes
+    from gcp_tutor.recorder import ResultRecorder
+
     console.print("\n[bold]Weak Area Review[/bold]\n")
-    weak_domains = get_weak_domains(db_path)
+    weak_domains = get_weak_domains(db_path, user_id=user_id)
     if not weak_domains:
         console.print("[green]No weak areas detected! Keep up the good work.[/green]")
         return
@@ -314,53 +366,123 @@ def cmd_review(db_path: str):
         table.add_row(wd["domain_name"], f"{wd['score']}%", str(wd["total"]))
     console.print(table)
 
-    weak_subs = get_weak_subtopics(db_path)
+    weak_subs = get_weak_subtopics(db_path, user_id=user_id)
     if weak_subs:
         console.print("\n[bold]Weakest Subtopics:[/bold]")
+        notes = get_subtopic_notes(db_path, [ws["subtopic_id"] for ws in weak_subs[:5]], limit=1)
         for ws in weak_subs[:5]:
             console.print(f"  [red]{ws['error_rate']}% errors[/red] — {ws['subtopic_name']} ({ws['domain_name']})")
+            for note in notes[ws["subtopic_id"]]:
+                excerpt = escape(" ".join(note["text"].split())[:100])
+                console.print(f"      [dim]Your notes ({escape(note['filename'])}): {excerpt}…[/dim]")
 
     # Drill weakest domain
     if weak_domains:
         weakest = weak_domains[0]
         console.print(f"\n[bold]Drilling: {weakest['domain_name']}[/bold]")
         console.print("[dim]Type 'q' or 'menu' at any prompt to return to the main menu.[/dim]\n")
+        recorder = ResultRecorder(db_path, user_id=user_id)
         try:
-            cards = get_cards_for_domain(db_path, weakest["domain_id"], limit=10)
-            run_flashcard_session(db_path, cards, allow_exit=True)
+            cards = get_cards_for_domain(db_path, weakest["domain_id"], limit=10, user_id=user_id)
+            run_flashcard_session(db_path, cards, allow_exit=True, recorder=recorder, user_id=user_id)
             questions = get_questions_for_domain(db_path, weakest["domain_id"], count=5)
-            run_quiz_session(db_path, questions, allow_exit=True)
+            run_quiz_session(db_path, questions, allow_exit=True, recorder=recorder, user_id=user_id)
         except SessionExitRequested:
             console.print("\n[yellow]Review session exited. Returning to menu.[/yellow]")
+        finally:
+            recorder.close()
 
 
 def cmd_import(db_path: str):
-    file_path = Prompt.ask("File path")
+    from gcp_tutor.importer import import_file
+
+    file_path = Prompt.ask("File, folder or glob pattern")
+    if Path(file_path).is_dir() or glob.has_magic(file_path):
+        import_folder(db_path, file_path)
+        return
     if not Path(file_path).exists():
         console.print(f"[red]File not found: {file_path}[/red]")
         return
     result = import_file(db_path, file_path)
+    if result["status"] == "unchanged":
+        console.print(f"[yellow]{escape(result['filename'])} is already imported and unchanged.[/yellow]")
+        return
+    if result["status"] == "duplicate":
+        console.print(f"[yellow]{escape(result['filename'])} has the same content as import #{result['id']}.[/yellow]")
+        return
     domain_msg = f"domain {result['domain_id']}" if result["domain_id"] else "uncategorized"
     console.print(f"[green]Imported {result['filename']} ({result['length']} chars) → {domain_msg}[/green]")
+    make_import_cards(db_path, [result["id"]])
+
 
+def import_folder(db_path: str, source: str):
+    from rich.progress import Progress
 
-def cmd_plan(db_path: str):
-    from gcp_tutor.db import get_connection
-    conn = get_connection(db_path)
-    days = conn.execute(
-        """SELECT sd.day_number, d.name as domain_name, sd.status,
-        CASE WHEN up.completed_at IS NOT NULL THEN 'Done' ELSE '' END as completed
-        FROM study_days sd
-        LEFT JOIN domains d ON sd.domain_id = d.id
-        LEFT JOIN user_progress up ON sd.day_number = up.session_day
-        ORDER BY sd.day_number"""
-    ).fetchall()
-    conn.close()
+    from gcp_tutor.importer import find_import_files, import_directory
+
+    total = len(find_import_files(source))
+    if not total:
+        console.print(f"[yellow]No files to import in {source}[/yellow]")
+        return
+    with Progress(console=console) as progress:
+        task = progress.add_task("Importing", total=total)
+        result = import_directory(db_path, source, progress=lambda _item: progress.advance(task))
+    console.print(f"[green]Imported {len(result['imported'])} of {total} files.[/green]")
+    if result["skipped"]:
+        console.print(f"[dim]Skipped {len(result['skipped'])} already imported.[/dim]")
+    for error in result["errors"]:
+        console.print(f"[red]  {escape(error['filename'])}: {escape(error['error'])}[/red]")
+    make_import_cards(db_path, [item["id"] for item in result["imported"]])
+
+
+def make_import_cards(db_path: str, import_ids: list[int]):
+    """Turn definitions and bold terms in freshly imported notes into flashcards."""
+    from gcp_tutor.cardgen import generate_flashcards
+
+    if not import_ids or linked_content_path(db_path) is not None:
+        return
+    counts = generate_flashcards(db_path, import_ids)
+    if counts["created"]:
+        console.print(f"[green]Made {counts['created']} flashcards from your notes.[/green]")
+
+
+SEARCH_LABELS = {"flashcard": "Card", "question": "Question", "reading": "Reading", "import": "Note"}
+
+
+def cmd_search(db_path: str):
+    from gcp_tutor.search import search
+
+    text = Prompt.ask("Search for")
+    hits = search(db_path, text, highlight=("\x02", "\x03"))
+    if not hits:
+        console.print("[yellow]No matches.[/yellow]")
+        return
+    for hit in hits:
+        snippet = escape(" ".join(hit["snippet"].split()))
+        snippet = snippet.replace("\x02", "[bold yellow]").replace("\x03", "[/bold yellow]")
+        label = SEARCH_LABELS[hit["source"]]
+        title = escape(hit["title"]) + (f" [dim](part {hit['part'] + 1})[/dim]" if hit["part"] else "")
+        console.print(f"[cyan]{label:<9}[/cyan] [bold]{title}[/bold]\n          {snippet}")
+
+
+def cmd_plan(db_path: str, user_id: int = DEFAULT_USER_ID):
+    from rich.table import Table
+
+    with connect(db_path) as conn:
+        days = conn.execute(
+            """SELECT sd.day_number, d.name as domain_name, sd.status,
+            CASE WHEN up.completed_at IS NOT NULL THEN 'Done' ELSE '' END as completed
+            FROM study_days sd
+            LEFT JOIN domains d ON sd.domain_id = d.id
+            LEFT JOIN user_progress up ON sd.day_number = up.session_day AND up.user_id = ?
+            ORDER BY sd.day_number""",
+            (user_id,),
+        ).fetchall()
     table = Table(title="30-Day Study Plan")
     table.add_column("Day", justify="right")
     table.add_column("Domain")
     table.add_column("Status")
-    current = get_current_session_day(db_path)
+    current = get_current_session_day(db_path, user_id=user_id)
     for day in days:
         marker = " ←" if day["day_number"] == current else ""
         status = day["completed"] or ("Current" if day["day_number"] == current else "")
@@ -377,21 +499,41 @@ def cmd_plan(db_path: str):
             "[bold red]This will erase ALL progress, quiz scores, and flashcard history. Type 'reset' to confirm[/bold red]"
         )
         if confirm.strip().lower() == "reset":
-            reset_all_progress(db_path)
+            reset_all_progress(db_path, user_id=user_id)
             console.print("[green]Progress reset! You're back to Day 1.[/green]")
         else:
             console.print("[dim]Reset cancelled.[/dim]")
 
 
-def main():
-    db_path = DEFAULT_DB_PATH
-    init_db(db_path)
-    first_run = not is_seeded(db_path)
-    if first_run:
-        console.print("[dim]Setting up for first use...[/dim]")
-    seed_all(db_path)
-    if first_run:
-        console.print("[green]Ready![/green]\n")
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(prog="gcp-tutor")
+    parser.add_argument("--user", help="learner name (created on first use); omit for the default learner")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="progress database (default: %(default)s)")
+    parser.add_argument(
+        "--content-db",
+        help="shared read-only content database to attach (built or refreshed as needed); "
+        "--db then holds only this learner's progress",
+    )
+    args = parser.parse_args(argv)
+
+    db_path = args.db
+    if args.content_db:
+        build_content_db(args.content_db)
+        init_progress_db(db_path, args.content_db)
+    elif not is_current(db_path):
+        install_template(db_path)
+        init_db(db_path)
+        first_run = not is_seeded(db_path)
+        if first_run:
+            console.print("[dim]Setting up for first use...[/dim]")
+        seed_all(db_path)
+        if first_run:
+            console.print("[green]Ready![/green]\n")
+    from gcp_tutor.recorder import replay_journals
+    from gcp_tutor.users import get_or_create_user
+
+    replay_journals(db_path)
+    user_id = get_or_create_user(db_path, args.user) if args.user else DEFAULT_USER_ID
 
     show_welcome()
 
@@ -400,21 +542,24 @@ def main():
         choice = Prompt.ask("\n[bold]>[/bold]", default="study").strip().lower()
         try:
             if choice == "study":
-                cmd_study(db_path)
+                cmd_study(db_path, user_id)
             elif choice == "quiz":
-                cmd_quiz(db_path)
+                cmd_quiz(db_path, user_id)
             elif choice == "flashcards":
-                cmd_flashcards(db_path)
+                cmd_flashcards(db_path, user_id)
             elif choice == "dashboard":
-                cmd_dashboard(db_path)
+                cmd_dashboard(db_path, user_id)
             elif choice == "review":
-                cmd_review(db_path)
+                cmd_review(db_path, user_id)
             elif choice == "import":
                 cmd_import(db_path)
+            elif choice == "search":
+                cmd_search(db_path)
             elif choice == "plan":
-                cmd_plan(db_path)
+                cmd_plan(db_path, user_id)
             elif choice in ("quit", "exit", "q"):
                 console.print("[dim]Good luck on your exam![/dim]")
+                close_connections()
                 break
             else:
                 console.print("[red]Unknown command. Try again.[/red]")
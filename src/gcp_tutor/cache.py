@@ -0,0 +1,58 @@
+"""Result cache for dashboard, review and quiz-score reads.
+
+Entries are keyed on the database's data generation, a counter that
+triggers bump on every write to the tables those reads depend on (see
+migration 7 in ``gcp_tutor.db``). A cached result is reused only while the
+generation, and the calendar day, are unchanged, so it is never stale -
+including after writes from another process. At most MAX_RESULTS entries
+are kept; the least recently used go first, which also clears out entries
+for past days and databases no longer in use.
+"""
+import copy
+import functools
+import threading
+from collections import OrderedDict
+from datetime import date
+
+from gcp_tutor.db import connect
+
+MAX_RESULTS = 256
+
+_results: OrderedDict[tuple, tuple[int, object]] = OrderedDict()
+_results_lock = threading.Lock()
+
+
+def data_generation(conn) -> int:
+    return conn.execute("SELECT value FROM data_generation WHERE id = 1").fetchone()[0]
+
+
+def clear_cache() -> None:
+    with _results_lock:
+        _results.clear()
+
+
+def cached(fn):
+    """Cache ``fn(db_path, *args, **kwargs)`` until the data generation changes."""
+
+    @functools.wraps(fn)
+    def wrapper(db_path: str, *args, **kwargs):
+        key = (fn.__module__, fn.__qualname__, db_path, date.today(), args, tuple(sorted(kwargs.items())))
+        with connect(db_path) as conn:
+            generation = data_generation(conn)
+            with _results_lock:
+                hit = _results.get(key)
+                if hit is not None:
+                    _results.move_to_end(key)
+            if hit is not None and hit[0] == generation:
+                return copy.deepcopy(hit[1])
+            result = fn(db_path, *args, **kwargs)
+            # Uncommitted writes may still roll back; don't cache what they show.
+            if not conn.in_transaction:
+                with _results_lock:
+                    _results[key] = (generation, copy.deepcopy(result))
+                    _results.move_to_end(key)
+                    while len(_results) > MAX_RESULTS:
+                        _results.popitem(last=False)
+        return result
+
+    return wrapper
@@ -0,0 +1,177 @@
+"""Flashcards generated from imported notes.
+
+Notes are scanned chunk by chunk for three kinds of study item:
+
+- definition lines: "Term: definition", "Term - definition", optionally as a
+  bullet and with the term in bold, become "What is Term?" cards
+- bold terms defined in prose ("**Cloud NAT** lets private VMs ...") become
+  "What is Term?" cards answered by the sentence
+- other sentences with a bold term become cloze cards with the term blanked
+
+Fronts are compared through a normalized, hashed key (lowercase words,
+articles dropped), so a card is skipped if any flashcard, seeded or generated, already
+has the same front. New cards are bulk-inserted with ``source = 'imported'``
+(seeded-content syncs leave them alone) under the subtopic their passage is
+linked to (see gcp_tutor.linking), falling back to the import's domain.
+"""
+import hashlib
+import re
+from typing import Iterable, Iterator
+
+from gcp_tutor.db import DEFAULT_DB_PATH, connect, linked_content_path
+from gcp_tutor.importer import categorize_content
+
+# Flashcards per INSERT.
+CARD_BATCH_SIZE = 500
+# Lines longer than this are cut where a chunk ends instead of carried over.
+MAX_LINE_CHARS = 64 * 1024
+MAX_TERM_WORDS = 6
+MAX_BACK_CHARS = 400
+CLOZE_BLANK = "_____"
+
+DEFINITION = re.compile(
+    r"^[ \t]*(?:[-*+•]|\d+[.)])?[ \t]*(?P<bold>\*\*|__)?(?P<term>[A-Za-z][\w ./()&+'-]{1,60}?)(?P=bold)?"
+    r"[ \t]*(?::|[—–]|[ \t]-)[ \t]+(?P<definition>\S.{14,})$",
+    re.MULTILINE,
+)
+BOLD = re.compile(r"(\*\*|__)(?P<term>[^*_\n]{2,60}?)\1")
+DEFINING_VERB = re.compile(r"\s+(?:is|are|means|refers to|lets|allows|provides)\s", re.IGNORECASE)
+ARTICLES = frozenset(("a", "an", "the"))
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+NOT_TERMS = frozenset(
+    "note notes example examples tip tips warning important summary question answer step see also source e.g i.e"
+    .split()
+)
+
+
+def front_key(front: str) -> bytes:
+    """Hash of ``front`` reduced to lowercase words without articles, for duplicate checks."""
+    normalized = " ".join(word for word in re.findall(r"[a-z0-9]+", front.lower()) if word not in ARTICLES)
+    return hashlib.blake2b(normalized.encode(), digest_size=8).digest()
+
+
+def _plain(text: str) -> str:
+    return BOLD.sub(lambda match: match["term"], text).strip()
+
+
+def _is_term(term: str) -> bool:
+    return len(term.split()) <= MAX_TERM_WORDS and term.lower().rstrip(".") not in NOT_TERMS
+
+
+def _question(term: str) -> str:
+    last = term.split()[-1]
+    plural = last.islower() and last.endswith("s") and not last.endswith("ss")
+    return f"What {'are' if plural else 'is'} {term}?"
+
+
+def extract_cards(text: str) -> Iterator[tuple[int, str, str]]:
+    """Yield (offset, front, back) for each study item found in ``text``."""
+    defined = set()
+    for match in DEFINITION.finditer(text):
+        term = match["term"].strip()
+        if _is_term(term):
+            defined.add(match.start())
+            definition = _plain(match["definition"])[:MAX_BACK_CHARS]
+            yield match.start(), _question(term), definition[0].upper() + definition[1:]
+    for line_match in re.finditer(r"[^\n]+", text):
+        if line_match.start() in defined or not BOLD.search(line_match.group()):
+            continue
+        offset = line_match.start()
+        for sentence in SENTENCE_END.split(line_match.group()):
+            bold = BOLD.search(sentence)
+            plain = _plain(sentence).lstrip("-*+• \t")
+            if bold is None or not 30 <= len(plain) <= MAX_BACK_CHARS:
+                continue
+            term = bold["term"].strip()
+            if not _is_term(term):
+                continue
+            if DEFINING_VERB.match(sentence, bold.end()):
+                yield offset, _question(term), plain
+            else:
+                cloze = _plain(sentence[:bold.start()] + CLOZE_BLANK + sentence[bold.end():]).lstrip("-*+• \t")
+                yield offset, f"Fill in the blank: {cloze}", term
+
+
+def _whole_lines(conn, import_id: int) -> Iterator[tuple[int, int, str]]:
+    """Yield (chunk_id, offset, text) for an import's text in whole lines.
+
+    A line split across chunks is carried into the next piece; ``offset`` is
+    where ``text`` starts within that chunk (negative for carried text).
+    """
+    pending, pending_chunk, pending_offset = "", None, 0
+    chunks = conn.execute("SELECT id, unpack_text(text) FROM imported_chunks WHERE import_id = ? ORDER BY seq", (import_id,))
+    for chunk_id, text in chunks:
+        offset, text = -len(pending), pending + text
+        end = text.rfind("\n") + 1
+        if end or len(text) >= MAX_LINE_CHARS:
+            end = end or len(text)
+            yield chunk_id, offset, text[:end]
+        pending, pending_chunk, pending_offset = text[end:], chunk_id, offset + end
+    if pending:
+        yield pending_chunk, pending_offset, pending
+
+
+def _chunk_subtopics(conn, chunk_id: int) -> list:
+    """The chunk's passage links, best first, with each subtopic's domain."""
+    return conn.execute(
+        """SELECT l.start, l.start + l.length AS end, l.subtopic_id, s.domain_id
+           FROM imported_passage_links l JOIN subtopics s ON s.id = l.subtopic_id
+           WHERE l.chunk_id = ? ORDER BY l.score DESC""",
+        (chunk_id,),
+    ).fetchall()
+
+
+def generate_flashcards(db_path: str = DEFAULT_DB_PATH, import_ids: Iterable[int] | None = None) -> dict:
+    """Create flashcards from the given imports (default: all).
+
+    Chunks are read one at a time (lines split between chunks are rejoined)
+    and cards inserted CARD_BATCH_SIZE at a time, so memory does not grow with the size of the notes. Cards whose
+    front duplicates an existing flashcard, or with no domain to file them
+    under, are skipped. Flashcards live in the content database, so a
+    progress database (see gcp_tutor.db.init_progress_db) cannot take them.
+
+    Returns {"created", "duplicates", "uncategorized"} counts.
+    """
+    if linked_content_path(db_path) is not None:
+        raise RuntimeError(f"{db_path} reads flashcards from a shared content database; cards cannot be added")
+    counts = {"created": 0, "duplicates": 0, "uncategorized": 0}
+    with connect(db_path) as conn:
+        seen = {front_key(row[0]) for row in conn.execute("SELECT front FROM flashcards")}
+        if import_ids is None:
+            import_ids = [row[0] for row in conn.execute("SELECT id FROM imported_content ORDER BY id")]
+        batch = []
+
+        def flush() -> None:
+            conn.executemany(
+                "INSERT INTO flashcards (domain_id, subtopic_id, front, back, source) VALUES (?, ?, ?, ?, 'imported')",
+                batch,
+            )
+            counts["created"] += len(batch)
+            batch.clear()
+
+        for import_id in import_ids:
+            row = conn.execute("SELECT domain_id FROM imported_content WHERE id = ?", (import_id,)).fetchone()
+            if row is None:
+                continue
+            links_chunk, links = None, []
+            for chunk_id, start, text in _whole_lines(conn, import_id):
+                for offset, front, back in extract_cards(text):
+                    key = front_key(front)
+                    if key in seen:
+                        counts["duplicates"] += 1
+                        continue
+                    if links_chunk != chunk_id:
+                        links_chunk, links = chunk_id, _chunk_subtopics(conn, chunk_id)
+                    offset += start
+                    link = next((link for link in links if link["start"] <= offset < link["end"]), None)
+                    subtopic_id, domain_id = (link["subtopic_id"], link["domain_id"]) if link else (None, row[0])
+                    domain_id = domain_id or categorize_content(f"{front} {back}")
+                    if domain_id is None:
+                        counts["uncategorized"] += 1
+                        continue
+                    seen.add(key)
+                    batch.append((domain_id, subtopic_id, front, back))
+                    if len(batch) >= CARD_BATCH_SIZE:
+                        flush()
+        flush()
+    return counts
@@ -1,7 +1,15 @@
 """Readiness dashboard scoring and statistics."""
-from gcp_tutor.db import get_connection
+from dataclasses import dataclass, field
+from datetime import date
+
+from gcp_tutor.cache import cached
+from gcp_tutor.db import DEFAULT_USER_ID, connect
+from gcp_tutor.forecast import forecast_reviews
 from gcp_tutor.study import get_completed_sessions, get_total_sessions
 
+FORECAST_DAYS = 7
+FORECAST_TRIALS = 200
+
 
 def get_readiness_label(score: float) -> str:
     if score >= 80:
@@ -23,60 +31,68 @@ def get_readiness_color(score: float) -> str:
     return "red"
 
 
-def _quiz_score(db_path: str) -> float:
-    conn = get_connection(db_path)
-    row = conn.execute("SELECT COUNT(*) as t, SUM(is_correct) as c FROM quiz_results").fetchone()
-    conn.close()
+def _quiz_score(db_path: str, user_id: int) -> float:
+    with connect(db_path) as conn:
+        row = conn.execute(
+            "SELECT SUM(attempts) as t, SUM(correct) as c FROM quiz_score_totals WHERE user_id = ?", (user_id,),
+        ).fetchone()
     if not row["t"]:
         return 0.0
     return (row["c"] / row["t"]) * 100
 
 
-def _flashcard_retention(db_path: str) -> float:
-    conn = get_connection(db_path)
-    row = conn.execute("SELECT COUNT(*) as t, SUM(CASE WHEN rating >= 3 THEN 1 ELSE 0 END) as c FROM flashcard_results").fetchone()
-    conn.close()
+def _flashcard_retention(db_path: str, user_id: int) -> float:
+    with connect(db_path) as conn:
+        row = conn.execute(
+            "SELECT SUM(attempts) as t, SUM(correct) as c FROM flashcard_score_totals WHERE user_id = ?", (user_id,),
+        ).fetchone()
     if not row["t"]:
         return 0.0
     return (row["c"] / row["t"]) * 100
 
 
-def _study_completion(db_path: str) -> float:
-    completed = get_completed_sessions(db_path)
+def _study_completion(db_path: str, user_id: int) -> float:
+    completed = get_completed_sessions(db_path, user_id)
     total = get_total_sessions(db_path)
     if total == 0:
         return 0.0
     return (completed / total) * 100
 
 
-def calc_readiness_score(db_path: str) -> float:
-    quiz = _quiz_score(db_path)
-    flash = _flashcard_retention(db_path)
-    study = _study_completion(db_path)
+def _readiness(quiz: float, flash: float, study: float) -> float:
     # Weighted: quiz 50%, flashcard 30%, study 20%
-    score = quiz * 0.5 + flash * 0.3 + study * 0.2
-    return round(score, 1)
+    return round(quiz * 0.5 + flash * 0.3 + study * 0.2, 1)
+
+
+@cached
+def calc_readiness_score(db_path: str, user_id: int = DEFAULT_USER_ID) -> float:
+    return _readiness(
+        _quiz_score(db_path, user_id), _flashcard_retention(db_path, user_id), _study_completion(db_path, user_id),
+    )
+
+
+def _domain_totals(conn, table: str, user_id: int) -> dict[int, tuple[int, int]]:
+    """A user's (attempts, correct) per domain from a score totals table."""
+    return {
+        row[0]: (row[1], row[2])
+        for row in conn.execute(
+            f"SELECT domain_id, SUM(attempts), SUM(correct) FROM {table} WHERE user_id = ? GROUP BY domain_id",
+            (user_id,),
+        )
+    }
+
+
+def _pct(totals: tuple[int, int] | None) -> float:
+    if not totals or not totals[0]:
+        return 0.0
+    return totals[1] / totals[0] * 100
 
 
-def get_domain_scores(db_path: str) -> list[dict]:
-    conn = get_connection(db_path)
-    domains = conn.execute("SELECT * FROM domains ORDER BY section_number").fetchall()
+def _domain_scores(domains, quiz_totals: dict, flash_totals: dict) -> list[dict]:
     results = []
     for d in domains:
-        row = conn.execute(
-            """SELECT COUNT(*) as t, SUM(r.is_correct) as c
-            FROM quiz_results r JOIN quiz_questions q ON r.quiz_question_id = q.id
-            WHERE q.domain_id = ?""",
-            (d["id"],),
-        ).fetchone()
-        quiz_pct = (row["c"] / row["t"] * 100) if row["t"] else 0.0
-        flash_row = conn.execute(
-            """SELECT COUNT(*) as t, SUM(CASE WHEN fr.rating >= 3 THEN 1 ELSE 0 END) as c
-            FROM flashcard_results fr JOIN flashcards f ON fr.flashcard_id = f.id
-            WHERE f.domain_id = ?""",
-            (d["id"],),
-        ).fetchone()
-        flash_pct = (flash_row["c"] / flash_row["t"] * 100) if flash_row["t"] else 0.0
+        quiz_pct = _pct(quiz_totals.get(d["id"]))
+        flash_pct = _pct(flash_totals.get(d["id"]))
         combined = quiz_pct * 0.6 + flash_pct * 0.4
         results.append({
             "domain_id": d["id"],
@@ -85,21 +101,106 @@ def get_domain_scores(db_path: str) -> list[dict]:
             "score": round(combined, 1),
             "label": get_readiness_label(combined),
         })
-    conn.close()
     return results
 
 
-def get_study_stats(db_path: str) -> dict:
-    conn = get_connection(db_path)
-    sessions = conn.execute("SELECT COUNT(*) FROM user_progress WHERE completed_at IS NOT NULL").fetchone()[0]
-    flashcards = conn.execute("SELECT COUNT(*) FROM flashcard_results").fetchone()[0]
-    quizzes = conn.execute("SELECT COUNT(DISTINCT answered_at) FROM quiz_results").fetchone()[0]
-    avg_row = conn.execute("SELECT AVG(is_correct) * 100 as avg FROM quiz_results").fetchone()
-    avg_quiz = round(avg_row["avg"], 1) if avg_row["avg"] else 0.0
-    conn.close()
+@cached
+def get_domain_scores(db_path: str, user_id: int = DEFAULT_USER_ID) -> list[dict]:
+    with connect(db_path) as conn:
+        domains = conn.execute("SELECT * FROM domains ORDER BY section_number").fetchall()
+        quiz_totals = _domain_totals(conn, "quiz_score_totals", user_id)
+        flash_totals = _domain_totals(conn, "flashcard_score_totals", user_id)
+    return _domain_scores(domains, quiz_totals, flash_totals)
+
+
+@cached
+def get_study_stats(db_path: str, user_id: int = DEFAULT_USER_ID) -> dict:
+    with connect(db_path) as conn:
+        sessions = conn.execute(
+            "SELECT COUNT(*) FROM user_progress WHERE user_id = ? AND completed_at IS NOT NULL", (user_id,),
+        ).fetchone()[0]
+        flashcards = conn.execute(
+            "SELECT COALESCE(SUM(attempts), 0) FROM flashcard_score_totals WHERE user_id = ?", (user_id,),
+        ).fetchone()[0]
+        quizzes = conn.execute(
+            "SELECT COALESCE(SUM(value), 0) FROM result_counters WHERE user_id = ? AND name = 'quizzes_taken'",
+            (user_id,),
+        ).fetchone()[0]
+        avg_row = conn.execute(
+            "SELECT SUM(attempts) as t, SUM(correct) as c FROM quiz_score_totals WHERE user_id = ?", (user_id,),
+        ).fetchone()
+    avg_quiz = round(avg_row["c"] / avg_row["t"] * 100, 1) if avg_row["t"] else 0.0
     return {
         "sessions_completed": sessions,
         "flashcards_reviewed": flashcards,
         "quizzes_taken": quizzes,
         "avg_quiz_score": avg_quiz,
     }
+
+
+@dataclass
+class DashboardSnapshot:
+    """Everything the dashboard shows, read in one pass."""
+
+    readiness_score: float
+    readiness_label: str
+    readiness_color: str
+    session_day: int
+    total_sessions: int
+    calendar_days: int
+    sessions_completed: int
+    flashcards_reviewed: int
+    quizzes_taken: int
+    avg_quiz_score: float
+    domain_scores: list[dict] = field(default_factory=list)
+
+
+@cached
+def get_dashboard_snapshot(db_path: str, user_id: int = DEFAULT_USER_ID) -> DashboardSnapshot:
+    """Compute the dashboard on one connection with a handful of grouped queries.
+
+    Equivalent to calling ``calc_readiness_score``, ``get_domain_scores``,
+    ``get_study_stats`` and the session-day helpers individually.
+    """
+    with connect(db_path) as conn:
+        settings = dict(conn.execute(
+            """SELECT key, value FROM user_settings
+            WHERE user_id = ? AND key IN ('current_session_day', 'start_date')""",
+            (user_id,),
+        ).fetchall())
+        counts = conn.execute(
+            """SELECT
+                (SELECT COUNT(*) FROM study_days),
+                (SELECT COUNT(*) FROM user_progress WHERE user_id = ?1 AND completed_at IS NOT NULL),
+                (SELECT COALESCE(SUM(value), 0) FROM result_counters
+                 WHERE user_id = ?1 AND name = 'quizzes_taken')""",
+            (user_id,),
+        ).fetchone()
+        domains = conn.execute("SELECT * FROM domains ORDER BY section_number").fetchall()
+        quiz_totals = _domain_totals(conn, "quiz_score_totals", user_id)
+        flash_totals = _domain_totals(conn, "flashcard_score_totals", user_id)
+    total_sessions, completed, quizzes = counts
+    quiz_all = (sum(t for t, _ in quiz_totals.values()), sum(c for _, c in quiz_totals.values()))
+    flash_all = (sum(t for t, _ in flash_totals.values()), sum(c for _, c in flash_totals.values()))
+    study = (completed / total_sessions * 100) if total_sessions else 0.0
+    score = _readiness(_pct(quiz_all), _pct(flash_all), study)
+    start = settings.get("start_date")
+    return DashboardSnapshot(
+        readiness_score=score,
+        readiness_label=get_readiness_label(score),
+        readiness_color=get_readiness_color(score),
+        session_day=int(settings.get("current_session_day", "1")),
+        total_sessions=total_sessions,
+        calendar_days=(date.today() - date.fromisoformat(start)).days + 1 if start else 0,
+        sessions_completed=completed,
+        flashcards_reviewed=flash_all[0],
+        quizzes_taken=quizzes,
+        avg_quiz_score=round(_pct(quiz_all), 1),
+        domain_scores=_domain_scores(domains, quiz_totals, flash_totals),
+    )
+
+
+@cached
+def get_review_forecast(db_path: str, user_id: int = DEFAULT_USER_ID) -> list[dict]:
+    """The dashboard's review forecast for the next FORECAST_DAYS days (see ``forecast_reviews``)."""
+    return forecast_reviews(db_path, days=FORECAST_DAYS, trials=FORECAST_TRIALS, user_id=user_id)
@@ -1,6 +1,15 @@
 """Database initialization and connection management."""
+import hashlib
+import os
+import shutil
 import sqlite3
+import threading
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Iterator
+from urllib.parse import quote
 
 DEFAULT_DB_PATH = str(Path.home() / ".gcp_tutor" / "tutor.db")
 
@@ -103,19 +112,1098 @@ CREATE TABLE IF NOT EXISTS session_items (
 );
 """
 
+DEFAULT_USER_ID = 1
 
-def get_connection(db_path: str = DEFAULT_DB_PATH) -> sqlite3.Connection:
-    """Return a SQLite connection with row factory and foreign keys enabled."""
-    conn = sqlite3.connect(db_path)
+# Live flashcards joined with one user's scheduling state; bind the user id.
+USER_CARDS_QUERY = """SELECT f.*, s.ease_factor, s.interval, s.repetitions, s.next_review,
+    s.stability, s.difficulty
+    FROM flashcards f JOIN card_state s ON s.flashcard_id = f.id AND s.user_id = ? AND s.retired = 0"""
+
+# Changes whenever seeded content is synced (which logs a content_syncs row)
+# or subtopics, flashcards or questions are added; key caches of content on it.
+CONTENT_VERSION_QUERY = """SELECT (SELECT MAX(id) FROM content_syncs), (SELECT MAX(id) FROM subtopics),
+    (SELECT MAX(id) FROM flashcards), (SELECT MAX(id) FROM quiz_questions)"""
+
+# Recomputes score totals and result counters from the full result history.
+SCORE_TOTALS_REBUILD = """
+    DELETE FROM quiz_score_totals;
+    DELETE FROM flashcard_score_totals;
+    DELETE FROM result_counters;
+
+    INSERT INTO quiz_score_totals (user_id, domain_id, subtopic_id, attempts, correct)
+    SELECT r.user_id, q.domain_id, COALESCE(q.subtopic_id, 0), COUNT(*), SUM(r.is_correct)
+    FROM quiz_results r JOIN quiz_questions q ON r.quiz_question_id = q.id
+    GROUP BY r.user_id, q.domain_id, COALESCE(q.subtopic_id, 0);
+
+    INSERT INTO flashcard_score_totals (user_id, domain_id, subtopic_id, attempts, correct)
+    SELECT fr.user_id, f.domain_id, COALESCE(f.subtopic_id, 0), COUNT(*), SUM(fr.rating >= 3)
+    FROM flashcard_results fr JOIN flashcards f ON fr.flashcard_id = f.id
+    GROUP BY fr.user_id, f.domain_id, COALESCE(f.subtopic_id, 0);
+
+    INSERT INTO result_counters (user_id, name, value)
+    SELECT user_id, 'quizzes_taken', COUNT(DISTINCT answered_at) FROM quiz_results GROUP BY user_id;
+"""
+
+
+def _generation_triggers(*tables: str) -> str:
+    """Triggers bumping data_generation on any write to ``tables``."""
+    return "".join(
+        f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_generation AFTER {event} ON {table} BEGIN
+        UPDATE data_generation SET value = value + 1 WHERE id = 1;
+    END;
+    """
+        for table in tables
+        for event in ("INSERT", "UPDATE", "DELETE")
+    )
+
+
+# Text of at least this many UTF-8 bytes is stored zlib-compressed by
+# pack_text; None stores all text as is.
+COMPRESS_MIN_BYTES: int | None = 2048
+
+
+def pack_text(text: str | None) -> str | bytes | None:
+    """``text`` for storage: compressed to a BLOB if it is at least COMPRESS_MIN_BYTES long.
+
+    Short text stays TEXT, so the storage class tells the two apart and a
+    column can mix them.
+    """
+    if text is None or COMPRESS_MIN_BYTES is None:
+        return text
+    data = text.encode()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return text
+    return zlib.compress(data)
+
+
+def unpack_text(value: str | bytes | None) -> str | None:
+    """The text stored by pack_text."""
+    if isinstance(value, bytes):
+        return zlib.decompress(value).decode()
+    return value
+
+
+def text_hash(text: str) -> str:
+    """Hex SHA-256 of ``text``, the key of a reading_blobs row."""
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _register_functions(conn: sqlite3.Connection) -> None:
+    """SQL functions the schema's views and migrations use.
+
+    Connections without them can still read and write every table; only
+    reading text through the ``*_text`` views and searching imports need them.
+    """
+    conn.create_function("pack_text", 1, pack_text)
+    conn.create_function("unpack_text", 1, unpack_text, deterministic=True)
+    conn.create_function("text_hash", 1, text_hash, deterministic=True)
+
+
+# Full-text search (see gcp_tutor.search): the columns currently indexed per
+# table. Each index is an external-content FTS5 table named <table>_fts, so
+# the text is stored once, in the source table.
+SEARCH_INDEXES = {
+    "flashcards": ("front", "back"),
+    "quiz_questions": ("stem", "choice_a", "choice_b", "choice_c", "choice_d", "explanation"),
+    "reading_blobs": ("body",),
+    "imported_chunks": ("text",),
+}
+
+
+def _search_index(table: str, columns: tuple[str, ...]) -> str:
+    """An FTS5 index over ``table``'s ``columns``, filled and kept current by triggers."""
+    names = ", ".join(columns)
+    new = ", ".join(f"NEW.{c}" for c in columns)
+    old = ", ".join(f"OLD.{c}" for c in columns)
+    return f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5(
+        {names}, content='{table}', content_rowid='id', tokenize='porter unicode61'
+    );
+    CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_insert AFTER INSERT ON {table} BEGIN
+        INSERT INTO {table}_fts (rowid, {names}) VALUES (NEW.id, {new});
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_delete AFTER DELETE ON {table} BEGIN
+        INSERT INTO {table}_fts ({table}_fts, rowid, {names}) VALUES ('delete', OLD.id, {old});
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_update AFTER UPDATE OF {names} ON {table} BEGIN
+        INSERT INTO {table}_fts ({table}_fts, rowid, {names}) VALUES ('delete', OLD.id, {old});
+        INSERT INTO {table}_fts (rowid, {names}) VALUES (NEW.id, {new});
+    END;
+    INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild');
+    """
+
+
+def _packed_search_index(table: str, column: str) -> str:
+    """An FTS5 index over ``table``'s ``column`` of pack_text values.
+
+    The index reads its text through a ``<table>_text`` view that unpacks
+    it. The triggers use no custom SQL function, so any connection can
+    write to ``table``: plain text rows are indexed directly, while
+    compressed rows are queued in ``<table>_fts_pending`` for
+    apply_pending_search_updates, which unpacks them.
+    """
+    return f"""
+    CREATE VIEW IF NOT EXISTS {table}_text AS SELECT id, unpack_text({column}) AS {column} FROM {table};
+    CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5(
+        {column}, content='{table}_text', content_rowid='id', tokenize='porter unicode61'
+    );
+    CREATE TABLE IF NOT EXISTS {table}_fts_pending (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        op TEXT NOT NULL CHECK (op IN ('insert', 'delete')),
+        item_id INTEGER NOT NULL,
+        value BLOB NOT NULL
+    );
+    CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_insert AFTER INSERT ON {table} BEGIN
+        INSERT INTO {table}_fts (rowid, {column}) SELECT NEW.id, NEW.{column} WHERE typeof(NEW.{column}) != 'blob';
+        INSERT INTO {table}_fts_pending (op, item_id, value)
+        SELECT 'insert', NEW.id, NEW.{column} WHERE typeof(NEW.{column}) = 'blob';
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_delete AFTER DELETE ON {table} BEGIN
+        INSERT INTO {table}_fts ({table}_fts, rowid, {column})
+        SELECT 'delete', OLD.id, OLD.{column} WHERE typeof(OLD.{column}) != 'blob';
+        INSERT INTO {table}_fts_pending (op, item_id, value)
+        SELECT 'delete', OLD.id, OLD.{column} WHERE typeof(OLD.{column}) = 'blob';
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_update AFTER UPDATE OF {column} ON {table} BEGIN
+        INSERT INTO {table}_fts ({table}_fts, rowid, {column})
+        SELECT 'delete', OLD.id, OLD.{column} WHERE typeof(OLD.{column}) != 'blob';
+        INSERT INTO {table}_fts_pending (op, item_id, value)
+        SELECT 'delete', OLD.id, OLD.{column} WHERE typeof(OLD.{column}) = 'blob';
+        INSERT INTO {table}_fts (rowid, {column}) SELECT NEW.id, NEW.{column} WHERE typeof(NEW.{column}) != 'blob';
+        INSERT INTO {table}_fts_pending (op, item_id, value)
+        SELECT 'insert', NEW.id, NEW.{column} WHERE typeof(NEW.{column}) = 'blob';
+    END;
+    INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild');
+    """
+
+
+# Large imported chunks move to pack_text storage, searched through a view.
+COMPRESSED_CHUNKS = """
+    DROP TRIGGER IF EXISTS trg_imported_chunks_fts_insert;
+    DROP TRIGGER IF EXISTS trg_imported_chunks_fts_delete;
+    DROP TRIGGER IF EXISTS trg_imported_chunks_fts_update;
+    DROP TABLE IF EXISTS imported_chunks_fts;
+    UPDATE imported_chunks SET text = pack_text(text);
+""" + _packed_search_index("imported_chunks", "text")
+
+# Search indexes over pack_text columns, whose compressed rows wait in a
+# pending table until apply_pending_search_updates indexes them.
+PACKED_SEARCH_INDEXES = ("imported_chunks_fts",)
+# Queued updates read per query while applying them.
+PENDING_BATCH_SIZE = 100
+
+
+def apply_pending_search_updates(conn: sqlite3.Connection) -> int:
+    """Index the compressed rows queued by the packed search indexes' triggers, in order.
+
+    Called before searching and after importing; needs the connection's
+    unpack_text (see get_connection). Returns the number of updates applied.
+    """
+    applied = 0
+    for index in PACKED_SEARCH_INDEXES:
+        column = SEARCH_INDEXES[index.removesuffix("_fts")][0]
+        while batch := conn.execute(
+            f"SELECT id, op, item_id, value FROM main.{index}_pending ORDER BY id LIMIT {PENDING_BATCH_SIZE}"
+        ).fetchall():
+            for _id, op, item_id, value in batch:
+                if op == "insert":
+                    conn.execute(
+                        f"INSERT INTO main.{index} (rowid, {column}) VALUES (?, ?)", (item_id, unpack_text(value))
+                    )
+                else:
+                    conn.execute(
+                        f"INSERT INTO main.{index} ({index}, rowid, {column}) VALUES ('delete', ?, ?)",
+                        (item_id, unpack_text(value)),
+                    )
+            conn.execute(f"DELETE FROM main.{index}_pending WHERE id <= ?", (batch[-1][0],))
+            applied += len(batch)
+    return applied
+
+
+# Numbered schema migrations. Migration N (1-based) brings a database from
+# PRAGMA user_version N-1 to N. Append new migrations; never edit old ones.
+CARD_STATE_RETIRED = """
+    ALTER TABLE card_state ADD COLUMN retired INTEGER NOT NULL DEFAULT 0;
+    DROP INDEX IF EXISTS idx_card_state_user_next_review;
+    DROP INDEX IF EXISTS idx_card_state_user_domain_next_review;
+    CREATE INDEX idx_card_state_user_next_review ON card_state(user_id, retired, next_review);
+    CREATE INDEX idx_card_state_user_domain_next_review ON card_state(user_id, retired, domain_id, next_review);
+"""
+
+MIGRATIONS = [
+    # 1: baseline tables (IF NOT EXISTS so pre-versioned databases adopt it)
+    SCHEMA,
+    # 2: indexes for due-card selection, quiz sampling and score joins
+    """
+    CREATE INDEX IF NOT EXISTS idx_flashcards_next_review ON flashcards(next_review);
+    CREATE INDEX IF NOT EXISTS idx_flashcards_domain_next_review ON flashcards(domain_id, next_review);
+    CREATE INDEX IF NOT EXISTS idx_quiz_questions_domain ON quiz_questions(domain_id);
+    CREATE INDEX IF NOT EXISTS idx_quiz_questions_subtopic ON quiz_questions(subtopic_id);
+    CREATE INDEX IF NOT EXISTS idx_quiz_results_question ON quiz_results(quiz_question_id);
+    CREATE INDEX IF NOT EXISTS idx_flashcard_results_card ON flashcard_results(flashcard_id);
+    """,
+    # 3: write-behind journal bookkeeping (see gcp_tutor.recorder)
+    """
+    CREATE TABLE IF NOT EXISTS journal_state (
+        journal TEXT PRIMARY KEY,
+        flushed_through INTEGER NOT NULL
+    );
+    """,
+    # 4: FSRS memory state (see gcp_tutor.scheduler)
+    """
+    ALTER TABLE flashcards ADD COLUMN stability REAL;
+    ALTER TABLE flashcards ADD COLUMN difficulty REAL;
+    """,
+    # 5: score totals per (domain, subtopic), kept current by triggers.
+    # subtopic_id 0 stands for "no subtopic" so it can be part of the key.
+    """
+    CREATE TABLE IF NOT EXISTS quiz_score_totals (
+        domain_id INTEGER NOT NULL,
+        subtopic_id INTEGER NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        correct INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (domain_id, subtopic_id)
+    );
+
+    CREATE TABLE IF NOT EXISTS flashcard_score_totals (
+        domain_id INTEGER NOT NULL,
+        subtopic_id INTEGER NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        correct INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (domain_id, subtopic_id)
+    );
+
+    CREATE TRIGGER IF NOT EXISTS trg_quiz_results_insert AFTER INSERT ON quiz_results BEGIN
+        INSERT INTO quiz_score_totals (domain_id, subtopic_id, attempts, correct)
+        SELECT domain_id, COALESCE(subtopic_id, 0), 1, NEW.is_correct
+        FROM quiz_questions WHERE id = NEW.quiz_question_id
+        ON CONFLICT (domain_id, subtopic_id) DO UPDATE
+        SET attempts = attempts + 1, correct = correct + excluded.correct;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_quiz_results_delete AFTER DELETE ON quiz_results BEGIN
+        UPDATE quiz_score_totals SET attempts = attempts - 1, correct = correct - OLD.is_correct
+        WHERE (domain_id, subtopic_id) = (
+            SELECT domain_id, COALESCE(subtopic_id, 0) FROM quiz_questions WHERE id = OLD.quiz_question_id
+        );
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_flashcard_results_insert AFTER INSERT ON flashcard_results BEGIN
+        INSERT INTO flashcard_score_totals (domain_id, subtopic_id, attempts, correct)
+        SELECT domain_id, COALESCE(subtopic_id, 0), 1, NEW.rating >= 3
+        FROM flashcards WHERE id = NEW.flashcard_id
+        ON CONFLICT (domain_id, subtopic_id) DO UPDATE
+        SET attempts = attempts + 1, correct = correct + excluded.correct;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_flashcard_results_delete AFTER DELETE ON flashcard_results BEGIN
+        UPDATE flashcard_score_totals SET attempts = attempts - 1, correct = correct - (OLD.rating >= 3)
+        WHERE (domain_id, subtopic_id) = (
+            SELECT domain_id, COALESCE(subtopic_id, 0) FROM flashcards WHERE id = OLD.flashcard_id
+        );
+    END;
+
+    INSERT INTO quiz_score_totals (domain_id, subtopic_id, attempts, correct)
+    SELECT q.domain_id, COALESCE(q.subtopic_id, 0), COUNT(*), SUM(r.is_correct)
+    FROM quiz_results r JOIN quiz_questions q ON r.quiz_question_id = q.id
+    GROUP BY q.domain_id, COALESCE(q.subtopic_id, 0);
+
+    INSERT INTO flashcard_score_totals (domain_id, subtopic_id, attempts, correct)
+    SELECT f.domain_id, COALESCE(f.subtopic_id, 0), COUNT(*), SUM(fr.rating >= 3)
+    FROM flashcard_results fr JOIN flashcards f ON fr.flashcard_id = f.id
+    GROUP BY f.domain_id, COALESCE(f.subtopic_id, 0);
+    """,
+    # 6: distinct quiz answer times ("quizzes taken"), kept current by triggers.
+    """
+    CREATE INDEX IF NOT EXISTS idx_quiz_results_answered_at ON quiz_results(answered_at);
+
+    CREATE TABLE IF NOT EXISTS result_counters (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL DEFAULT 0
+    );
+
+    INSERT OR REPLACE INTO result_counters (name, value)
+    SELECT 'quizzes_taken', COUNT(DISTINCT answered_at) FROM quiz_results;
+
+    CREATE TRIGGER IF NOT EXISTS trg_quiz_results_taken_insert AFTER INSERT ON quiz_results
+    WHEN NEW.answered_at IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM quiz_results WHERE answered_at = NEW.answered_at AND id != NEW.id
+    ) BEGIN
+        UPDATE result_counters SET value = value + 1 WHERE name = 'quizzes_taken';
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_quiz_results_taken_delete AFTER DELETE ON quiz_results
+    WHEN OLD.answered_at IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM quiz_results WHERE answered_at = OLD.answered_at
+    ) BEGIN
+        UPDATE result_counters SET value = value - 1 WHERE name = 'quizzes_taken';
+    END;
+    """,
+    # 7: data generation, bumped on any write to the tables cached reads use.
+    """
+    CREATE TABLE IF NOT EXISTS data_generation (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        value INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO data_generation (id, value) VALUES (1, 0);
+    """ + _generation_triggers(
+        "domains", "subtopics", "study_days", "user_progress", "user_settings",
+        "quiz_score_totals", "flashcard_score_totals", "result_counters",
+    ),
+    # 8: multiple learners. Card state moves from flashcards to card_state
+    # (one row per user and card, created by triggers), and per-user tables
+    # gain a user_id. Existing progress belongs to the default user (id 1).
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL UNIQUE,
+        created_at TEXT
+    );
+    INSERT OR IGNORE INTO users (id, name, created_at) VALUES (1, 'default', datetime('now'));
+
+    CREATE TABLE IF NOT EXISTS card_state (
+        user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        flashcard_id INTEGER NOT NULL REFERENCES flashcards(id) ON DELETE CASCADE,
+        domain_id INTEGER NOT NULL,
+        ease_factor REAL DEFAULT 2.5,
+        interval INTEGER DEFAULT 0,
+        repetitions INTEGER DEFAULT 0,
+        next_review TEXT,
+        stability REAL,
+        difficulty REAL,
+        PRIMARY KEY (user_id, flashcard_id)
+    ) WITHOUT ROWID;
+    INSERT INTO card_state
+        (user_id, flashcard_id, domain_id, ease_factor, interval, repetitions, next_review, stability, difficulty)
+    SELECT 1, id, domain_id, ease_factor, interval, repetitions, next_review, stability, difficulty
+    FROM flashcards;
+    CREATE INDEX IF NOT EXISTS idx_card_state_user_next_review ON card_state(user_id, next_review);
+    CREATE INDEX IF NOT EXISTS idx_card_state_user_domain_next_review
+        ON card_state(user_id, domain_id, next_review);
+    CREATE INDEX IF NOT EXISTS idx_card_state_card ON card_state(flashcard_id);
+
+    CREATE TRIGGER IF NOT EXISTS trg_users_insert_card_state AFTER INSERT ON users BEGIN
+        INSERT INTO card_state (user_id, flashcard_id, domain_id) SELECT NEW.id, id, domain_id FROM flashcards;
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_flashcards_insert_card_state AFTER INSERT ON flashcards BEGIN
+        INSERT INTO card_state (user_id, flashcard_id, domain_id) SELECT id, NEW.id, NEW.domain_id FROM users;
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_flashcards_domain_card_state AFTER UPDATE OF domain_id ON flashcards BEGIN
+        UPDATE card_state SET domain_id = NEW.domain_id WHERE flashcard_id = NEW.id;
+    END;
+
+    DROP INDEX IF EXISTS idx_flashcards_next_review;
+    DROP INDEX IF EXISTS idx_flashcards_domain_next_review;
+    ALTER TABLE flashcards DROP COLUMN ease_factor;
+    ALTER TABLE flashcards DROP COLUMN interval;
+    ALTER TABLE flashcards DROP COLUMN repetitions;
+    ALTER TABLE flashcards DROP COLUMN next_review;
+    ALTER TABLE flashcards DROP COLUMN stability;
+    ALTER TABLE flashcards DROP COLUMN difficulty;
+    CREATE INDEX IF NOT EXISTS idx_flashcards_domain ON flashcards(domain_id);
+
+    ALTER TABLE user_progress ADD COLUMN user_id INTEGER NOT NULL DEFAULT 1;
+    ALTER TABLE quiz_results ADD COLUMN user_id INTEGER NOT NULL DEFAULT 1;
+    ALTER TABLE flashcard_results ADD COLUMN user_id INTEGER NOT NULL DEFAULT 1;
+    CREATE INDEX IF NOT EXISTS idx_user_progress_user_day ON user_progress(user_id, session_day);
+    CREATE INDEX IF NOT EXISTS idx_quiz_results_user_question ON quiz_results(user_id, quiz_question_id);
+    CREATE INDEX IF NOT EXISTS idx_flashcard_results_user_card ON flashcard_results(user_id, flashcard_id);
+    DROP INDEX IF EXISTS idx_quiz_results_answered_at;
+    CREATE INDEX IF NOT EXISTS idx_quiz_results_user_answered_at ON quiz_results(user_id, answered_at);
+
+    CREATE TABLE user_settings_new (
+        user_id INTEGER NOT NULL DEFAULT 1 REFERENCES users(id) ON DELETE CASCADE,
+        key TEXT NOT NULL,
+        value TEXT,
+        PRIMARY KEY (user_id, key)
+    );
+    INSERT INTO user_settings_new (user_id, key, value) SELECT 1, key, value FROM user_settings;
+    DROP TABLE user_settings;
+    ALTER TABLE user_settings_new RENAME TO user_settings;
+
+    CREATE TABLE session_items_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL DEFAULT 1 REFERENCES users(id) ON DELETE CASCADE,
+        session_day INTEGER NOT NULL,
+        component TEXT NOT NULL,
+        item_id INTEGER NOT NULL,
+        UNIQUE(user_id, session_day, component, item_id)
+    );
+    INSERT INTO session_items_new (user_id, session_day, component, item_id)
+    SELECT 1, session_day, component, item_id FROM session_items;
+    DROP TABLE session_items;
+    ALTER TABLE session_items_new RENAME TO session_items;
+
+    DROP TRIGGER IF EXISTS trg_quiz_results_insert;
+    DROP TRIGGER IF EXISTS trg_quiz_results_delete;
+    DROP TRIGGER IF EXISTS trg_flashcard_results_insert;
+    DROP TRIGGER IF EXISTS trg_flashcard_results_delete;
+    DROP TRIGGER IF EXISTS trg_quiz_results_taken_insert;
+    DROP TRIGGER IF EXISTS trg_quiz_results_taken_delete;
+    DROP TABLE quiz_score_totals;
+    DROP TABLE flashcard_score_totals;
+    DROP TABLE result_counters;
+
+    CREATE TABLE quiz_score_totals (
+        user_id INTEGER NOT NULL,
+        domain_id INTEGER NOT NULL,
+        subtopic_id INTEGER NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        correct INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, domain_id, subtopic_id)
+    );
+
+    CREATE TABLE flashcard_score_totals (
+        user_id INTEGER NOT NULL,
+        domain_id INTEGER NOT NULL,
+        subtopic_id INTEGER NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        correct INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, domain_id, subtopic_id)
+    );
+
+    CREATE TABLE result_counters (
+        user_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        value INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, name)
+    );
+
+    CREATE TRIGGER trg_quiz_results_insert AFTER INSERT ON quiz_results BEGIN
+        INSERT INTO quiz_score_totals (user_id, domain_id, subtopic_id, attempts, correct)
+        SELECT NEW.user_id, domain_id, COALESCE(subtopic_id, 0), 1, NEW.is_correct
+        FROM quiz_questions WHERE id = NEW.quiz_question_id
+        ON CONFLICT (user_id, domain_id, subtopic_id) DO UPDATE
+        SET attempts = attempts + 1, correct = correct + excluded.correct;
+    END;
+
+    CREATE TRIGGER trg_quiz_results_delete AFTER DELETE ON quiz_results BEGIN
+        UPDATE quiz_score_totals SET attempts = attempts - 1, correct = correct - OLD.is_correct
+        WHERE (user_id, domain_id, subtopic_id) = (
+            SELECT OLD.user_id, domain_id, COALESCE(subtopic_id, 0)
+            FROM quiz_questions WHERE id = OLD.quiz_question_id
+        );
+    END;
+
+    CREATE TRIGGER trg_flashcard_results_insert AFTER INSERT ON flashcard_results BEGIN
+        INSERT INTO flashcard_score_totals (user_id, domain_id, subtopic_id, attempts, correct)
+        SELECT NEW.user_id, domain_id, COALESCE(subtopic_id, 0), 1, NEW.rating >= 3
+        FROM flashcards WHERE id = NEW.flashcard_id
+        ON CONFLICT (user_id, domain_id, subtopic_id) DO UPDATE
+        SET attempts = attempts + 1, correct = correct + excluded.correct;
+    END;
+
+    CREATE TRIGGER trg_flashcard_results_delete AFTER DELETE ON flashcard_results BEGIN
+        UPDATE flashcard_score_totals SET attempts = attempts - 1, correct = correct - (OLD.rating >= 3)
+        WHERE (user_id, domain_id, subtopic_id) = (
+            SELECT OLD.user_id, domain_id, COALESCE(subtopic_id, 0)
+            FROM flashcards WHERE id = OLD.flashcard_id
+        );
+    END;
+
+    CREATE TRIGGER trg_quiz_results_taken_insert AFTER INSERT ON quiz_results
+    WHEN NEW.answered_at IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM quiz_results
+        WHERE user_id = NEW.user_id AND answered_at = NEW.answered_at AND id != NEW.id
+    ) BEGIN
+        INSERT INTO result_counters (user_id, name, value) VALUES (NEW.user_id, 'quizzes_taken', 1)
+        ON CONFLICT (user_id, name) DO UPDATE SET value = value + 1;
+    END;
+
+    CREATE TRIGGER trg_quiz_results_taken_delete AFTER DELETE ON quiz_results
+    WHEN OLD.answered_at IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM quiz_results WHERE user_id = OLD.user_id AND answered_at = OLD.answered_at
+    ) BEGIN
+        UPDATE result_counters SET value = value - 1 WHERE user_id = OLD.user_id AND name = 'quizzes_taken';
+    END;
+    """ + SCORE_TOTALS_REBUILD + _generation_triggers(
+        "users", "user_settings", "quiz_score_totals", "flashcard_score_totals", "result_counters",
+    ),
+    # 9: incremental content sync (see gcp_tutor.seed.sync_content). Seeded
+    # rows carry a hash of their source record; rows dropped from the content
+    # files are retired rather than deleted, so their results stay valid.
+    """
+    ALTER TABLE flashcards ADD COLUMN content_hash TEXT;
+    ALTER TABLE flashcards ADD COLUMN retired INTEGER NOT NULL DEFAULT 0;
+    ALTER TABLE quiz_questions ADD COLUMN content_hash TEXT;
+    ALTER TABLE quiz_questions ADD COLUMN retired INTEGER NOT NULL DEFAULT 0;
+
+    CREATE TABLE IF NOT EXISTS content_syncs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        content_hash TEXT NOT NULL,
+        applied_at TEXT,
+        inserted INTEGER NOT NULL DEFAULT 0,
+        updated INTEGER NOT NULL DEFAULT 0,
+        retired INTEGER NOT NULL DEFAULT 0
+    );
+
+    DROP TRIGGER IF EXISTS trg_users_insert_card_state;
+    CREATE TRIGGER trg_users_insert_card_state AFTER INSERT ON users BEGIN
+        INSERT INTO card_state (user_id, flashcard_id, domain_id)
+        SELECT NEW.id, id, domain_id FROM flashcards WHERE NOT retired;
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_flashcards_retired_card_state AFTER UPDATE OF retired ON flashcards
+    WHEN OLD.retired IS NOT NEW.retired BEGIN
+        DELETE FROM card_state WHERE flashcard_id = NEW.id AND NEW.retired;
+        INSERT OR IGNORE INTO card_state (user_id, flashcard_id, domain_id)
+        SELECT id, NEW.id, NEW.domain_id FROM users WHERE NOT NEW.retired;
+    END;
+    """,
+    # 10: full-text search over cards, questions, reading and imported notes.
+    "".join(_search_index(table, columns) for table, columns in (
+        ("flashcards", ("front", "back")),
+        ("quiz_questions", ("stem", "choice_a", "choice_b", "choice_c", "choice_d", "explanation")),
+        ("study_days", ("reading_content",)),
+        ("imported_content", ("filename", "content_text")),
+    )),
+    # 11: imported documents are stored as a sequence of text chunks (see
+    # gcp_tutor.importer), and searched per chunk. Existing imports become a
+    # single chunk each.
+    """
+    DROP TRIGGER IF EXISTS trg_imported_content_fts_insert;
+    DROP TRIGGER IF EXISTS trg_imported_content_fts_delete;
+    DROP TRIGGER IF EXISTS trg_imported_content_fts_update;
+    DROP TABLE IF EXISTS imported_content_fts;
+
+    CREATE TABLE IF NOT EXISTS imported_chunks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        import_id INTEGER NOT NULL REFERENCES imported_content(id),
+        seq INTEGER NOT NULL,
+        text TEXT NOT NULL,
+        UNIQUE (import_id, seq)
+    );
+    INSERT INTO imported_chunks (import_id, seq, text)
+    SELECT id, 0, content_text FROM imported_content WHERE TRIM(COALESCE(content_text, '')) != '';
+    ALTER TABLE imported_content DROP COLUMN content_text;
+
+    -- A trigger rather than ON DELETE CASCADE: progress databases run with
+    -- foreign keys off.
+    CREATE TRIGGER IF NOT EXISTS trg_imported_content_delete_chunks AFTER DELETE ON imported_content BEGIN
+        DELETE FROM imported_chunks WHERE import_id = OLD.id;
+    END;
+    """ + _search_index("imported_chunks", ("text",)),
+    # 12: where each import came from, so re-importing skips unchanged files
+    # (see gcp_tutor.importer). Earlier imports have no source and are left alone.
+    """
+    ALTER TABLE imported_content ADD COLUMN source_path TEXT;
+    ALTER TABLE imported_content ADD COLUMN content_hash TEXT;
+    ALTER TABLE imported_content ADD COLUMN file_mtime_ns INTEGER;
+    ALTER TABLE imported_content ADD COLUMN file_size INTEGER;
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_imported_content_source_path ON imported_content(source_path);
+    CREATE INDEX IF NOT EXISTS idx_imported_content_hash ON imported_content(content_hash);
+    """,
+    # 13: passages of imported notes linked to their closest subtopics, as
+    # offsets into imported_chunks (see gcp_tutor.linking).
+    """
+    CREATE TABLE IF NOT EXISTS imported_passage_links (
+        chunk_id INTEGER NOT NULL REFERENCES imported_chunks(id),
+        start INTEGER NOT NULL,
+        length INTEGER NOT NULL,
+        subtopic_id INTEGER NOT NULL REFERENCES subtopics(id),
+        score REAL NOT NULL,
+        PRIMARY KEY (chunk_id, start, subtopic_id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_imported_passage_links_subtopic
+        ON imported_passage_links(subtopic_id, score DESC);
+    CREATE TRIGGER IF NOT EXISTS trg_imported_chunks_delete_links AFTER DELETE ON imported_chunks BEGIN
+        DELETE FROM imported_passage_links WHERE chunk_id = OLD.id;
+    END;
+    """,
+    # 14: each distinct reading text is stored once, in reading_blobs, and
+    # large imported chunks are stored compressed (see pack_text).
+    """
+    DROP TRIGGER IF EXISTS trg_study_days_fts_insert;
+    DROP TRIGGER IF EXISTS trg_study_days_fts_delete;
+    DROP TRIGGER IF EXISTS trg_study_days_fts_update;
+    DROP TABLE IF EXISTS study_days_fts;
+
+    CREATE TABLE IF NOT EXISTS reading_blobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        content_hash TEXT NOT NULL UNIQUE,
+        body TEXT NOT NULL
+    );
+    INSERT INTO reading_blobs (content_hash, body)
+    SELECT text_hash(reading_content), reading_content FROM study_days
+    WHERE COALESCE(reading_content, '') != '' GROUP BY reading_content ORDER BY MIN(id);
+    ALTER TABLE study_days ADD COLUMN reading_blob_id INTEGER REFERENCES reading_blobs(id);
+    UPDATE study_days SET reading_blob_id = (
+        SELECT id FROM reading_blobs WHERE content_hash = text_hash(study_days.reading_content)
+    ) WHERE reading_content IS NOT NULL;
+    ALTER TABLE study_days DROP COLUMN reading_content;
+    """ + _search_index("reading_blobs", ("body",)) + COMPRESSED_CHUNKS,
+    # 15: the dashboard's review forecast reads card state and flashcard
+    # history, so writes to them bump the data generation too.
+    _generation_triggers("card_state", "flashcard_results"),
+    # 16: retiring a card flags its card_state rows instead of deleting them,
+    # so a learner's schedule survives the card coming back. The due-order
+    # indexes lead with the flag so due-card reads stay index-only.
+    CARD_STATE_RETIRED + """
+    DROP TRIGGER IF EXISTS trg_flashcards_retired_card_state;
+    CREATE TRIGGER trg_flashcards_retired_card_state AFTER UPDATE OF retired ON flashcards
+    WHEN OLD.retired IS NOT NEW.retired BEGIN
+        UPDATE card_state SET retired = NEW.retired WHERE flashcard_id = NEW.id;
+        INSERT OR IGNORE INTO card_state (user_id, flashcard_id, domain_id)
+        SELECT id, NEW.id, NEW.domain_id FROM users WHERE NOT NEW.retired;
+    END;
+    """,
+    # 17: each content sync also records the content files' sizes and
+    # modification times, so startup can tell the content is unchanged
+    # without hashing the files (see gcp_tutor.seed.is_current).
+    "ALTER TABLE content_syncs ADD COLUMN source_stamp TEXT;",
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+# Progress databases (see init_progress_db) hold no content tables, so they
+# apply these instead of the matching MIGRATIONS entry; content changes
+# arrive with a rebuilt content database.
+PROGRESS_MIGRATIONS = {
+    # synced_through counted flashcard ids before content_syncs existed.
+    9: "UPDATE content_link SET synced_through = 0;",
+    10: _search_index("imported_content", ("filename", "content_text")),
+    14: COMPRESSED_CHUNKS,
+    16: CARD_STATE_RETIRED,
+    17: "",
+}
+
+
+@dataclass(frozen=True)
+class ConnectionProfile:
+    """PRAGMA settings applied to every new connection.
+
+    ``cache_size_kib`` and ``mmap_size`` of ``None`` are sized from the
+    database file when the connection is opened.
+    """
+    journal_mode: str = "wal"
+    synchronous: str = "normal"
+    busy_timeout_ms: int = 5000
+    temp_store: str = "memory"
+    cache_size_kib: int | None = None
+    mmap_size: int | None = None
+
+
+# WAL lets a dashboard in another terminal read while a session writes;
+# synchronous=NORMAL is durable across application crashes in WAL mode.
+DEFAULT_PROFILE = ConnectionProfile()
+
+# SQLite's stock behaviour, kept for comparison and benchmarking.
+LEGACY_PROFILE = ConnectionProfile(
+    journal_mode="delete", synchronous="full", busy_timeout_ms=0,
+    temp_store="default", cache_size_kib=2000, mmap_size=0,
+)
+
+MIN_CACHE_KIB = 2 * 1024
+MAX_CACHE_KIB = 64 * 1024
+MAX_MMAP_BYTES = 256 * 1024 * 1024
+
+_active_profile = DEFAULT_PROFILE
+
+
+def set_connection_profile(profile: ConnectionProfile) -> None:
+    """Use ``profile`` for connections opened from now on."""
+    global _active_profile
+    _active_profile = profile
+
+
+def get_connection_profile() -> ConnectionProfile:
+    return _active_profile
+
+
+def _sized_pragmas(db_path: str, profile: ConnectionProfile) -> tuple[int, int]:
+    """Return (cache_size_kib, mmap_size) for the database at ``db_path``."""
+    try:
+        db_bytes = os.path.getsize(db_path)
+    except OSError:
+        db_bytes = 0
+    cache_kib = profile.cache_size_kib
+    if cache_kib is None:
+        # Enough cache to hold the whole database, within sane bounds.
+        cache_kib = min(MAX_CACHE_KIB, max(MIN_CACHE_KIB, db_bytes // 1024 * 5 // 4))
+    mmap_size = profile.mmap_size
+    if mmap_size is None:
+        # Leave room for the file to double before it outgrows the mapping.
+        mmap_size = min(MAX_MMAP_BYTES, db_bytes * 2)
+    return cache_kib, mmap_size
+
+
+def apply_profile(conn: sqlite3.Connection, db_path: str, profile: ConnectionProfile) -> None:
+    """Apply ``profile``'s PRAGMAs to an open connection."""
+    cache_kib, mmap_size = _sized_pragmas(db_path, profile)
+    conn.execute(f"PRAGMA busy_timeout = {int(profile.busy_timeout_ms)}")
+    conn.execute(f"PRAGMA journal_mode = {profile.journal_mode}")
+    conn.execute(f"PRAGMA synchronous = {profile.synchronous}")
+    conn.execute(f"PRAGMA temp_store = {profile.temp_store}")
+    # Negative cache_size is in KiB rather than pages.
+    conn.execute(f"PRAGMA cache_size = {-int(cache_kib)}")
+    conn.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+
+
+def get_connection(
+    db_path: str = DEFAULT_DB_PATH, profile: ConnectionProfile | None = None,
+) -> sqlite3.Connection:
+    """Return a new SQLite connection with row factory and foreign keys enabled.
+
+    The caller owns the connection and must close it. Library code should
+    prefer ``connect()``, which reuses one long-lived connection per thread.
+    ``profile`` defaults to the one set with ``set_connection_profile()``.
+    A progress database (see ``init_progress_db``) gets its content database
+    attached.
+    """
+    profile = profile or _active_profile
+    conn = sqlite3.connect(db_path, timeout=profile.busy_timeout_ms / 1000)
     conn.row_factory = sqlite3.Row
+    _register_functions(conn)
     conn.execute("PRAGMA foreign_keys = ON")
+    apply_profile(conn, db_path, profile)
+    content_path = _linked_content_path(conn)
+    if content_path is not None:
+        _attach_content(conn, content_path, profile)
     return conn
 
 
+_local = threading.local()
+
+
+def _thread_connections() -> dict:
+    """Per-thread map of db_path -> [connection, nesting depth]."""
+    conns = getattr(_local, "connections", None)
+    if conns is None:
+        conns = _local.connections = {}
+    return conns
+
+
+@contextmanager
+def connect(db_path: str = DEFAULT_DB_PATH) -> Iterator[sqlite3.Connection]:
+    """Yield the calling thread's cached connection for ``db_path``.
+
+    The connection is opened on first use and kept for the life of the
+    thread, so repeated calls only pay for their SQL. The outermost ``with``
+    block commits on success and rolls back on error; nested blocks join the
+    enclosing transaction. Connections are never shared between threads.
+    """
+    conns = _thread_connections()
+    entry = conns.get(db_path)
+    if entry is None:
+        entry = conns[db_path] = [get_connection(db_path), 0]
+    conn = entry[0]
+    entry[1] += 1
+    try:
+        yield conn
+    except BaseException:
+        if entry[1] == 1:
+            conn.rollback()
+        raise
+    else:
+        if entry[1] == 1:
+            conn.commit()
+    finally:
+        entry[1] -= 1
+
+
+def close_connections() -> None:
+    """Close every cached connection owned by the calling thread."""
+    conns = _thread_connections()
+    for conn, _depth in conns.values():
+        conn.close()
+    conns.clear()
+
+
+def rebuild_score_totals(db_path: str = DEFAULT_DB_PATH) -> None:
+    """Recompute score totals and result counters from the full result history.
+
+    The totals are maintained by triggers; rebuild after bulk edits that
+    bypass them, such as moving questions or cards to another subtopic.
+    """
+    with connect(db_path) as conn:
+        for statement in SCORE_TOTALS_REBUILD.split(";"):
+            if statement.strip():
+                conn.execute(statement)
+
+
+def storage_report(db_path: str = DEFAULT_DB_PATH) -> dict[str, int]:
+    """Bytes of pages used by each table of ``db_path``, largest first.
+
+    A table's indexes count towards it, and a virtual table's shadow tables
+    (those of the FTS5 search indexes) towards the virtual table. Free
+    pages are not counted; VACUUM first for a report that adds up to the
+    file size.
+    """
+    with connect(db_path) as conn:
+        rows = conn.execute(
+            """SELECT COALESCE(m.tbl_name, s.name), SUM(s.pgsize) FROM main.dbstat s
+               LEFT JOIN main.sqlite_master m ON m.name = s.name GROUP BY 1"""
+        ).fetchall()
+        indexes = [
+            row[0] for row in conn.execute("SELECT name FROM main.sqlite_master WHERE sql LIKE 'CREATE VIRTUAL TABLE%'")
+        ]
+    report: dict[str, int] = {}
+    for name, size in rows:
+        name = next((index for index in indexes if name.startswith(f"{index}_")), name)
+        report[name] = report.get(name, 0) + size
+    return dict(sorted(report.items(), key=lambda item: -item[1]))
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Return the migration number the database is currently at."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply pending migrations in order. Returns the number applied.
+
+    Each migration runs in its own transaction together with the
+    ``user_version`` bump, so a failure leaves the database at the last
+    fully applied version.
+    """
+    current = get_schema_version(conn)
+    if current > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Database schema version {current} is newer than this tool supports ({SCHEMA_VERSION})"
+        )
+    progress = _linked_content_path(conn) is not None
+    for version in range(current + 1, SCHEMA_VERSION + 1):
+        sql = PROGRESS_MIGRATIONS.get(version, MIGRATIONS[version - 1]) if progress else MIGRATIONS[version - 1]
+        try:
+            conn.executescript(f"BEGIN;\n{sql}\nPRAGMA user_version = {version};\nCOMMIT;")
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+    if progress and current != SCHEMA_VERSION:
+        _sync_card_state(conn)  # skipped when the connection was opened on the old schema
+    return SCHEMA_VERSION - current
+
+
 def init_db(db_path: str = DEFAULT_DB_PATH) -> None:
-    """Initialize the database, creating all tables if they don't exist."""
+    """Initialize the database, applying any pending schema migrations.
+
+    When the schema is already current this costs a single PRAGMA read.
+    """
     Path(db_path).parent.mkdir(parents=True, exist_ok=True)
-    conn = get_connection(db_path)
-    conn.executescript(SCHEMA)
-    conn.commit()
-    conn.close()
+    with connect(db_path) as conn:
+        if get_schema_version(conn) != SCHEMA_VERSION:
+            migrate(conn)
+
+
+def close_connection(db_path: str) -> None:
+    """Close the calling thread's cached connection for ``db_path``, if open."""
+    entry = _thread_connections().pop(db_path, None)
+    if entry is not None:
+        entry[0].close()
+
+
+# Split layout: one immutable content database, built once by
+# gcp_tutor.seed.build_content_db, attached read-only to each learner's
+# small progress database. Unqualified table names resolve to main first and
+# then to attached databases, so queries need no changes.
+CONTENT_SCHEMA = "content"
+CONTENT_TABLES = ("domains", "subtopics", "reading_blobs", "study_days", "flashcards", "quiz_questions", "content_syncs")
+CONTENT_SEARCH_INDEXES = tuple(f"{table}_fts" for table in SEARCH_INDEXES if table in CONTENT_TABLES)
+
+# Progress-side triggers that read content tables. A trigger stored in a
+# database only sees that database, so progress databases drop these and
+# recreate them as TEMP triggers on every connection. Keep in step with the
+# latest migration defining them.
+CONTENT_TRIGGERS = {
+    "trg_quiz_results_insert": """AFTER INSERT ON main.quiz_results BEGIN
+        INSERT INTO quiz_score_totals (user_id, domain_id, subtopic_id, attempts, correct)
+        SELECT NEW.user_id, domain_id, COALESCE(subtopic_id, 0), 1, NEW.is_correct
+        FROM quiz_questions WHERE id = NEW.quiz_question_id
+        ON CONFLICT (user_id, domain_id, subtopic_id) DO UPDATE
+        SET attempts = attempts + 1, correct = correct + excluded.correct;
+    END""",
+    "trg_quiz_results_delete": """AFTER DELETE ON main.quiz_results BEGIN
+        UPDATE quiz_score_totals SET attempts = attempts - 1, correct = correct - OLD.is_correct
+        WHERE (user_id, domain_id, subtopic_id) = (
+            SELECT OLD.user_id, domain_id, COALESCE(subtopic_id, 0)
+            FROM quiz_questions WHERE id = OLD.quiz_question_id
+        );
+    END""",
+    "trg_flashcard_results_insert": """AFTER INSERT ON main.flashcard_results BEGIN
+        INSERT INTO flashcard_score_totals (user_id, domain_id, subtopic_id, attempts, correct)
+        SELECT NEW.user_id, domain_id, COALESCE(subtopic_id, 0), 1, NEW.rating >= 3
+        FROM flashcards WHERE id = NEW.flashcard_id
+        ON CONFLICT (user_id, domain_id, subtopic_id) DO UPDATE
+        SET attempts = attempts + 1, correct = correct + excluded.correct;
+    END""",
+    "trg_flashcard_results_delete": """AFTER DELETE ON main.flashcard_results BEGIN
+        UPDATE flashcard_score_totals SET attempts = attempts - 1, correct = correct - (OLD.rating >= 3)
+        WHERE (user_id, domain_id, subtopic_id) = (
+            SELECT OLD.user_id, domain_id, COALESCE(subtopic_id, 0)
+            FROM flashcards WHERE id = OLD.flashcard_id
+        );
+    END""",
+    "trg_users_insert_card_state": """AFTER INSERT ON main.users BEGIN
+        INSERT INTO card_state (user_id, flashcard_id, domain_id)
+        SELECT NEW.id, id, domain_id FROM flashcards WHERE NOT retired;
+    END""",
+}
+
+# Progress databases hold a few dozen tables and indexes with a handful of
+# rows each; every one of them takes at least a page.
+PROGRESS_PAGE_SIZE = 1024
+
+# Turns a freshly migrated database into a progress database.
+PROGRESS_SPLIT = """
+    CREATE TABLE content_link (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        path TEXT NOT NULL,
+        synced_through INTEGER NOT NULL DEFAULT 0  -- content_syncs id applied to card_state
+    );
+""" + "".join(f"DROP TRIGGER {name};\n" for name in CONTENT_TRIGGERS) + "".join(
+    f"DROP TABLE {table};\n" for table in CONTENT_SEARCH_INDEXES + tuple(reversed(CONTENT_TABLES))
+)
+
+
+def _linked_content_path(conn: sqlite3.Connection) -> str | None:
+    """The content database a progress database uses, or None for a combined database."""
+    try:
+        row = conn.execute("SELECT path FROM main.content_link").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+def _content_uri(content_path: str) -> str:
+    # immutable=1: no locking or change detection, pages come straight from
+    # the OS page cache shared by every process attaching the file.
+    return f"file:{quote(os.path.abspath(content_path))}?mode=ro&immutable=1"
+
+
+def _attach_content(conn: sqlite3.Connection, content_path: str, profile: ConnectionProfile) -> None:
+    """Attach ``content_path`` read-only and install the cross-database triggers."""
+    if not os.path.exists(content_path):
+        raise FileNotFoundError(f"Content database not found: {content_path}")
+    # Foreign keys cannot span databases; content ids are stable and the
+    # content database is never written, so references stay valid.
+    conn.execute("PRAGMA foreign_keys = OFF")
+    conn.execute(f"ATTACH DATABASE ? AS {CONTENT_SCHEMA}", (_content_uri(content_path),))
+    _cache_kib, mmap_size = _sized_pragmas(content_path, profile)
+    conn.execute(f"PRAGMA {CONTENT_SCHEMA}.mmap_size = {int(mmap_size)}")
+    for name, body in CONTENT_TRIGGERS.items():
+        conn.execute(f"CREATE TEMP TRIGGER IF NOT EXISTS {name} {body}")
+    version = conn.execute(f"PRAGMA {CONTENT_SCHEMA}.user_version").fetchone()[0]
+    if version != SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Content database {content_path} is at schema version {version}, expected {SCHEMA_VERSION}; "
+            "rebuild it with gcp_tutor.seed.build_content_db"
+        )
+    if get_schema_version(conn) == SCHEMA_VERSION:
+        _sync_card_state(conn)
+
+
+def _sync_card_state(conn: sqlite3.Connection) -> None:
+    """Bring a progress database's card state in line with content synced since the last connection.
+
+    Does what the flashcards triggers do in a combined database: rows of
+    retired cards are flagged rather than deleted, and follow their card's
+    domain.
+    """
+    synced = conn.execute(f"SELECT MAX(id) FROM {CONTENT_SCHEMA}.content_syncs").fetchone()[0] or 0
+    if conn.execute("SELECT synced_through FROM main.content_link").fetchone()[0] != synced:
+        conn.execute(
+            f"""UPDATE card_state SET retired = f.retired, domain_id = f.domain_id
+            FROM {CONTENT_SCHEMA}.flashcards f
+            WHERE f.id = card_state.flashcard_id
+            AND (card_state.retired, card_state.domain_id) IS NOT (f.retired, f.domain_id)"""
+        )
+        conn.execute(
+            f"""INSERT OR IGNORE INTO card_state (user_id, flashcard_id, domain_id)
+            SELECT u.id, f.id, f.domain_id FROM users u, {CONTENT_SCHEMA}.flashcards f WHERE NOT f.retired"""
+        )
+        conn.execute("UPDATE content_link SET synced_through = ?", (synced,))
+        conn.commit()
+
+
+def _split_progress(conn: sqlite3.Connection) -> None:
+    """Drop the content tables from a migrated database that holds no content."""
+    conn.execute("PRAGMA foreign_keys = OFF")
+    conn.executescript(f"BEGIN;\n{PROGRESS_SPLIT}\nCOMMIT;")
+
+
+def _file_schema_version(path: str) -> int | None:
+    """Schema version of the database file at ``path``, read without opening it for writing."""
+    if not os.path.exists(path):
+        return None
+    try:
+        conn = sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro", uri=True)
+        try:
+            return get_schema_version(conn)
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+
+
+def progress_template_path(content_path: str) -> str:
+    """Where the empty progress database for ``content_path`` is kept (see ``build_progress_template``)."""
+    return str(Path(content_path).with_suffix(".progress.db"))
+
+
+def build_progress_template(template_path: str) -> None:
+    """Build the empty progress database that ``init_progress_db`` copies for each new learner.
+
+    Running the migration chain and dropping the content tables again for
+    every learner costs tens of milliseconds; copying the result costs
+    about one. Nothing is done if the template is at the current schema
+    version.
+    """
+    if _file_schema_version(template_path) == SCHEMA_VERSION:
+        return
+    build_path = f"{template_path}.build"
+    for suffix in ("", "-wal", "-shm"):
+        Path(build_path + suffix).unlink(missing_ok=True)
+    conn = get_connection(build_path)
+    try:
+        migrate(conn)
+        _split_progress(conn)
+        conn.execute("PRAGMA journal_mode = delete")
+        conn.execute(f"PRAGMA page_size = {PROGRESS_PAGE_SIZE}")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.replace(build_path, template_path)
+
+
+def linked_content_path(db_path: str) -> str | None:
+    """The content database attached to ``db_path``, or None if it holds its own content."""
+    with connect(db_path) as conn:
+        return _linked_content_path(conn)
+
+
+def init_progress_db(db_path: str, content_path: str) -> None:
+    """Create or open a learner's progress database backed by a shared content database.
+
+    The progress database holds only users, card state, results, settings
+    and sessions; domains, the study plan, flashcards and questions are read
+    from ``content_path`` (see ``gcp_tutor.seed.build_content_db``), which
+    is attached read-only on every connection. A new progress database is
+    a copy of the template ``build_content_db`` leaves next to the content
+    database, or is migrated and split in place when there is none.
+    """
+    content_path = os.path.abspath(content_path)
+    template_path = progress_template_path(content_path)
+    if not os.path.exists(db_path) and _file_schema_version(template_path) == SCHEMA_VERSION:
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        copy_path = f"{db_path}.copy"
+        shutil.copyfile(template_path, copy_path)
+        os.replace(copy_path, db_path)
+    init_db(db_path)
+    with connect(db_path) as conn:
+        linked = _linked_content_path(conn)
+        if linked is not None:
+            if linked != content_path:
+                raise ValueError(f"{db_path} is linked to content database {linked}")
+            return
+        split = conn.execute("SELECT 1 FROM main.sqlite_master WHERE name = 'content_link'").fetchone() is None
+        if split:
+            # Not copied from a template: split the migrated database in place.
+            if conn.execute("SELECT 1 FROM domains").fetchone():
+                raise ValueError(f"{db_path} already holds its own content; cannot attach {content_path}")
+            _split_progress(conn)
+        conn.execute("INSERT INTO content_link (id, path) VALUES (1, ?)", (content_path,))
+        conn.commit()
+        if split:
+            conn.execute("VACUUM")
+        _attach_content(conn, content_path, _active_profile)
@@ -1,55 +1,143 @@
-"""Flashcard session logic with SM-2 scheduling."""
+"""Flashcard session logic with pluggable spaced-repetition scheduling."""
 from datetime import date, timedelta
-from gcp_tutor.db import get_connection
-from gcp_tutor.sm2 import sm2_update
+from gcp_tutor.db import DEFAULT_USER_ID, USER_CARDS_QUERY, connect
+from gcp_tutor.sampling import make_rng, sample_due_cards
+from gcp_tutor.scheduler import SM2Scheduler, get_scheduler
+from gcp_tutor.sm2 import batch_array, sm2_update_batch
 
 
-def get_due_cards(db_path: str, limit: int = 15) -> list:
-    conn = get_connection(db_path)
+def get_due_cards(
+    db_path: str, limit: int = 15, seed: int | None = None, user_id: int = DEFAULT_USER_ID,
+) -> list:
     today = date.today().isoformat()
-    cards = conn.execute(
-        """SELECT * FROM flashcards
-        WHERE next_review IS NULL OR next_review <= ?
-        ORDER BY next_review ASC NULLS FIRST, RANDOM()
-        LIMIT ?""",
-        (today, limit),
-    ).fetchall()
-    conn.close()
-    return cards
-
-
-def get_cards_for_domain(db_path: str, domain_id: int, limit: int = 15) -> list:
-    conn = get_connection(db_path)
+    key = get_scheduler(db_path, user_id).due_key
+    with connect(db_path) as conn:
+        return sample_due_cards(
+            conn, f"{key} IS NULL OR {key} <= ?", (today,), limit, make_rng(seed), key=key, user_id=user_id,
+        )
+
+
+def get_cards_for_domain(
+    db_path: str, domain_id: int, limit: int = 15, seed: int | None = None, user_id: int = DEFAULT_USER_ID,
+) -> list:
     today = date.today().isoformat()
-    cards = conn.execute(
-        """SELECT * FROM flashcards
-        WHERE domain_id = ? AND (next_review IS NULL OR next_review <= ?)
-        ORDER BY next_review ASC NULLS FIRST, RANDOM()
-        LIMIT ?""",
-        (domain_id, today, limit),
-    ).fetchall()
-    conn.close()
-    return cards
-
-
-def record_flashcard_result(db_path: str, card_id: int, rating: int) -> None:
-    conn = get_connection(db_path)
-    card = conn.execute("SELECT * FROM flashcards WHERE id = ?", (card_id,)).fetchone()
-    updated = sm2_update(
-        quality=rating,
-        repetitions=card["repetitions"],
-        ease_factor=card["ease_factor"],
-        interval=card["interval"],
-    )
-    next_review = (date.today() + timedelta(days=updated["interval"])).isoformat()
-    conn.execute(
-        """UPDATE flashcards SET ease_factor=?, interval=?, repetitions=?, next_review=?
-        WHERE id=?""",
-        (updated["ease_factor"], updated["interval"], updated["repetitions"], next_review, card_id),
-    )
-    conn.execute(
-        "INSERT INTO flashcard_results (flashcard_id, rating, reviewed_at) VALUES (?, ?, ?)",
-        (card_id, rating, date.today().isoformat()),
-    )
-    conn.commit()
-    conn.close()
+    key = get_scheduler(db_path, user_id).due_key
+    with connect(db_path) as conn:
+        return sample_due_cards(
+            conn, f"domain_id = ? AND ({key} IS NULL OR {key} <= ?)", (domain_id, today),
+            limit, make_rng(seed), key=key, user_id=user_id,
+        )
+
+
+def get_card(db_path: str, card_id: int, user_id: int = DEFAULT_USER_ID):
+    """A flashcard together with the user's scheduling state for it."""
+    with connect(db_path) as conn:
+        return conn.execute(f"{USER_CARDS_QUERY} WHERE f.id = ?", (user_id, card_id)).fetchone()
+
+
+def record_flashcard_result(
+    db_path: str, card_id: int, rating: int, reviewed_on: date | None = None,
+    user_id: int = DEFAULT_USER_ID,
+) -> None:
+    reviewed_on = reviewed_on or date.today()
+    scheduler = get_scheduler(db_path, user_id)
+    with connect(db_path) as conn:
+        card = get_card(db_path, card_id, user_id)
+        updated = scheduler.review(card, rating, reviewed_on)
+        columns = ", ".join(f"{column}=?" for column in updated)
+        conn.execute(
+            f"UPDATE card_state SET {columns} WHERE user_id=? AND flashcard_id=?",
+            (*updated.values(), user_id, card_id),
+        )
+        conn.execute(
+            "INSERT INTO flashcard_results (user_id, flashcard_id, rating, reviewed_at) VALUES (?, ?, ?, ?)",
+            (user_id, card_id, rating, reviewed_on.isoformat()),
+        )
+
+
+def _load_histories(conn, user_id: int) -> dict[int, list]:
+    """The user's (rating, reviewed_at) history per card, oldest first."""
+    histories: dict[int, list] = {
+        row[0]: [] for row in conn.execute("SELECT flashcard_id FROM card_state WHERE user_id = ?", (user_id,))
+    }
+    for card_id, rating, reviewed_at in conn.execute(
+        "SELECT flashcard_id, rating, reviewed_at FROM flashcard_results WHERE user_id = ? ORDER BY reviewed_at, id",
+        (user_id,),
+    ):
+        if card_id in histories:
+            histories[card_id].append((rating, reviewed_at))
+    return histories
+
+
+def reschedule_deck(db_path: str, user_id: int = DEFAULT_USER_ID) -> int:
+    """Recompute every card's state for a user by replaying their full review history.
+
+    With SM-2, cards are processed in lockstep, one review index at a time,
+    through ``sm2_update_batch``; cards are ordered by history length so each
+    step operates on a contiguous prefix. Other schedulers replay card by
+    card. All cards are written back with a single ``executemany``. Returns
+    the number of cards updated.
+    """
+    scheduler = get_scheduler(db_path, user_id)
+    if not isinstance(scheduler, SM2Scheduler):
+        return _reschedule_deck_scalar(db_path, scheduler, user_id)
+    with connect(db_path) as conn:
+        histories = _load_histories(conn, user_id)
+        order = sorted(histories, key=lambda cid: len(histories[cid]), reverse=True)
+        n = len(order)
+        interval = batch_array([0] * n, "i")
+        repetitions = batch_array([0] * n, "i")
+        ease_factor = batch_array([2.5] * n, "d")
+        step = 0
+        active = sum(1 for cid in order if histories[cid])
+        while active:
+            quality = [histories[order[i]][step][0] for i in range(active)]
+            new_interval, new_reps, new_ef = sm2_update_batch(
+                quality, repetitions[:active], ease_factor[:active], interval[:active],
+            )
+            interval[:active] = new_interval
+            repetitions[:active] = new_reps
+            ease_factor[:active] = new_ef
+            step += 1
+            while active and len(histories[order[active - 1]]) <= step:
+                active -= 1
+
+        updates = []
+        for i, card_id in enumerate(order):
+            history = histories[card_id]
+            if history:
+                last_review = date.fromisoformat(history[-1][1][:10])
+                next_review = (last_review + timedelta(days=int(interval[i]))).isoformat()
+                updates.append(
+                    (float(ease_factor[i]), int(interval[i]), int(repetitions[i]), next_review, user_id, card_id)
+                )
+            else:
+                updates.append((2.5, 0, 0, None, user_id, card_id))
+        conn.executemany(
+            """UPDATE card_state SET ease_factor=?, interval=?, repetitions=?, next_review=?
+            WHERE user_id=? AND flashcard_id=?""",
+            updates,
+        )
+    return len(updates)
+
+
+def _reschedule_deck_scalar(db_path: str, scheduler, user_id: int) -> int:
+    blank = {"ease_factor": 2.5, "interval": 0, "repetitions": 0, "next_review": None,
+             "stability": None, "difficulty": None}
+    with connect(db_path) as conn:
+        states = {}
+        for card_id, history in _load_histories(conn, user_id).items():
+            state = dict(blank)
+            for rating, reviewed_at in history:
+                state.update(scheduler.review(state, rating, date.fromisoformat(reviewed_at[:10])))
+            states[card_id] = state
+        conn.executemany(
+            """UPDATE card_state SET ease_factor=?, interval=?, repetitions=?, next_review=?,
+            stability=?, difficulty=? WHERE user_id=? AND flashcard_id=?""",
+            [
+                (s["ease_factor"], s["interval"], s["repetitions"], s["next_review"],
+                 s["stability"], s["difficulty"], user_id, card_id)
+                for card_id, s in states.items()
+            ],
+        )
+    return len(states)
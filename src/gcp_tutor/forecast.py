@@ -0,0 +1,184 @@
+"""Monte Carlo forecast of upcoming review workload.
+
+Starting from a learner's current card state, each trial plays every card
+forward: on each due date the learner recalls it with that card's estimated
+recall probability, and the active scheduler picks the next due date. The
+per-day review counts across trials give the expected workload and a
+10th-90th percentile band.
+"""
+import random
+from datetime import date, timedelta
+
+from gcp_tutor.db import DEFAULT_USER_ID, USER_CARDS_QUERY, connect
+from gcp_tutor.scheduler import SM2Scheduler, get_scheduler
+from gcp_tutor.sm2 import NOT_LOADED, load_numpy, sm2_update_batch
+
+np = NOT_LOADED  # set by forecast_reviews; None without NumPy
+
+# Ratings assumed for simulated reviews.
+RECALL_RATING = 4
+FORGET_RATING = 1
+# Ease factor change for FORGET_RATING in sm2_update (RECALL_RATING leaves it as is).
+FORGET_EASE_CHANGE = 0.1 - (5 - FORGET_RATING) * (0.08 + (5 - FORGET_RATING) * 0.02)
+
+TRIAL_CHUNK = 32
+
+
+def estimate_recall_probabilities(db_path: str, user_id: int = DEFAULT_USER_ID) -> dict[int, float]:
+    """Per-card probability of recall, smoothed towards the deck average.
+
+    Uses a Beta prior centred on the deck-wide success rate, so cards with
+    little history lean on the average and cards with no history use it.
+    Cards missing from the result should use ``probabilities[0]``.
+    """
+    with connect(db_path) as conn:
+        rows = conn.execute(
+            """SELECT flashcard_id, COUNT(*) as t, SUM(CASE WHEN rating >= 3 THEN 1 ELSE 0 END) as c
+            FROM flashcard_results WHERE user_id = ? GROUP BY flashcard_id""",
+            (user_id,),
+        ).fetchall()
+    total = sum(r["t"] for r in rows)
+    correct = sum(r["c"] for r in rows)
+    prior = (correct + 1) / (total + 2)
+    strength = 2.0
+    probabilities = {0: prior}
+    for r in rows:
+        probabilities[r["flashcard_id"]] = (r["c"] + prior * strength) / (r["t"] + strength)
+    return probabilities
+
+
+def _load_cards(db_path: str, days: int, new_per_day: int, user_id: int) -> list[dict]:
+    """Cards that can come due within the horizon, with a start day offset."""
+    today = date.today()
+    horizon = (today + timedelta(days=days - 1)).isoformat()
+    with connect(db_path) as conn:
+        rows = conn.execute(
+            f"""{USER_CARDS_QUERY}
+            WHERE s.next_review IS NULL OR s.next_review <= ?
+            ORDER BY s.next_review IS NOT NULL, f.id""",
+            (user_id, horizon),
+        ).fetchall()
+    cards = []
+    new_seen = 0
+    for row in rows:
+        card = dict(row)
+        if card["next_review"] is None:
+            # New cards are introduced gradually, not all on day one.
+            card["due_day"] = new_seen // new_per_day
+            new_seen += 1
+        else:
+            card["due_day"] = max(0, (date.fromisoformat(card["next_review"]) - today).days)
+        if card["due_day"] < days:
+            cards.append(card)
+    return cards
+
+
+def _summarize(per_trial: list[list[int]], days: int) -> list[dict]:
+    today = date.today()
+    trials = len(per_trial)
+    forecast = []
+    for d in range(days):
+        counts = sorted(trial[d] for trial in per_trial)
+        forecast.append({
+            "day": d,
+            "date": (today + timedelta(days=d)).isoformat(),
+            "expected": round(sum(counts) / trials, 1) if trials else 0.0,
+            "low": counts[int(0.1 * (trials - 1))] if trials else 0,
+            "high": counts[int(0.9 * (trials - 1))] if trials else 0,
+        })
+    return forecast
+
+
+def _simulate_numpy(cards, probs, days, trials, seed) -> list[list[int]]:
+    rng = np.random.default_rng(seed)
+    n = len(cards)
+    card_p = np.array([probs.get(c["id"], probs[0]) for c in cards], dtype=np.float32)
+    card_due = np.array([c["due_day"] for c in cards], dtype=np.int32)
+    card_reps = np.array([c["repetitions"] for c in cards], dtype=np.int32)
+    card_ef = np.array([c["ease_factor"] for c in cards], dtype=np.float64)
+    card_ivl = np.array([c["interval"] for c in cards], dtype=np.int32)
+    # A card's first review falls on the same day, from the same state, in
+    # every trial, so both of its possible outcomes are worked out once.
+    after = {}
+    for rating in (FORGET_RATING, RECALL_RATING):
+        ivl, reps, ef = sm2_update_batch(np.full(n, rating), card_reps, card_ef, card_ivl)
+        after[rating] = (card_due + ivl.astype(np.int32), reps.astype(np.int32), ef, ivl.astype(np.int32))
+    counts = np.zeros((trials, days), dtype=np.int64)
+    counts[:] = np.bincount(card_due, minlength=days)
+    flat_counts = counts.reshape(-1)
+    for start in range(0, trials, TRIAL_CHUNK):
+        chunk = min(TRIAL_CHUNK, trials - start)
+        recalled = rng.random((chunk, n), dtype=np.float32) < card_p
+        next_due = np.where(recalled, after[RECALL_RATING][0], after[FORGET_RATING][0])
+        # Flatten the (trial, card) pairs still due within the horizon; each
+        # evolves independently. ``slot`` is trial * days, so slot + due
+        # indexes the count matrix.
+        pair = np.flatnonzero(next_due < days)
+        trial, card = np.divmod(pair, n)
+        slot = ((trial + start) * days).astype(np.int32)
+        card = card.astype(np.int32)
+        due = next_due.reshape(-1)[pair]
+        rec = recalled.reshape(-1)[pair]
+        reps, ef, ivl = (
+            np.where(rec, recall[card], forget[card])
+            for recall, forget in zip(after[RECALL_RATING][1:], after[FORGET_RATING][1:])
+        )
+        del recalled, next_due
+        while len(due):
+            flat_counts += np.bincount(slot + due, minlength=flat_counts.size)
+            # sm2_update for the two simulated ratings, inlined: a forgotten
+            # card restarts at one day and loses ease, a recalled one keeps
+            # its ease and moves along 1, 6, interval * ease days.
+            rec = rng.random(len(due), dtype=np.float32) < card_p[card]
+            ivl = np.where(rec, np.where(reps > 1, np.rint(ivl * ef).astype(np.int32), np.where(reps == 1, 6, 1)), 1)
+            ef = np.where(rec, ef, np.round(np.maximum(1.3, ef + FORGET_EASE_CHANGE), 2))
+            reps = np.where(rec, reps + 1, 0)
+            due += ivl
+            live = np.flatnonzero(due < days)
+            slot, card, due, reps, ef, ivl = (
+                slot[live], card[live], due[live], reps[live], ef[live], ivl[live],
+            )
+    return counts.tolist()
+
+
+def _simulate_scalar(cards, probs, days, trials, seed, scheduler) -> list[list[int]]:
+    rng = random.Random(seed)
+    today = date.today()
+    per_trial = []
+    for _ in range(trials):
+        counts = [0] * days
+        for card in cards:
+            state = dict(card)
+            due = card["due_day"]
+            p = probs.get(card["id"], probs[0])
+            while due < days:
+                counts[due] += 1
+                rating = RECALL_RATING if rng.random() < p else FORGET_RATING
+                state.update(scheduler.review(state, rating, today + timedelta(days=due)))
+                due += state["interval"]
+        per_trial.append(counts)
+    return per_trial
+
+
+def forecast_reviews(
+    db_path: str, days: int = 30, trials: int = 1000, new_per_day: int = 15, seed: int | None = None,
+    user_id: int = DEFAULT_USER_ID,
+) -> list[dict]:
+    """Project a user's daily review counts for the next ``days`` days.
+
+    Returns one dict per day with ``day``, ``date``, ``expected`` (mean over
+    trials) and a ``low``/``high`` 10th-90th percentile band. SM-2 runs
+    vectorized over all trials and cards when NumPy is installed; other
+    schedulers and NumPy-less installs simulate card by card.
+    """
+    global np
+    if np is NOT_LOADED:
+        np = load_numpy()
+    scheduler = get_scheduler(db_path, user_id)
+    cards = _load_cards(db_path, days, new_per_day, user_id)
+    probs = estimate_recall_probabilities(db_path, user_id)
+    if np is not None and isinstance(scheduler, SM2Scheduler):
+        per_trial = _simulate_numpy(cards, probs, days, trials, seed)
+    else:
+        per_trial = _simulate_scalar(cards, probs, days, trials, seed, scheduler)
+    return _summarize(per_trial, days)
@@ -1,8 +1,40 @@
-"""Smart import for various file formats."""
+"""Smart import for various file formats.
+
+Documents are extracted as a stream of text chunks (a PDF page, or a run of
+paragraphs or lines for other formats) and stored one row per chunk in
+``imported_chunks``, so a very large file imports in bounded memory and can
+be read back a chunk at a time. Large chunks are stored compressed (see
+``gcp_tutor.db.pack_text``); read them with ``unpack_text(text)`` in SQL.
+"""
+import glob
+import hashlib
 import json
+import math
+import os
+import re
+import zipfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
+from html.parser import HTMLParser
 from pathlib import Path
-from gcp_tutor.db import get_connection
+from typing import Callable, Iterable, Iterator
+from xml.etree import ElementTree
+from gcp_tutor.db import apply_pending_search_updates, connect, pack_text
+from gcp_tutor.linking import link_imports
+
+# Files picked up when importing a whole directory.
+IMPORT_SUFFIXES = (".txt", ".md", ".json", ".yaml", ".yml", ".pdf", ".docx", ".html", ".htm")
+IMPORT_BATCH_SIZE = 50
+# Target chunk size for formats without pages; chunks break between lines.
+CHUNK_CHARS = 8000
+# Chunks per INSERT while storing one document.
+CHUNK_BATCH_SIZE = 100
+# import_directory streams files larger than this in the writing process
+# instead of parsing them whole in a worker.
+STREAM_FILE_BYTES = 16 * 1024 * 1024
+READ_BLOCK_CHARS = 64 * 1024
+KNOWN_IMPORTS_QUERY = "SELECT id, domain_id, content_hash, file_mtime_ns, file_size, source_path FROM imported_content"
 
 # Keyword mapping for auto-categorization
 DOMAIN_KEYWORDS = {
@@ -13,57 +45,457 @@ DOMAIN_KEYWORDS = {
     5: ["iam", "service account", "role", "permission", "impersonat", "credential", "access control", "policy binding", "custom role"],
 }
 
+WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
 
-def read_file_content(file_path: str) -> str:
+
+def _read_blocks(path: Path) -> Iterator[str]:
+    with open(path, encoding="utf-8", errors="replace") as f:
+        while block := f.read(READ_BLOCK_CHARS):
+            yield block
+
+
+def _text_chunks(blocks: Iterable[str]) -> Iterator[str]:
+    """Regroup a stream of text into chunks of at most CHUNK_CHARS, ending at a line break where possible."""
+    pending = ""
+    for block in blocks:
+        pending += block
+        while len(pending) >= CHUNK_CHARS:
+            cut = pending.rfind("\n", 0, CHUNK_CHARS) + 1 or CHUNK_CHARS
+            yield pending[:cut]
+            pending = pending[cut:]
+    if pending:
+        yield pending
+
+
+class _HTMLText(HTMLParser):
+    """Collects the text of an HTML document fed to it piece by piece."""
+
+    BLOCK_TAGS = {"p", "div", "section", "article", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "pre", "table"}
+    SKIP_TAGS = {"script", "style"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skipping += 1
+        elif tag == "br":
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skipping = max(0, self._skipping - 1)
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self.parts.append(data)
+
+    def take(self) -> str:
+        text = "".join(self.parts)
+        self.parts.clear()
+        return text
+
+
+def _html_blocks(path: Path) -> Iterator[str]:
+    parser = _HTMLText()
+    for block in _read_blocks(path):
+        parser.feed(block)
+        yield parser.take()
+    parser.close()
+    yield parser.take()
+
+
+def _docx_blocks(path: Path) -> Iterator[str]:
+    """Paragraph text of a .docx, parsed incrementally from its document XML."""
+    with zipfile.ZipFile(path) as archive, archive.open("word/document.xml") as xml:
+        body = None
+        for event, elem in ElementTree.iterparse(xml, events=("start", "end")):
+            if event == "start":
+                if elem.tag == f"{WORD_NS}body":
+                    body = elem
+                continue
+            if elem.tag == f"{WORD_NS}p":
+                yield "".join(t.text or "" for t in elem.iter(f"{WORD_NS}t")) + "\n"
+            if body is not None and len(body) and body[-1] is elem:
+                body.clear()  # finished top-level paragraph or table
+
+
+def _pdf_pages(path: Path) -> Iterator[str]:
+    from PyPDF2 import PdfReader
+    # An open file, not the path: given a path, PdfReader reads the whole file into memory.
+    with open(path, "rb") as f:
+        reader = PdfReader(f)
+        for page in reader.pages:
+            yield (page.extract_text() or "") + "\n"
+
+
+def iter_file_chunks(file_path: str) -> Iterator[str]:
+    """Yield the text of a file in chunks: one per PDF page, about CHUNK_CHARS otherwise.
+
+    Text, Markdown, HTML, PDF and DOCX files are read incrementally. JSON and
+    YAML are parsed whole, then chunked.
+    """
     path = Path(file_path)
     suffix = path.suffix.lower()
 
-    if suffix in (".txt", ".md"):
-        return path.read_text()
-    elif suffix == ".json":
+    if suffix == ".json":
         data = json.loads(path.read_text())
-        return json.dumps(data, indent=2) if isinstance(data, dict) else str(data)
+        yield from _text_chunks([json.dumps(data, indent=2) if isinstance(data, dict) else str(data)])
     elif suffix in (".yaml", ".yml"):
         import yaml
-        data = yaml.safe_load(path.read_text())
-        return str(data)
+        yield from _text_chunks([str(yaml.safe_load(path.read_text()))])
     elif suffix == ".pdf":
-        from PyPDF2 import PdfReader
-        reader = PdfReader(file_path)
-        return "\n".join(page.extract_text() or "" for page in reader.pages)
+        yield from _pdf_pages(path)
     elif suffix == ".docx":
-        from docx import Document
-        doc = Document(file_path)
-        return "\n".join(p.text for p in doc.paragraphs)
+        yield from _text_chunks(_docx_blocks(path))
     elif suffix in (".html", ".htm"):
-        from bs4 import BeautifulSoup
-        html = path.read_text()
-        return BeautifulSoup(html, "html.parser").get_text()
+        yield from _text_chunks(_html_blocks(path))
     else:
-        # Try reading as plain text
-        return path.read_text()
+        # .txt, .md, and anything else read as plain text
+        yield from _text_chunks(_read_blocks(path))
+
+
+def read_file_content(file_path: str) -> str:
+    """The whole text of a file. Prefer ``iter_file_chunks`` for large files."""
+    return "".join(iter_file_chunks(file_path))
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """A regex matching any of ``words``, nested by shared prefix ("cloud (?:dns|nat|run|sql)")."""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def branch(node: dict) -> str:
+        alternatives = [re.escape(char) + branch(child) for char, child in sorted(node.items()) if char]
+        if not alternatives:
+            return ""
+        pattern = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+        # greedy optional: a keyword ending here yields to a longer one that continues
+        return f"(?:{pattern})?" if "" in node else pattern
+
+    return branch(trie)
+
+
+class KeywordClassifier:
+    """Scores text against domain keywords.
+
+    Keywords match at the start of a word ("roles" counts as "role", "william"
+    does not count as "iam"); an occurrence inside a longer keyword ("role" in
+    "custom role") counts only for the longer one. Each keyword contributes
+    ``1 + ln(count)`` to its domain, so repetition raises a score without
+    letting one word swamp many distinct ones.
+
+    Counting is one regex scan: every keyword sits in a single alternation,
+    nested by shared prefix, after the non-word character that starts a word.
+    Leading with that character lets the regex engine skip ahead to word
+    breaks instead of trying each position, and each match is the keyword
+    itself, which ``domains`` maps to its domain.
+    """
+
+    def __init__(self, keywords: dict[int, list[str]]):
+        self.domains = {keyword: domain_id for domain_id, words in keywords.items() for keyword in words}
+        self.domain_ids = list(keywords)
+        self.pattern = re.compile(r"\W(" + _trie_pattern(self.domains) + ")")
+
+    def count(self, text: str) -> Counter:
+        """Occurrences of each keyword in ``text``."""
+        return Counter(self.pattern.findall(" " + text.lower()))
+
+    def scores(self, counts: Counter) -> dict[int, float]:
+        """Per-domain confidence in [0, 1] summing to 1; empty when nothing matched."""
+        scores = dict.fromkeys(self.domain_ids, 0.0)
+        for keyword, count in counts.items():
+            scores[self.domains[keyword]] += 1 + math.log(count)
+        total = sum(scores.values())
+        return {domain_id: score / total for domain_id, score in scores.items() if score} if total else {}
+
+
+CLASSIFIER = KeywordClassifier(DOMAIN_KEYWORDS)
+
+
+class KeywordCategorizer:
+    """Domain keyword matching over text that arrives in chunks."""
+
+    def __init__(self, classifier: KeywordClassifier = CLASSIFIER):
+        self.classifier = classifier
+        self.counts = Counter()
+
+    def feed(self, text: str) -> None:
+        self.counts.update(self.classifier.count(text))
+
+    @property
+    def scores(self) -> dict[int, float]:
+        return self.classifier.scores(self.counts)
+
+    @property
+    def domain_id(self) -> int | None:
+        """The highest-scoring domain (lowest id on a tie), or None if nothing matched."""
+        scores = self.scores
+        return max(scores, key=scores.get) if scores else None
+
+
+def classify_content(text: str) -> dict[int, float]:
+    """Per-domain confidence scores for ``text``, highest first."""
+    categorizer = KeywordCategorizer()
+    categorizer.feed(text)
+    return dict(sorted(categorizer.scores.items(), key=lambda item: -item[1]))
 
 
 def categorize_content(text: str) -> int | None:
     """Auto-categorize content into a domain by keyword matching. Returns domain_id or None."""
-    text_lower = text.lower()
-    scores = {}
-    for domain_id, keywords in DOMAIN_KEYWORDS.items():
-        scores[domain_id] = sum(1 for kw in keywords if kw in text_lower)
-    best = max(scores, key=scores.get)
-    return best if scores[best] > 0 else None
+    categorizer = KeywordCategorizer()
+    categorizer.feed(text)
+    return categorizer.domain_id
+
+
+def _file_source(path: Path) -> dict:
+    """Where a file lives and its size and mtime, taken before its content is read."""
+    stat = path.stat()
+    return {"path": str(path.resolve()), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _file_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _unchanged(known, item: dict) -> dict | None:
+    """The skip result for ``item`` if ``known`` (a KNOWN_IMPORTS_QUERY row) has the same size and mtime."""
+    if known is None or (known["file_mtime_ns"], known["file_size"]) != (item["mtime_ns"], item["size"]):
+        return None
+    return {"id": known["id"], "filename": item["filename"], "domain_id": known["domain_id"], "status": "unchanged"}
+
+
+def _store_import(conn, item: dict, imported_at: str) -> dict:
+    """Store one file (see import_file) on ``conn``, categorizing as its chunks stream past.
+
+    ``item`` has filename, path, mtime_ns, size, hash, domain_id and chunks;
+    the chunks are only consumed when the content is new or changed.
+    """
+    filename, domain_id = item["filename"], item["domain_id"]
+    source = (item["hash"], item["mtime_ns"], item["size"])
+    known = conn.execute(
+        "SELECT id, domain_id, content_hash FROM imported_content WHERE source_path = ?", (item["path"],)
+    ).fetchone()
+    if known is not None and known["content_hash"] == item["hash"]:
+        conn.execute(
+            "UPDATE imported_content SET file_mtime_ns = ?, file_size = ? WHERE id = ?", (*source[1:], known["id"])
+        )
+        return {"id": known["id"], "filename": filename, "domain_id": known["domain_id"], "status": "unchanged"}
+    if known is None:
+        duplicate = conn.execute(
+            "SELECT id, domain_id FROM imported_content WHERE content_hash = ? LIMIT 1", (item["hash"],)
+        ).fetchone()
+        if duplicate is not None:
+            return {"id": duplicate["id"], "filename": filename, "domain_id": duplicate["domain_id"], "status": "duplicate"}
+        status = "new"
+        import_id = conn.execute(
+            """INSERT INTO imported_content
+               (filename, domain_id, imported_at, source_path, content_hash, file_mtime_ns, file_size)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (filename, domain_id, imported_at, item["path"], *source),
+        ).lastrowid
+    else:
+        status, import_id = "updated", known["id"]
+        conn.execute("DELETE FROM imported_chunks WHERE import_id = ?", (import_id,))
+        conn.execute(
+            """UPDATE imported_content SET filename = ?, domain_id = ?, imported_at = ?,
+               content_hash = ?, file_mtime_ns = ?, file_size = ? WHERE id = ?""",
+            (filename, domain_id, imported_at, *source, import_id),
+        )
+    categorizer = KeywordCategorizer() if domain_id is None else None
+    rows, seq, length = [], 0, 0
+    for chunk in item["chunks"]:
+        if not chunk.strip():
+            continue
+        if categorizer is not None:
+            categorizer.feed(chunk)
+        rows.append((import_id, seq, pack_text(chunk)))
+        seq += 1
+        length += len(chunk)
+        if len(rows) >= CHUNK_BATCH_SIZE:
+            conn.executemany("INSERT INTO imported_chunks (import_id, seq, text) VALUES (?, ?, ?)", rows)
+            apply_pending_search_updates(conn)
+            rows.clear()
+    conn.executemany("INSERT INTO imported_chunks (import_id, seq, text) VALUES (?, ?, ?)", rows)
+    apply_pending_search_updates(conn)
+    if categorizer is not None:
+        domain_id = categorizer.domain_id
+        conn.execute("UPDATE imported_content SET domain_id = ? WHERE id = ?", (domain_id, import_id))
+    return {"id": import_id, "filename": filename, "domain_id": domain_id, "length": length, "chunks": seq, "status": status}
+
+
+def _insert_imports(db_path: str, imports: list[dict]) -> list[dict]:
+    """Store parsed files (see _store_import) in one transaction."""
+    imported_at = datetime.now().isoformat()
+    with connect(db_path) as conn:
+        return [_store_import(conn, item, imported_at) for item in imports]
 
 
 def import_file(db_path: str, file_path: str, domain_id: int | None = None) -> dict:
-    """Import a file into the database. Auto-categorizes if domain_id not provided."""
-    content = read_file_content(file_path)
-    if domain_id is None:
-        domain_id = categorize_content(content)
-    conn = get_connection(db_path)
-    conn.execute(
-        "INSERT INTO imported_content (filename, domain_id, content_text, imported_at) VALUES (?, ?, ?, ?)",
-        (Path(file_path).name, domain_id, content, datetime.now().isoformat()),
-    )
-    conn.commit()
-    conn.close()
-    return {"filename": Path(file_path).name, "domain_id": domain_id, "length": len(content)}
+    """Import a file into the database. Auto-categorizes if domain_id not provided.
+
+    The file is streamed into the database chunk by chunk. Each import
+    remembers the file's path, size, mtime and SHA-256, so importing the same
+    path again is cheap:
+
+    - same size and mtime: skipped without opening the file ("unchanged")
+    - same content hash: only the stored size and mtime are refreshed ("unchanged")
+    - otherwise the previous import's chunks are replaced, keeping its id ("updated")
+
+    A new path whose content matches an existing import is not stored again
+    ("duplicate", with that import's id). The result's "status" is one of
+    these or "new"; "length" and "chunks" are only present when text was
+    stored, in which case its passages are linked to subtopics.
+    """
+    path = Path(file_path)
+    item = {"filename": path.name, "domain_id": domain_id, **_file_source(path)}
+    with connect(db_path) as conn:
+        known = conn.execute(KNOWN_IMPORTS_QUERY + " WHERE source_path = ?", (item["path"],)).fetchone()
+    skipped = _unchanged(known, item)
+    if skipped is not None:
+        return skipped
+    item.update(hash=_file_hash(item["path"]), chunks=iter_file_chunks(file_path))
+    result = _insert_imports(db_path, [item])[0]
+    if "chunks" in result:
+        link_imports(db_path, [result["id"]])
+    return result
+
+
+def iter_import_chunks(db_path: str, import_id: int) -> Iterator[str]:
+    """Yield an imported document's text chunk by chunk, reading one row at a time."""
+    seq = 0
+    while True:
+        with connect(db_path) as conn:
+            row = conn.execute(
+                "SELECT unpack_text(text) FROM imported_chunks WHERE import_id = ? AND seq = ?", (import_id, seq)
+            ).fetchone()
+        if row is None:
+            return
+        yield row[0]
+        seq += 1
+
+
+def find_import_files(source: str) -> list[Path]:
+    """Files to import from ``source``: a directory (searched recursively) or a glob pattern."""
+    if Path(source).is_dir():
+        paths = (p for p in Path(source).rglob("*") if p.suffix.lower() in IMPORT_SUFFIXES)
+    else:
+        paths = (Path(p) for p in glob.glob(source, recursive=True))
+    return sorted(p for p in paths if p.is_file())
+
+
+def _parse_file(item: dict, known_hash: str | None = None) -> dict:
+    """Hash, extract and categorize one file. Runs in a worker process; never raises.
+
+    Extraction is skipped when the hash equals ``known_hash``.
+    """
+    try:
+        item = dict(item, hash=_file_hash(item["path"]))
+        if item["hash"] == known_hash:
+            return dict(item, chunks=())
+        chunks = list(iter_file_chunks(item["path"]))
+    except Exception as e:
+        return {"filename": item["filename"], "error": f"{type(e).__name__}: {e}"}
+    if item["domain_id"] is None:
+        categorizer = KeywordCategorizer()
+        for chunk in chunks:
+            categorizer.feed(chunk)
+        item["domain_id"] = categorizer.domain_id
+    return dict(item, chunks=chunks)
+
+
+def import_directory(
+    db_path: str, source: str, domain_id: int | None = None, workers: int | None = None,
+    batch_size: int = IMPORT_BATCH_SIZE, progress: Callable[[dict], None] | None = None,
+) -> dict:
+    """Import every file under a directory or matching a glob pattern.
+
+    Files already imported from the same path with the same size and mtime
+    are skipped after a stat, and changed files replace their previous
+    import (see import_file), so re-importing a folder only parses what
+    changed. The rest are parsed in a pool of ``workers`` processes (default:
+    one per CPU), since PDF, DOCX and HTML extraction is CPU-bound. This
+    process is the only writer and stores results ``batch_size`` files per
+    transaction. Files over STREAM_FILE_BYTES are streamed straight into the
+    database by this process afterwards, one at a time, to keep memory
+    bounded. A file that fails to parse is reported and skipped. ``progress``
+    is called with each file's result as it finishes.
+
+    Once everything is stored, the new and changed files are linked to
+    subtopics (see gcp_tutor.linking). Files are stored under their path
+    relative to a ``source`` directory.
+    Returns {"imported": [{"id", "filename", "domain_id", "length", "chunks", "status"}, ...],
+    "skipped": [{"id", "filename", "domain_id", "status"}, ...], "errors": [{"filename", "error"}, ...]}.
+    """
+    imported, skipped, errors, batch = [], [], [], []
+
+    def report(result: dict) -> None:
+        if "error" in result:
+            errors.append(result)
+        else:
+            (imported if "chunks" in result else skipped).append(result)
+        if progress is not None:
+            progress(result)
+
+    with connect(db_path) as conn:
+        known = {row["source_path"]: row for row in conn.execute(KNOWN_IMPORTS_QUERY + " WHERE source_path IS NOT NULL")}
+    base = Path(source) if Path(source).is_dir() else None
+    jobs, large = [], []
+    for path in find_import_files(source):
+        filename = str(path.relative_to(base)) if base else path.name
+        item = {"filename": filename, "domain_id": domain_id, **_file_source(path)}
+        row = known.get(item["path"])
+        unchanged = _unchanged(row, item)
+        if unchanged is not None:
+            report(unchanged)
+            continue
+        job = (item, row["content_hash"] if row is not None else None)
+        (large if item["size"] > STREAM_FILE_BYTES else jobs).append(job)
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+
+    def flush() -> None:
+        for result in _insert_imports(db_path, batch):
+            report(result)
+        batch.clear()
+
+    def collect(result: dict) -> None:
+        if "error" in result:
+            report(result)
+            return
+        batch.append(result)
+        if len(batch) >= batch_size:
+            flush()
+
+    if workers <= 1:
+        for job in jobs:
+            collect(_parse_file(*job))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_parse_file, *job): job[0]["filename"] for job in jobs}
+            for future in as_completed(futures):
+                filename = futures.pop(future)  # drop the future so its text can be freed once stored
+                try:
+                    result = future.result()
+                except Exception as e:  # the worker itself died, e.g. out of memory
+                    result = {"filename": filename, "error": f"{type(e).__name__}: {e}"}
+                collect(result)
+    flush()
+    for item, _known_hash in large:
+        try:
+            item = dict(item, hash=_file_hash(item["path"]), chunks=iter_file_chunks(item["path"]))
+            with connect(db_path) as conn:
+                result = _store_import(conn, item, datetime.now().isoformat())
+        except Exception as e:
+            result = {"filename": item["filename"], "error": f"{type(e).__name__}: {e}"}
+        report(result)
+    link_imports(db_path, [result["id"] for result in imported])
+    return {"imported": imported, "skipped": skipped, "errors": errors}
@@ -0,0 +1,263 @@
+"""Links from imported notes to the exam subtopics they cover.
+
+Imported text is cut into passages of one or a few paragraphs (see
+split_passages), and every passage is compared with every subtopic by TF-IDF
+cosine similarity. A subtopic's document is its name and description plus the
+flashcards and question stems filed under it. The best LINKS_PER_PASSAGE
+subtopics of each passage are stored in ``imported_passage_links`` as offsets
+into ``imported_chunks``, so a learner's notes on a subtopic are one indexed
+lookup (get_subtopic_notes). With NumPy installed a batch of passages is
+scored in one matrix product; without it, through the index's postings.
+
+Imports are linked as they are stored. Notes imported before linking
+existed, or after the content has changed, can be (re)linked with
+``link_imports(db_path)``.
+"""
+import math
+import re
+import threading
+from collections import Counter
+from typing import Iterable, Iterator
+
+from gcp_tutor.db import CONTENT_VERSION_QUERY, DEFAULT_DB_PATH, connect
+from gcp_tutor.sm2 import NOT_LOADED, load_numpy
+
+np = NOT_LOADED  # set by the first SubtopicIndex; None without NumPy
+
+# Passages are runs of whole paragraphs up to this many characters.
+PASSAGE_CHARS = 1200
+LINKS_PER_PASSAGE = 3
+# Cosine similarity below which a passage is not linked to a subtopic.
+MIN_LINK_SCORE = 0.1
+# Passages scored per matrix product.
+LINK_BATCH_SIZE = 256
+
+WORD = re.compile(r"[a-z][a-z0-9]+")
+STOPWORDS = frozenset(
+    """about after all also an and any are as at be been but by can do does each for from has have how if in
+    into is it its may more most must no not of on one only or other should so such than that the their them
+    then there these they this to use used uses using what when where which while who will with would you your""".split()
+)
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+LINE_BREAK = re.compile(r"\n|(?<=[.!?])\s")
+
+# db_path -> (CONTENT_VERSION_QUERY row when built, index)
+_indexes: dict[str, tuple[tuple, "SubtopicIndex"]] = {}
+_indexes_lock = threading.Lock()
+
+
+def clear_subtopic_indexes() -> None:
+    """Drop all cached subtopic indexes (they rebuild on next use)."""
+    with _indexes_lock:
+        _indexes.clear()
+
+
+def terms(text: str) -> list[str]:
+    """Lowercased words of ``text`` without stopwords, with a plural "s" dropped."""
+    return [
+        word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+        for word in WORD.findall(text.lower())
+        if word not in STOPWORDS
+    ]
+
+
+def _last_break(pattern: re.Pattern, text: str, min_end: int) -> int | None:
+    end = None
+    for match in pattern.finditer(text, min_end):
+        end = match.end()
+    return end
+
+
+def split_passages(text: str, size: int = PASSAGE_CHARS) -> Iterator[tuple[int, int]]:
+    """Yield (start, end) offsets of the passages in ``text``.
+
+    A passage ends at the last paragraph break within ``size`` characters,
+    else at the last line or sentence end, else at the last space. Breaks in
+    the first quarter are ignored so passages do not get too short.
+    Surrounding whitespace is trimmed and empty passages are skipped.
+    """
+    start = 0
+    while start < len(text):
+        end = len(text)
+        if end - start > size:
+            window = text[start:start + size]
+            cut = (
+                _last_break(PARAGRAPH_BREAK, window, size // 4)
+                or _last_break(LINE_BREAK, window, size // 4)
+                or window.rfind(" ", size // 4) + 1
+                or size
+            )
+            end = start + cut
+        passage = text[start:end]
+        stripped = passage.strip()
+        if stripped:
+            first = start + len(passage) - len(passage.lstrip())
+            yield first, first + len(stripped)
+        start = end
+
+
+class SubtopicIndex:
+    """L2-normalized TF-IDF vectors of subtopic documents.
+
+    Term weights are ``(1 + ln tf) * idf`` with smoothed
+    ``idf = ln((1 + n) / (1 + df)) + 1``; passages are weighted with the same
+    idf, and terms no subtopic uses are ignored.
+    """
+
+    def __init__(self, documents: dict[int, str]):
+        global np
+        if np is NOT_LOADED:
+            np = load_numpy()
+        self.subtopic_ids = list(documents)
+        counts = [Counter(terms(document)) for document in documents.values()]
+        document_frequency = Counter(term for count in counts for term in count)
+        n = len(counts)
+        self.idf = {term: math.log((1 + n) / (1 + df)) + 1 for term, df in document_frequency.items()}
+        self.columns = {term: column for column, term in enumerate(self.idf)}
+        self.postings: dict[str, list[tuple[int, float]]] = {}
+        for row, count in enumerate(counts):
+            for term, weight in self.weights(count).items():
+                self.postings.setdefault(term, []).append((row, weight))
+        self.matrix = None
+        if np is not None:
+            self.matrix = np.zeros((len(self.columns), n))
+            for term, postings in self.postings.items():
+                rows, weights = zip(*postings)
+                self.matrix[self.columns[term], list(rows)] = weights
+
+    def weights(self, count: Counter) -> dict[str, float]:
+        """The unit TF-IDF vector for term counts ``count``, as {term: weight}."""
+        weights = {term: (1 + math.log(n)) * self.idf[term] for term, n in count.items() if term in self.idf}
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        return {term: weight / norm for term, weight in weights.items()} if norm else {}
+
+    def best(
+        self, texts: list[str], k: int = LINKS_PER_PASSAGE, min_score: float = MIN_LINK_SCORE,
+    ) -> list[list[tuple[int, float]]]:
+        """For each text, its top ``k`` (subtopic_id, cosine) pairs scoring at least ``min_score``."""
+        vectors = [self.weights(Counter(terms(text))) for text in texts]
+        if self.matrix is not None:
+            return self._best_numpy(vectors, k, min_score)
+        results = []
+        for vector in vectors:
+            scores = Counter()
+            for term, weight in vector.items():
+                for row, subtopic_weight in self.postings[term]:
+                    scores[row] += weight * subtopic_weight
+            results.append([
+                (self.subtopic_ids[row], score) for row, score in scores.most_common(k) if score >= min_score
+            ])
+        return results
+
+    def _best_numpy(self, vectors: list[dict[str, float]], k: int, min_score: float) -> list:
+        passages = np.zeros((len(vectors), len(self.columns)))
+        rows = [row for row, vector in enumerate(vectors) for _ in vector]
+        columns = [self.columns[term] for vector in vectors for term in vector]
+        passages[rows, columns] = [weight for vector in vectors for weight in vector.values()]
+        scores = passages @ self.matrix
+        top = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+        return [
+            [(self.subtopic_ids[column], float(row_scores[column])) for column in best if row_scores[column] >= min_score]
+            for best, row_scores in zip(top.tolist(), scores)
+        ]
+
+
+def subtopic_documents(conn) -> dict[int, str]:
+    """Each subtopic's name and description, flashcards and question stems, as one text."""
+    parts = {
+        row[0]: [row[1], row[2] or ""] for row in conn.execute("SELECT id, name, description FROM subtopics ORDER BY id")
+    }
+    for subtopic_id, text in conn.execute(
+        """SELECT subtopic_id, front || ' ' || back FROM flashcards WHERE subtopic_id IS NOT NULL AND NOT retired
+           UNION ALL
+           SELECT subtopic_id, stem FROM quiz_questions WHERE subtopic_id IS NOT NULL AND NOT retired"""
+    ):
+        if subtopic_id in parts:
+            parts[subtopic_id].append(text)
+    return {subtopic_id: "\n".join(texts) for subtopic_id, texts in parts.items()}
+
+
+def subtopic_index(conn, db_path: str) -> SubtopicIndex:
+    """The cached index for ``db_path``, rebuilt when its content has changed."""
+    version = tuple(conn.execute(CONTENT_VERSION_QUERY).fetchone())
+    with _indexes_lock:
+        cached = _indexes.get(db_path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    index = SubtopicIndex(subtopic_documents(conn))
+    with _indexes_lock:
+        _indexes[db_path] = (version, index)
+    return index
+
+
+def link_imports(db_path: str = DEFAULT_DB_PATH, import_ids: Iterable[int] | None = None) -> int:
+    """Link the passages of the given imports (default: all) to subtopics.
+
+    Replaces any earlier links of those imports. Returns the number of links stored.
+    """
+    stored = 0
+    with connect(db_path) as conn:
+        index = subtopic_index(conn, db_path)
+        if import_ids is None:
+            import_ids = [row[0] for row in conn.execute("SELECT id FROM imported_content ORDER BY id")]
+        batch: list[tuple[int, int, int, str]] = []
+
+        def flush() -> int:
+            links = [
+                (chunk_id, start, end - start, subtopic_id, score)
+                for (chunk_id, start, end, _text), best in zip(batch, index.best([item[3] for item in batch]))
+                for subtopic_id, score in best
+            ]
+            conn.executemany(
+                """INSERT INTO imported_passage_links (chunk_id, start, length, subtopic_id, score)
+                   VALUES (?, ?, ?, ?, ?)""",
+                links,
+            )
+            batch.clear()
+            return len(links)
+
+        for import_id in import_ids:
+            conn.execute(
+                """DELETE FROM imported_passage_links
+                   WHERE chunk_id IN (SELECT id FROM imported_chunks WHERE import_id = ?)""",
+                (import_id,),
+            )
+            chunks = conn.execute(
+                "SELECT id, unpack_text(text) FROM imported_chunks WHERE import_id = ? ORDER BY seq", (import_id,)
+            )
+            for chunk_id, text in chunks:
+                for start, end in split_passages(text, PASSAGE_CHARS):
+                    batch.append((chunk_id, start, end, text[start:end]))
+                    if len(batch) >= LINK_BATCH_SIZE:
+                        stored += flush()
+        stored += flush()
+    return stored
+
+
+def get_subtopic_notes(db_path: str, subtopic_ids: Iterable[int], limit: int = 2) -> dict[int, list[dict]]:
+    """The learner's best-matching imported passages for each subtopic, best first.
+
+    Returns {subtopic_id: [{"import_id", "filename", "part", "text", "score"}, ...]},
+    with an entry for every requested subtopic.
+    """
+    notes = {}
+    with connect(db_path) as conn:
+        for subtopic_id in subtopic_ids:
+            rows = conn.execute(
+                """SELECT c.import_id, i.filename, c.seq, substr(unpack_text(c.text), l.start + 1, l.length) AS text, l.score
+                   FROM imported_passage_links l
+                   JOIN imported_chunks c ON c.id = l.chunk_id
+                   JOIN imported_content i ON i.id = c.import_id
+                   WHERE l.subtopic_id = ?
+                   ORDER BY l.score DESC
+                   LIMIT ?""",
+                (subtopic_id, limit),
+            ).fetchall()
+            notes[subtopic_id] = [
+                {
+                    "import_id": r["import_id"], "filename": r["filename"], "part": r["seq"],
+                    "text": r["text"], "score": r["score"],
+                }
+                for r in rows
+            ]
+    return notes
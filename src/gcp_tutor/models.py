@@ -28,10 +28,20 @@ class Flashcard:
     back: str
     subtopic_id: Optional[int] = None
     source: str = "seeded"
+
+
+@dataclass
+class CardState:
+    user_id: int
+    flashcard_id: int
+    domain_id: int
     ease_factor: float = 2.5
     interval: int = 0
     repetitions: int = 0
     next_review: Optional[str] = None
+    stability: Optional[float] = None
+    difficulty: Optional[float] = None
+    retired: bool = False
 
 
 @dataclass
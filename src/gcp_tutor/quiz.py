@@ -1,74 +1,75 @@
 """Quiz engine for practice questions."""
 from datetime import datetime
-from gcp_tutor.db import get_connection
+from gcp_tutor.cache import cached
+from gcp_tutor.db import DEFAULT_USER_ID, connect
+from gcp_tutor.sampling import make_rng, sample_rows
 
 
-def get_quiz_questions(db_path: str, count: int = 10) -> list:
-    conn = get_connection(db_path)
-    questions = conn.execute(
-        "SELECT * FROM quiz_questions ORDER BY RANDOM() LIMIT ?", (count,)
-    ).fetchall()
-    conn.close()
-    return questions
+def get_quiz_questions(db_path: str, count: int = 10, seed: int | None = None) -> list:
+    with connect(db_path) as conn:
+        return sample_rows(conn, db_path, "quiz_questions", count, make_rng(seed))
 
 
-def get_questions_for_domain(db_path: str, domain_id: int, count: int = 10) -> list:
-    conn = get_connection(db_path)
-    questions = conn.execute(
-        "SELECT * FROM quiz_questions WHERE domain_id = ? ORDER BY RANDOM() LIMIT ?",
-        (domain_id, count),
-    ).fetchall()
-    conn.close()
-    return questions
+def get_questions_for_domain(db_path: str, domain_id: int, count: int = 10, seed: int | None = None) -> list:
+    with connect(db_path) as conn:
+        return sample_rows(
+            conn, db_path, "quiz_questions", count, make_rng(seed), column="domain_id", value=domain_id,
+        )
 
 
-def get_questions_for_subtopic(db_path: str, subtopic_id: int, count: int = 10) -> list:
-    conn = get_connection(db_path)
-    questions = conn.execute(
-        "SELECT * FROM quiz_questions WHERE subtopic_id = ? ORDER BY RANDOM() LIMIT ?",
-        (subtopic_id, count),
-    ).fetchall()
-    conn.close()
-    return questions
+def get_questions_for_subtopic(db_path: str, subtopic_id: int, count: int = 10, seed: int | None = None) -> list:
+    with connect(db_path) as conn:
+        return sample_rows(
+            conn, db_path, "quiz_questions", count, make_rng(seed), column="subtopic_id", value=subtopic_id,
+        )
 
 
-def record_quiz_answer(db_path: str, question_id: int, user_answer: str) -> bool:
-    conn = get_connection(db_path)
-    question = conn.execute(
-        "SELECT correct_answer FROM quiz_questions WHERE id = ?", (question_id,)
-    ).fetchone()
-    is_correct = user_answer.lower().strip() == question["correct_answer"].lower().strip()
-    conn.execute(
-        "INSERT INTO quiz_results (quiz_question_id, user_answer, is_correct, answered_at) VALUES (?, ?, ?, ?)",
-        (question_id, user_answer, int(is_correct), datetime.now().isoformat()),
-    )
-    conn.commit()
-    conn.close()
+def is_correct_answer(user_answer: str, correct_answer: str) -> bool:
+    return user_answer.lower().strip() == correct_answer.lower().strip()
+
+
+def record_quiz_answer(
+    db_path: str, question_id: int, user_answer: str, answered_at: str | None = None,
+    user_id: int = DEFAULT_USER_ID,
+) -> bool:
+    with connect(db_path) as conn:
+        question = conn.execute(
+            "SELECT correct_answer FROM quiz_questions WHERE id = ?", (question_id,)
+        ).fetchone()
+        is_correct = is_correct_answer(user_answer, question["correct_answer"])
+        conn.execute(
+            """INSERT INTO quiz_results (user_id, quiz_question_id, user_answer, is_correct, answered_at)
+            VALUES (?, ?, ?, ?, ?)""",
+            (user_id, question_id, user_answer, int(is_correct), answered_at or datetime.now().isoformat()),
+        )
     return is_correct
 
 
-def get_quiz_score(db_path: str) -> float:
+@cached
+def get_quiz_score(db_path: str, user_id: int = DEFAULT_USER_ID) -> float:
     """Overall quiz score as percentage."""
-    conn = get_connection(db_path)
-    row = conn.execute(
-        "SELECT COUNT(*) as total, SUM(is_correct) as correct FROM quiz_results"
-    ).fetchone()
-    conn.close()
-    if row["total"] == 0:
+    with connect(db_path) as conn:
+        row = conn.execute(
+            "SELECT SUM(attempts) as total, SUM(correct) as correct FROM quiz_score_totals WHERE user_id = ?",
+            (user_id,),
+        ).fetchone()
+    if not row["total"]:
         return 0.0
     return round((row["correct"] / row["total"]) * 100, 1)
 
 
-def get_domain_quiz_scores(db_path: str) -> dict:
+@cached
+def get_domain_quiz_scores(db_path: str, user_id: int = DEFAULT_USER_ID) -> dict:
     """Quiz scores broken down by domain."""
-    conn = get_connection(db_path)
-    rows = conn.execute(
-        """SELECT q.domain_id, COUNT(*) as total, SUM(r.is_correct) as correct
-        FROM quiz_results r
-        JOIN quiz_questions q ON r.quiz_question_id = q.id
-        GROUP BY q.domain_id"""
-    ).fetchall()
-    conn.close()
+    with connect(db_path) as conn:
+        rows = conn.execute(
+            """SELECT domain_id, SUM(attempts) as total, SUM(correct) as correct
+            FROM quiz_score_totals
+            WHERE user_id = ?
+            GROUP BY domain_id
+            HAVING total > 0""",
+            (user_id,),
+        ).fetchall()
     return {
         row["domain_id"]: round((row["correct"] / row["total"]) * 100, 1)
         for row in rows
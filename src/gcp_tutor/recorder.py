@@ -0,0 +1,235 @@
+"""Write-behind buffering for flashcard ratings and quiz answers.
+
+A ``ResultRecorder`` keeps results in memory and applies them to the
+database in a single transaction, instead of committing once per keypress.
+Every result is first appended to a small per-process journal file next to
+the database and synced to disk, so neither an application crash nor a
+power loss or OS crash loses anything: ``replay_journals()``
+applies any leftover entries on the next start. Entries for a card or
+question that has since been retired or removed are skipped with a warning.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+from gcp_tutor.db import DEFAULT_USER_ID, connect
+from gcp_tutor.flashcards import record_flashcard_result
+from gcp_tutor.quiz import is_correct_answer, record_quiz_answer
+from gcp_tutor.study import record_session_item
+
+JOURNAL_SUFFIX = ".journal"
+
+logger = logging.getLogger(__name__)
+
+
+def _journal_glob(db_path: str) -> list[Path]:
+    path = Path(db_path)
+    return sorted(path.parent.glob(f"{path.name}{JOURNAL_SUFFIX}.*"))
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def _item_exists(conn, entry: dict, user_id: int) -> bool:
+    """Whether the entry's card (with the user's state for it) or question can still take results."""
+    if entry["kind"] == "flashcard":
+        row = conn.execute(
+            """SELECT 1 FROM flashcards f JOIN card_state s ON s.flashcard_id = f.id AND s.user_id = ?
+               WHERE f.id = ? AND NOT f.retired""",
+            (user_id, entry["item_id"]),
+        ).fetchone()
+    else:
+        row = conn.execute(
+            "SELECT 1 FROM quiz_questions WHERE id = ? AND NOT retired", (entry["item_id"],)
+        ).fetchone()
+    return row is not None
+
+
+def _apply_entry(db_path: str, entry: dict) -> bool:
+    """Write one journal entry through the regular recording functions.
+
+    Returns False, writing nothing, if its card or question no longer exists.
+    """
+    user_id = entry.get("user_id", DEFAULT_USER_ID)
+    with connect(db_path) as conn:
+        if not _item_exists(conn, entry, user_id):
+            logger.warning("Skipping %s result for retired or missing item %s", entry["kind"], entry["item_id"])
+            return False
+    if entry["kind"] == "flashcard":
+        record_flashcard_result(
+            db_path, entry["item_id"], entry["rating"],
+            reviewed_on=date.fromisoformat(entry["at"][:10]), user_id=user_id,
+        )
+        component = "flashcard"
+    else:
+        record_quiz_answer(db_path, entry["item_id"], entry["answer"], answered_at=entry["at"], user_id=user_id)
+        component = "quiz"
+    if entry.get("session_day") is not None:
+        record_session_item(db_path, entry["session_day"], component, entry["item_id"], user_id=user_id)
+    return True
+
+
+def _write_batch(db_path: str, journal: str, entries: list[dict]) -> int:
+    """Apply ``entries`` and advance the journal's high-water mark atomically.
+
+    Returns the number of entries applied (see _apply_entry).
+    """
+    with connect(db_path) as conn:
+        applied = sum(_apply_entry(db_path, entry) for entry in entries)
+        conn.execute(
+            """INSERT INTO journal_state (journal, flushed_through) VALUES (?, ?)
+            ON CONFLICT(journal) DO UPDATE SET flushed_through = excluded.flushed_through""",
+            (journal, entries[-1]["seq"]),
+        )
+    return applied
+
+
+class ResultRecorder:
+    """Buffer results and write them in one transaction.
+
+    Pending results are flushed when ``flush_every`` items have accumulated,
+    ``flush_interval`` seconds after the first of them arrived (by a timer
+    thread, so a learner pausing mid-session does not hold them back), on
+    ``flush()``, and when the recorder is closed. Use it as a context manager
+    so the final flush happens on any exit path.
+    """
+
+    def __init__(
+        self, db_path: str, flush_every: int = 20, flush_interval: float = 30.0,
+        user_id: int = DEFAULT_USER_ID,
+    ):
+        self.db_path = db_path
+        self.user_id = user_id
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.journal_name = f"{os.getpid()}-{time.time_ns()}"
+        self.journal_path = Path(f"{db_path}{JOURNAL_SUFFIX}.{self.journal_name}")
+        self._journal = None
+        self._pending: list[dict] = []
+        self._seq = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.RLock()
+        self._timer: threading.Timer | None = None
+
+    def __enter__(self) -> "ResultRecorder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def record_flashcard_result(self, card_id: int, rating: int, session_day: int | None = None) -> None:
+        self._add({"kind": "flashcard", "item_id": card_id, "rating": rating, "session_day": session_day})
+
+    def record_quiz_answer(self, question, user_answer: str, session_day: int | None = None) -> bool:
+        """Queue an answer to ``question`` (a quiz_questions row) and grade it."""
+        self._add({"kind": "quiz", "item_id": question["id"], "answer": user_answer, "session_day": session_day})
+        return is_correct_answer(user_answer, question["correct_answer"])
+
+    def _add(self, entry: dict) -> None:
+        with self._lock:
+            self._seq += 1
+            entry["user_id"] = self.user_id
+            entry["seq"] = self._seq
+            entry["at"] = datetime.now().isoformat()
+            if self._journal is None:
+                self._journal = open(self.journal_path, "a", encoding="utf-8")
+            self._journal.write(json.dumps(entry) + "\n")
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._pending.append(entry)
+            if (
+                len(self._pending) >= self.flush_every
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            ):
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self._timed_flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _timed_flush(self) -> None:
+        try:
+            self.flush()
+        except Exception:
+            # The results are still journaled; the next flush or replay writes them.
+            logger.exception("Timed flush of %s failed", self.journal_path)
+
+    def flush(self) -> None:
+        """Write all pending results in one transaction and trim the journal."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._pending:
+                _write_batch(self.db_path, self.journal_name, self._pending)
+                self._pending.clear()
+                self._journal.truncate(0)
+                self._journal.seek(0)
+            self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        """Flush and remove the journal."""
+        self.flush()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+            self.journal_path.unlink(missing_ok=True)
+            with connect(self.db_path) as conn:
+                conn.execute("DELETE FROM journal_state WHERE journal = ?", (self.journal_name,))
+
+
+def replay_journals(db_path: str) -> int:
+    """Apply journal entries left behind by crashed processes.
+
+    Journals owned by a process that is still running are left alone.
+    Entries already covered by a committed flush are skipped, so replaying
+    twice is harmless, and entries whose card or question has been retired
+    since are dropped. Returns the number of results applied.
+    """
+    applied = 0
+    for path in _journal_glob(db_path):
+        journal = path.name.rsplit(".", 1)[-1]
+        try:
+            pid = int(journal.split("-", 1)[0])
+        except ValueError:
+            continue
+        if _pid_alive(pid):
+            continue
+        with connect(db_path) as conn:
+            row = conn.execute(
+                "SELECT flushed_through FROM journal_state WHERE journal = ?", (journal,)
+            ).fetchone()
+        flushed_through = row["flushed_through"] if row else 0
+        entries = []
+        for line in path.read_text(encoding="utf-8").splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                break  # torn final write
+            if entry["seq"] > flushed_through:
+                entries.append(entry)
+        if entries:
+            applied += _write_batch(db_path, journal, entries)
+        path.unlink()
+        with connect(db_path) as conn:
+            conn.execute("DELETE FROM journal_state WHERE journal = ?", (journal,))
+    return applied
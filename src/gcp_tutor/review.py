@@ -1,24 +1,25 @@
 """Weak area identification and review session logic."""
-from gcp_tutor.db import get_connection
+from gcp_tutor.cache import cached
+from gcp_tutor.db import DEFAULT_USER_ID, connect
 
 
-def get_weak_subtopics(db_path: str, threshold: float = 70.0) -> list[dict]:
+@cached
+def get_weak_subtopics(db_path: str, threshold: float = 70.0, user_id: int = DEFAULT_USER_ID) -> list[dict]:
     """Get subtopics where error rate is above threshold (sorted worst first)."""
-    conn = get_connection(db_path)
-    rows = conn.execute(
-        """SELECT s.id, s.name, s.domain_id, d.name as domain_name,
-            COUNT(*) as total,
-            SUM(CASE WHEN r.is_correct = 0 THEN 1 ELSE 0 END) as errors
-        FROM quiz_results r
-        JOIN quiz_questions q ON r.quiz_question_id = q.id
-        JOIN subtopics s ON q.subtopic_id = s.id
-        JOIN domains d ON s.domain_id = d.id
-        GROUP BY s.id
-        HAVING (CAST(errors AS REAL) / total) * 100 > ?
-        ORDER BY (CAST(errors AS REAL) / total) DESC""",
-        (100 - threshold,),
-    ).fetchall()
-    conn.close()
+    with connect(db_path) as conn:
+        rows = conn.execute(
+            """SELECT s.id, s.name, s.domain_id, d.name as domain_name,
+                SUM(t.attempts) as total,
+                SUM(t.attempts - t.correct) as errors
+            FROM quiz_score_totals t
+            JOIN subtopics s ON t.subtopic_id = s.id
+            JOIN domains d ON s.domain_id = d.id
+            WHERE t.user_id = ?
+            GROUP BY s.id
+            HAVING total > 0 AND (CAST(errors AS REAL) / total) * 100 > ?
+            ORDER BY (CAST(errors AS REAL) / total) DESC""",
+            (user_id, 100 - threshold),
+        ).fetchall()
     return [
         {
             "subtopic_id": r["id"],
@@ -33,22 +34,22 @@ def get_weak_subtopics(db_path: str, threshold: float = 70.0) -> list[dict]:
     ]
 
 
-def get_weak_domains(db_path: str, threshold: float = 70.0) -> list[dict]:
+@cached
+def get_weak_domains(db_path: str, threshold: float = 70.0, user_id: int = DEFAULT_USER_ID) -> list[dict]:
     """Get domains where score is below threshold."""
-    conn = get_connection(db_path)
-    rows = conn.execute(
-        """SELECT d.id, d.name, d.section_number,
-            COUNT(*) as total,
-            SUM(r.is_correct) as correct
-        FROM quiz_results r
-        JOIN quiz_questions q ON r.quiz_question_id = q.id
-        JOIN domains d ON q.domain_id = d.id
-        GROUP BY d.id
-        HAVING (CAST(correct AS REAL) / total) * 100 < ?
-        ORDER BY (CAST(correct AS REAL) / total) ASC""",
-        (threshold,),
-    ).fetchall()
-    conn.close()
+    with connect(db_path) as conn:
+        rows = conn.execute(
+            """SELECT d.id, d.name, d.section_number,
+                SUM(t.attempts) as total,
+                SUM(t.correct) as correct
+            FROM quiz_score_totals t
+            JOIN domains d ON t.domain_id = d.id
+            WHERE t.user_id = ?
+            GROUP BY d.id
+            HAVING total > 0 AND (CAST(correct AS REAL) / total) * 100 < ?
+            ORDER BY (CAST(correct AS REAL) / total) ASC""",
+            (user_id, threshold),
+        ).fetchall()
     return [
         {
             "domain_id": r["id"],
@@ -0,0 +1,148 @@
+"""Random selection of quiz questions and due flashcards.
+
+Replaces ``ORDER BY RANDOM()``, which sorts every candidate row on every
+call. Questions are drawn from a cached in-memory id index per filter, so a
+draw costs O(k) after the first. Due cards are read in due order straight
+off the user's ``card_state`` (user_id, next_review) index; only the group
+of cards tied at the cut-off date needs random sampling, which uses
+id-range rejection sampling.
+
+Every function takes a ``random.Random`` so callers can seed draws for
+reproducible quizzes.
+"""
+import random
+import sqlite3
+import threading
+
+from gcp_tutor.db import CONTENT_VERSION_QUERY, DEFAULT_USER_ID, USER_CARDS_QUERY
+
+# (db_path, table, column, value) -> (CONTENT_VERSION_QUERY row when built, candidate ids)
+_id_indexes: dict[tuple, tuple[tuple, list[int]]] = {}
+_id_indexes_lock = threading.Lock()
+
+# Rejection-sampling attempts per wanted row before falling back to a scan.
+REJECTION_ATTEMPTS = 8
+
+
+def make_rng(seed: int | None = None) -> random.Random:
+    return random.Random(seed)
+
+
+def clear_id_indexes() -> None:
+    """Drop all cached id indexes (they rebuild on next use)."""
+    with _id_indexes_lock:
+        _id_indexes.clear()
+
+
+def _fetch_by_ids(conn: sqlite3.Connection, table: str, ids: list[int]) -> list:
+    """Fetch rows for ``ids``, preserving the order of ``ids``."""
+    if not ids:
+        return []
+    placeholders = ",".join("?" * len(ids))
+    rows = conn.execute(f"SELECT * FROM {table} WHERE id IN ({placeholders})", ids).fetchall()
+    by_id = {row["id"]: row for row in rows}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def _id_index(conn, db_path, table, column, value, rebuild=False) -> list[int]:
+    version = tuple(conn.execute(CONTENT_VERSION_QUERY).fetchone())
+    key = (db_path, table, column, value)
+    with _id_indexes_lock:
+        cached = _id_indexes.get(key)
+    if cached is not None and cached[0] == version and not rebuild:
+        return cached[1]
+    if column is None:
+        ids = [row[0] for row in conn.execute(f"SELECT id FROM {table} WHERE NOT retired")]
+    else:
+        ids = [
+            row[0] for row in conn.execute(f"SELECT id FROM {table} WHERE NOT retired AND {column} = ?", (value,))
+        ]
+    with _id_indexes_lock:
+        _id_indexes[key] = (version, ids)
+    return ids
+
+
+def sample_rows(
+    conn: sqlite3.Connection, db_path: str, table: str, k: int, rng: random.Random,
+    column: str | None = None, value=None,
+) -> list:
+    """Return up to ``k`` distinct random live rows of ``table`` (optionally where column = value).
+
+    ``table`` is a content table; retired rows are never returned. The id
+    index is rebuilt when the content version changes (a content sync, or
+    rows added), or when a sampled row has been deleted or retired or no
+    longer matches the filter some other way.
+    """
+    for rebuild in (False, True):
+        ids = _id_index(conn, db_path, table, column, value, rebuild=rebuild)
+        chosen = rng.sample(ids, min(k, len(ids)))
+        rows = _fetch_by_ids(conn, table, chosen)
+        if len(rows) == len(chosen) and all(
+            not r["retired"] and (column is None or r[column] == value) for r in rows
+        ):
+            return rows
+    return rows
+
+
+def _fetch_cards(conn: sqlite3.Connection, user_id: int, ids: list[int]) -> list:
+    if not ids:
+        return []
+    placeholders = ",".join("?" * len(ids))
+    return conn.execute(f"{USER_CARDS_QUERY} WHERE f.id IN ({placeholders})", (user_id, *ids)).fetchall()
+
+
+def _sample_tie_group(conn, user_id, where, params, key, key_value, needed, rng) -> list[int]:
+    """Pick ``needed`` random card ids among the user's cards matching ``where`` with key IS key_value."""
+    # Separate queries: SQLite only optimises a lone MIN() or MAX() to a seek.
+    low = conn.execute("SELECT MIN(id) FROM flashcards").fetchone()[0]
+    high = conn.execute("SELECT MAX(id) FROM flashcards").fetchone()[0]
+    chosen: set[int] = set()
+    if low is not None:
+        check = f"""SELECT 1 FROM card_state
+            WHERE user_id = ? AND flashcard_id = ? AND retired = 0 AND ({where}) AND {key} IS ?"""
+        for _ in range(needed * REJECTION_ATTEMPTS):
+            candidate = rng.randint(low, high)
+            if candidate not in chosen and conn.execute(
+                check, (user_id, candidate, *params, key_value),
+            ).fetchone():
+                chosen.add(candidate)
+                if len(chosen) == needed:
+                    return list(chosen)
+    # Small or sparse tie group: read its ids off the index instead.
+    ids = [
+        row[0] for row in conn.execute(
+            f"SELECT flashcard_id FROM card_state WHERE user_id = ? AND retired = 0 AND ({where}) AND {key} IS ?",
+            (user_id, *params, key_value),
+        )
+    ]
+    return rng.sample(ids, min(needed, len(ids)))
+
+
+def sample_due_cards(
+    conn: sqlite3.Connection, where: str, params: tuple, limit: int, rng: random.Random,
+    key: str = "next_review", user_id: int = DEFAULT_USER_ID,
+) -> list:
+    """Return up to ``limit`` of the user's cards matching ``where``, most overdue first.
+
+    ``where`` filters ``card_state`` rows; retired cards are left out. Cards
+    are taken in ``key`` order (NULL, i.e. never reviewed, first). Cards
+    sharing the cut-off key value are chosen at random, and cards with equal
+    keys are shuffled, matching ``ORDER BY key, RANDOM()`` without the full
+    sort. Rows combine the flashcard with the user's scheduling state.
+    """
+    head = conn.execute(
+        f"""SELECT flashcard_id, {key} FROM card_state WHERE user_id = ? AND retired = 0 AND ({where})
+        ORDER BY {key} LIMIT ?""",
+        (user_id, *params, limit),
+    ).fetchall()
+    if len(head) == limit and head:
+        cutoff = head[-1][1]
+        ids = [row[0] for row in head if row[1] != cutoff]
+        ids += _sample_tie_group(conn, user_id, where, params, key, cutoff, limit - len(ids), rng)
+    else:
+        ids = [row[0] for row in head]
+    rows = _fetch_cards(conn, user_id, ids)
+    # Stable sort on the key after a shuffle: due order, random within ties.
+    rng.shuffle(rows)
+    rows.sort(key=lambda row: (row[key] is not None, row[key] or ""))
+    return rows
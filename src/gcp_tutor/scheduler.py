@@ -0,0 +1,258 @@
+"""Pluggable spaced-repetition schedulers.
+
+A scheduler turns a card's stored state plus a 0-5 rating into the card's
+next state and review date. ``get_scheduler()`` resolves a learner's
+configured scheduler (their ``scheduler`` setting); SM-2 is the default.
+"""
+import json
+import math
+from abc import ABC, abstractmethod
+from datetime import date, timedelta
+from typing import Mapping
+
+from gcp_tutor.db import DEFAULT_USER_ID, connect
+from gcp_tutor.sm2 import sm2_update
+from gcp_tutor.study import get_setting, set_setting
+
+DEFAULT_SCHEDULER = "sm2"
+DEFAULT_RETENTION = 0.9
+
+
+class Scheduler(ABC):
+    """Base class: compute a card's next state from a rating."""
+
+    name = ""
+    # Columns on ``card_state`` this scheduler reads and writes.
+    state_columns: tuple[str, ...] = ()
+    # Column that orders due cards, most urgent (lowest, NULL first) first.
+    due_key = "next_review"
+
+    @abstractmethod
+    def review(self, card: Mapping, rating: int, reviewed_on: date) -> dict:
+        """Return the new values for ``state_columns`` plus ``next_review``."""
+
+
+class SM2Scheduler(Scheduler):
+    name = "sm2"
+    state_columns = ("ease_factor", "interval", "repetitions")
+
+    def review(self, card: Mapping, rating: int, reviewed_on: date) -> dict:
+        updated = sm2_update(
+            quality=rating,
+            repetitions=card["repetitions"],
+            ease_factor=card["ease_factor"],
+            interval=card["interval"],
+        )
+        updated["next_review"] = (reviewed_on + timedelta(days=updated["interval"])).isoformat()
+        return updated
+
+
+# FSRS-4.5 default weights, from the open-spaced-repetition project.
+FSRS_DEFAULT_WEIGHTS = (
+    0.4872, 1.4003, 3.7145, 13.8206, 5.1618, 1.2298, 0.8975, 0.031, 1.6474,
+    0.1367, 1.0461, 2.1072, 0.0793, 0.3246, 1.587, 0.2272, 2.8755,
+)
+
+# (low, high) bounds per weight, used by the optimizer.
+FSRS_WEIGHT_BOUNDS = (
+    (0.1, 100.0), (0.1, 100.0), (0.1, 100.0), (0.1, 100.0), (1.0, 10.0),
+    (0.1, 5.0), (0.1, 5.0), (0.0, 0.75), (0.0, 4.5), (0.0, 0.8), (0.01, 3.5),
+    (0.1, 5.0), (0.01, 0.25), (0.01, 0.9), (0.01, 4.0), (0.0, 1.0), (1.0, 6.0),
+)
+
+FSRS_DECAY = -0.5
+FSRS_FACTOR = 19 / 81  # makes R = 0.9 when elapsed days == stability
+FSRS_MAX_INTERVAL = 36500
+
+
+def fsrs_grade(rating: int) -> int:
+    """Map the app's 0-5 self-rating onto FSRS grades 1 (again) - 4 (easy)."""
+    if rating < 3:
+        return 1
+    return rating - 1
+
+
+def fsrs_retrievability(elapsed_days: float, stability: float) -> float:
+    return (1 + FSRS_FACTOR * elapsed_days / stability) ** FSRS_DECAY
+
+
+class FSRSScheduler(Scheduler):
+    """Free Spaced Repetition Scheduler (FSRS-4.5 formulas)."""
+
+    name = "fsrs"
+    state_columns = ("stability", "difficulty", "interval", "repetitions")
+
+    def __init__(self, weights=FSRS_DEFAULT_WEIGHTS, desired_retention: float = DEFAULT_RETENTION):
+        self.w = tuple(weights)
+        self.desired_retention = desired_retention
+
+    def _initial_difficulty(self, grade: int) -> float:
+        return min(10.0, max(1.0, self.w[4] - (grade - 3) * self.w[5]))
+
+    def next_interval(self, stability: float) -> int:
+        days = stability / FSRS_FACTOR * (self.desired_retention ** (1 / FSRS_DECAY) - 1)
+        return min(FSRS_MAX_INTERVAL, max(1, round(days)))
+
+    def review(self, card: Mapping, rating: int, reviewed_on: date) -> dict:
+        w = self.w
+        grade = fsrs_grade(rating)
+        stability = card["stability"]
+        if stability is None or card["next_review"] is None:
+            stability = w[grade - 1]
+            difficulty = self._initial_difficulty(grade)
+        else:
+            last_review = date.fromisoformat(card["next_review"]) - timedelta(days=card["interval"])
+            elapsed = max(0, (reviewed_on - last_review).days)
+            r = fsrs_retrievability(elapsed, stability)
+            difficulty = card["difficulty"] if card["difficulty"] is not None else self._initial_difficulty(3)
+            if grade == 1:
+                stability = (
+                    w[11] * difficulty ** -w[12] * ((stability + 1) ** w[13] - 1)
+                    * math.exp(w[14] * (1 - r))
+                )
+            else:
+                hard_penalty = w[15] if grade == 2 else 1.0
+                easy_bonus = w[16] if grade == 4 else 1.0
+                stability = stability * (
+                    math.exp(w[8]) * (11 - difficulty) * stability ** -w[9]
+                    * (math.exp(w[10] * (1 - r)) - 1) * hard_penalty * easy_bonus + 1
+                )
+            difficulty = difficulty - w[6] * (grade - 3)
+            difficulty = w[7] * self._initial_difficulty(4) + (1 - w[7]) * difficulty
+            difficulty = min(10.0, max(1.0, difficulty))
+        interval = self.next_interval(stability)
+        return {
+            "stability": stability,
+            "difficulty": difficulty,
+            "interval": interval,
+            "repetitions": card["repetitions"] + 1 if grade > 1 else 0,
+            "next_review": (reviewed_on + timedelta(days=interval)).isoformat(),
+        }
+
+
+SCHEDULERS = {
+    SM2Scheduler.name: SM2Scheduler,
+    FSRSScheduler.name: FSRSScheduler,
+}
+
+
+def get_scheduler(db_path: str, user_id: int = DEFAULT_USER_ID) -> Scheduler:
+    """Return the scheduler configured for this user."""
+    name = get_setting(db_path, "scheduler", DEFAULT_SCHEDULER, user_id=user_id)
+    if name == FSRSScheduler.name:
+        weights = get_setting(db_path, "fsrs_weights", user_id=user_id)
+        retention = float(get_setting(db_path, "desired_retention", str(DEFAULT_RETENTION), user_id=user_id))
+        return FSRSScheduler(
+            json.loads(weights) if weights else FSRS_DEFAULT_WEIGHTS, desired_retention=retention,
+        )
+    if name not in SCHEDULERS:
+        raise ValueError(f"Unknown scheduler: {name}")
+    return SCHEDULERS[name]()
+
+
+def set_scheduler(db_path: str, name: str, weights=None, user_id: int = DEFAULT_USER_ID) -> None:
+    """Select the scheduler (and optionally FSRS weights) for this user."""
+    if name not in SCHEDULERS:
+        raise ValueError(f"Unknown scheduler: {name}")
+    set_setting(db_path, "scheduler", name, user_id=user_id)
+    if weights is not None:
+        set_setting(db_path, "fsrs_weights", json.dumps([float(x) for x in weights]), user_id=user_id)
+
+
+def _training_histories(db_path: str, user_id: int) -> list[list[tuple[int, int]]]:
+    """A user's per-card review histories as (grade, day ordinal) pairs, longest first."""
+    histories: dict[int, list] = {}
+    with connect(db_path) as conn:
+        for card_id, rating, reviewed_at in conn.execute(
+            """SELECT flashcard_id, rating, reviewed_at FROM flashcard_results
+            WHERE user_id = ? ORDER BY reviewed_at, id""",
+            (user_id,),
+        ):
+            day = date.fromisoformat(reviewed_at[:10]).toordinal()
+            histories.setdefault(card_id, []).append((fsrs_grade(rating), day))
+    return sorted(histories.values(), key=len, reverse=True)
+
+
+def _fsrs_log_loss(np, w, grades, days, lengths) -> float:
+    """Mean binary cross-entropy of FSRS recall predictions over all reviews.
+
+    ``grades`` and ``days`` are (cards x max_len) matrices, rows sorted by
+    ``lengths`` descending, so step k only touches the first active rows.
+    """
+    n_cards, max_len = grades.shape
+    g = grades[:, 0]
+    stability = w[np.clip(g - 1, 0, 3)]
+    difficulty = np.clip(w[4] - (g - 3) * w[5], 1, 10)
+    d0_easy = min(10.0, max(1.0, w[4] - w[5]))
+    total, count = 0.0, 0
+    for step in range(1, max_len):
+        active = int(np.searchsorted(-lengths, -step, side="left"))
+        if not active:
+            break
+        s = stability[:active]
+        d = difficulty[:active]
+        g = grades[:active, step]
+        elapsed = np.maximum(0, days[:active, step] - days[:active, step - 1])
+        r = np.clip((1 + FSRS_FACTOR * elapsed / s) ** FSRS_DECAY, 1e-6, 1 - 1e-6)
+        recalled = g > 1
+        total += float(-np.sum(np.where(recalled, np.log(r), np.log(1 - r))))
+        count += active
+        lapse_s = w[11] * d ** -w[12] * ((s + 1) ** w[13] - 1) * np.exp(w[14] * (1 - r))
+        bonus = np.where(g == 2, w[15], np.where(g == 4, w[16], 1.0))
+        recall_s = s * (np.exp(w[8]) * (11 - d) * s ** -w[9] * (np.exp(w[10] * (1 - r)) - 1) * bonus + 1)
+        stability[:active] = np.maximum(0.01, np.where(recalled, recall_s, lapse_s))
+        new_d = d - w[6] * (g - 3)
+        difficulty[:active] = np.clip(w[7] * d0_easy + (1 - w[7]) * new_d, 1, 10)
+    return total / count if count else 0.0
+
+
+def optimize_fsrs_weights(
+    db_path: str, iterations: int = 100, learning_rate: float = 0.05, weights=FSRS_DEFAULT_WEIGHTS,
+    user_id: int = DEFAULT_USER_ID,
+) -> tuple[list[float], float]:
+    """Fit FSRS weights to a user's flashcard_results history.
+
+    Minimises the log loss of predicted recall with Adam, using central
+    finite-difference gradients; each loss evaluation replays every card's
+    history at once as NumPy arrays. Requires NumPy (``pip install .[fast]``).
+
+    Returns (weights, final_loss). Weights are unchanged when there are no
+    repeat reviews to learn from.
+    """
+    import numpy as np
+
+    histories = _training_histories(db_path, user_id)
+    lengths = np.array([len(h) for h in histories], dtype=np.int64)
+    w = np.array(weights, dtype=np.float64)
+    if not len(lengths) or lengths.max() < 2:
+        return w.tolist(), 0.0
+    max_len = int(lengths.max())
+    grades = np.full((len(histories), max_len), 3, dtype=np.int64)
+    days = np.zeros((len(histories), max_len), dtype=np.float64)
+    for i, history in enumerate(histories):
+        grades[i, :len(history)] = [grade for grade, _ in history]
+        days[i, :len(history)] = [day for _, day in history]
+
+    low = np.array([b[0] for b in FSRS_WEIGHT_BOUNDS])
+    high = np.array([b[1] for b in FSRS_WEIGHT_BOUNDS])
+    scale = high - low
+    m = np.zeros_like(w)
+    v = np.zeros_like(w)
+    beta1, beta2, eps = 0.9, 0.999, 1e-8
+    for t in range(1, iterations + 1):
+        grad = np.zeros_like(w)
+        for j in range(len(w)):
+            h = 1e-4 * scale[j]
+            up, down = w.copy(), w.copy()
+            up[j] = min(high[j], w[j] + h)
+            down[j] = max(low[j], w[j] - h)
+            grad[j] = (
+                _fsrs_log_loss(np, up, grades, days, lengths)
+                - _fsrs_log_loss(np, down, grades, days, lengths)
+            ) / (up[j] - down[j])
+        m = beta1 * m + (1 - beta1) * grad
+        v = beta2 * v + (1 - beta2) * grad ** 2
+        m_hat = m / (1 - beta1 ** t)
+        v_hat = v / (1 - beta2 ** t)
+        w = np.clip(w - learning_rate * scale * 0.01 * m_hat / (np.sqrt(v_hat) + eps), low, high)
+    return w.tolist(), _fsrs_log_loss(np, w, grades, days, lengths)
@@ -0,0 +1,109 @@
+"""Full-text search across flashcards, quiz questions, reading and imported notes.
+
+Each source has an FTS5 index kept current by triggers (see
+``gcp_tutor.db.SEARCH_INDEXES``). One query searches all of them and ranks
+the hits together by BM25.
+"""
+import re
+
+from gcp_tutor.db import apply_pending_search_updates, connect
+
+SNIPPET_TOKENS = 16
+
+# Ranks every match across the four indexes; snippets, the costly part, are
+# then built only for the hits kept. Retired rows are left out. A reading
+# text is shared by several study days and reported as the first of them.
+RANK_QUERY = """
+SELECT 'flashcard' AS source, flashcards_fts.rowid, bm25(flashcards_fts) AS score
+FROM flashcards_fts JOIN flashcards f ON f.id = flashcards_fts.rowid
+WHERE flashcards_fts MATCH :query AND NOT f.retired AND (:domain_id IS NULL OR f.domain_id = :domain_id)
+UNION ALL
+SELECT 'question', quiz_questions_fts.rowid, bm25(quiz_questions_fts)
+FROM quiz_questions_fts JOIN quiz_questions q ON q.id = quiz_questions_fts.rowid
+WHERE quiz_questions_fts MATCH :query AND NOT q.retired AND (:domain_id IS NULL OR q.domain_id = :domain_id)
+UNION ALL
+SELECT 'reading', reading_blobs_fts.rowid, bm25(reading_blobs_fts)
+FROM reading_blobs_fts JOIN study_days sd ON sd.id = (SELECT MIN(id) FROM study_days WHERE reading_blob_id = reading_blobs_fts.rowid)
+WHERE reading_blobs_fts MATCH :query AND (:domain_id IS NULL OR sd.domain_id = :domain_id)
+UNION ALL
+SELECT 'import', imported_chunks_fts.rowid, bm25(imported_chunks_fts)
+FROM imported_chunks_fts JOIN imported_chunks c ON c.id = imported_chunks_fts.rowid
+JOIN imported_content i ON i.id = c.import_id
+WHERE imported_chunks_fts MATCH :query AND (:domain_id IS NULL OR i.domain_id = :domain_id)
+ORDER BY score
+LIMIT :limit
+"""
+
+# Per source: its index, the hit's (id, domain_id, title, part), and the
+# tables they come from, with the indexed row as ``t``.
+SOURCES = {
+    "flashcard": ("flashcards_fts", "t.id, t.domain_id, t.front, NULL", "flashcards t"),
+    "question": ("quiz_questions_fts", "t.id, t.domain_id, t.stem, NULL", "quiz_questions t"),
+    "reading": (
+        "reading_blobs_fts",
+        "sd.day_number, sd.domain_id, COALESCE(d.name, 'Mixed Review') || ' reading', NULL",
+        """reading_blobs t
+        JOIN study_days sd ON sd.id = (SELECT MIN(id) FROM study_days WHERE reading_blob_id = t.id)
+        LEFT JOIN domains d ON d.id = sd.domain_id""",
+    ),
+    "import": (
+        "imported_chunks_fts",
+        "i.id, i.domain_id, i.filename, t.seq",
+        "imported_chunks t JOIN imported_content i ON i.id = t.import_id",
+    ),
+}
+
+
+def _details(conn, source: str, query: str, rowids: list[int], highlight: tuple[str, str]) -> dict:
+    """rowid -> (id, domain_id, title, part, snippet) for the given hits of one source."""
+    index, columns, tables = SOURCES[source]
+    rows = conn.execute(
+        f"""SELECT {index}.rowid, {columns}, snippet({index}, -1, ?, ?, '...', {SNIPPET_TOKENS})
+        FROM {index}, {tables}
+        WHERE {index} MATCH ? AND {index}.rowid IN ({", ".join("?" * len(rowids))})
+            AND t.id = {index}.rowid""",
+        (*highlight, query, *rowids),
+    )
+    return {row[0]: tuple(row)[1:] for row in rows}
+
+
+def match_query(text: str) -> str:
+    """Turn free text into an FTS5 query matching every word in it.
+
+    Words are quoted, so punctuation such as ``pub/sub`` or ``gcloud --zone``
+    cannot break the query syntax. A trailing ``*`` keeps prefix matching
+    (``autoscal*``).
+    """
+    return " ".join(f'"{word}"{star}' for word, star in re.findall(r"(\w+)(\*?)", text))
+
+
+def search(
+    db_path: str, text: str, limit: int = 20, domain_id: int | None = None,
+    highlight: tuple[str, str] = ("[", "]"),
+) -> list[dict]:
+    """Search all study material for ``text``, best matches first.
+
+    Each hit has ``source`` ('flashcard', 'question', 'reading' or
+    'import'), the row ``id`` (the day number for reading), ``domain_id``,
+    a ``title``, for imports the matching chunk's ``part`` number (see
+    ``gcp_tutor.importer.iter_import_chunks``), a ``snippet`` with matches
+    wrapped in ``highlight`` and its BM25 ``score`` (lower is better).
+    """
+    query = match_query(text)
+    if not query:
+        return []
+    with connect(db_path) as conn:
+        apply_pending_search_updates(conn)
+        ranked = conn.execute(RANK_QUERY, {"query": query, "domain_id": domain_id, "limit": limit}).fetchall()
+        details = {
+            source: _details(conn, source, query, [row[1] for row in ranked if row[0] == source], highlight)
+            for source in {row[0] for row in ranked}
+        }
+    hits = []
+    for source, rowid, score in ranked:
+        item_id, hit_domain, title, part, snippet = details[source][rowid]
+        hits.append({
+            "source": source, "id": item_id, "domain_id": hit_domain, "title": title,
+            "part": part, "snippet": snippet, "score": score,
+        })
+    return hits
@@ -1,35 +1,54 @@
 """Seed the database with exam domains, subtopics, and study plan."""
+import hashlib
 import json
+import os
+import shutil
+import sqlite3
+from datetime import datetime
 from pathlib import Path
-from gcp_tutor.db import get_connection
+from urllib.parse import quote
+from gcp_tutor.db import (
+    CONTENT_SEARCH_INDEXES, CONTENT_TABLES, SCHEMA_VERSION, build_progress_template, close_connection, connect,
+    get_connection, init_db, linked_content_path, progress_template_path, rebuild_score_totals, text_hash,
+)
 
 CONTENT_DIR = Path(__file__).parent / "content"
+# Built into every wheel by setup.py, or in a source checkout by
+# ``python -m gcp_tutor.seed``; not checked in. Without it the first launch
+# seeds live from the JSON files.
+TEMPLATE_PATH = str(CONTENT_DIR / "template.db")
 
 
 def is_seeded(db_path: str) -> bool:
     """Check whether the database has already been seeded with domains."""
-    conn = get_connection(db_path)
-    count = conn.execute("SELECT COUNT(*) FROM domains").fetchone()[0]
-    conn.close()
+    with connect(db_path) as conn:
+        count = conn.execute("SELECT COUNT(*) FROM domains").fetchone()[0]
     return count > 0
 
 
 def seed_domains(db_path: str) -> None:
     """Insert all exam domains and subtopics from domains.json."""
     data = json.loads((CONTENT_DIR / "domains.json").read_text())
-    conn = get_connection(db_path)
-    for domain in data["domains"]:
-        conn.execute(
+    with connect(db_path) as conn:
+        conn.executemany(
             "INSERT OR IGNORE INTO domains (id, name, section_number, exam_weight, description) VALUES (?, ?, ?, ?, ?)",
-            (domain["id"], domain["name"], domain["section_number"], domain["exam_weight"], domain["description"]),
+            (
+                (d["id"], d["name"], d["section_number"], d["exam_weight"], d["description"])
+                for d in data["domains"]
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO subtopics (domain_id, name, description) VALUES (?, ?, ?)",
+            ((d["id"], st["name"], st["description"]) for d in data["domains"] for st in d["subtopics"]),
         )
-        for subtopic in domain["subtopics"]:
-            conn.execute(
-                "INSERT INTO subtopics (domain_id, name, description) VALUES (?, ?, ?)",
-                (domain["id"], subtopic["name"], subtopic["description"]),
-            )
-    conn.commit()
-    conn.close()
+
+
+def _subtopic_ids(conn) -> dict[str, int]:
+    """Map subtopic name -> id (the lowest id wins if a name repeats)."""
+    ids: dict[str, int] = {}
+    for row in conn.execute("SELECT id, name FROM subtopics ORDER BY id"):
+        ids.setdefault(row["name"], row["id"])
+    return ids
 
 
 def _load_reading_content() -> dict:
@@ -38,8 +57,24 @@ def _load_reading_content() -> dict:
     return data["domains"]
 
 
+def _reading_blob_id(conn, text: str | None) -> int | None:
+    """Id of the reading_blobs row holding ``text``, added if no row does yet."""
+    if not text:
+        return None
+    content_hash = text_hash(text)
+    row = conn.execute("SELECT id FROM reading_blobs WHERE content_hash = ?", (content_hash,)).fetchone()
+    if row is not None:
+        return row[0]
+    return conn.execute(
+        "INSERT INTO reading_blobs (content_hash, body) VALUES (?, ?)", (content_hash, text)
+    ).lastrowid
+
+
 def seed_study_plan(db_path: str) -> None:
-    """Create the 30-day study plan, ordered by exam weight (heaviest first)."""
+    """Create the 30-day study plan, ordered by exam weight (heaviest first).
+
+    Days on the same domain share one reading_blobs row.
+    """
     # Domain order by exam weight: 3(25%), 1(20%), 4(20%), 2(17.5%), 5(17.5%)
     plan = [
         (3, 6),    # Days 1-6
@@ -52,79 +87,405 @@ def seed_study_plan(db_path: str) -> None:
         (None, 2), # Days 29-30: final review
     ]
     reading = _load_reading_content()
-    conn = get_connection(db_path)
-    day = 1
-    for domain_id, count in plan:
-        content = reading.get(str(domain_id), reading.get("review"))
-        for _ in range(count):
-            conn.execute(
-                "INSERT INTO study_days (day_number, domain_id, status, reading_content) VALUES (?, ?, 'pending', ?)",
-                (day, domain_id, content),
-            )
-            day += 1
-    conn.commit()
-    conn.close()
+    with connect(db_path) as conn:
+        blob_ids = {
+            domain_id: _reading_blob_id(conn, reading.get(str(domain_id), reading.get("review")))
+            for domain_id, _count in plan
+        }
+        days = [domain_id for domain_id, count in plan for _ in range(count)]
+        conn.executemany(
+            "INSERT INTO study_days (day_number, domain_id, status, reading_blob_id) VALUES (?, ?, 'pending', ?)",
+            ((day, domain_id, blob_ids[domain_id]) for day, domain_id in enumerate(days, start=1)),
+        )
 
 
 def ensure_reading_content(db_path: str) -> None:
-    """Backfill reading_content for any study_days rows where it is NULL."""
+    """Backfill the reading of any study_days rows that have none."""
     reading = _load_reading_content()
-    conn = get_connection(db_path)
-    rows = conn.execute(
-        "SELECT id, domain_id FROM study_days WHERE reading_content IS NULL OR reading_content = ''"
-    ).fetchall()
-    for row in rows:
-        content = reading.get(str(row["domain_id"]), reading.get("review"))
-        conn.execute(
-            "UPDATE study_days SET reading_content = ? WHERE id = ?",
-            (content, row["id"]),
+    with connect(db_path) as conn:
+        rows = conn.execute("SELECT id, domain_id FROM study_days WHERE reading_blob_id IS NULL").fetchall()
+        # Resolve the blobs once per domain up front, so no statements run
+        # from inside executemany's parameter iterator.
+        blob_ids = {
+            domain_id: _reading_blob_id(conn, reading.get(str(domain_id), reading.get("review")))
+            for domain_id in {row["domain_id"] for row in rows}
+        }
+        conn.executemany(
+            "UPDATE study_days SET reading_blob_id = ? WHERE id = ?",
+            [(blob_ids[row["domain_id"]], row["id"]) for row in rows],
         )
-    conn.commit()
-    conn.close()
+
+
+# Columns filled from each JSON record, and the field identifying a record
+# across content versions. subtopic_id comes from the record's subtopic name.
+FLASHCARD_COLUMNS = ("domain_id", "subtopic_id", "front", "back")
+QUESTION_COLUMNS = (
+    "domain_id", "subtopic_id", "stem", "choice_a", "choice_b", "choice_c", "choice_d",
+    "correct_answer", "explanation",
+)
+RECORD_KEYS = {"flashcards": "front", "quiz_questions": "stem"}
+# A record whose key field was edited keeps its row if this field is
+# unchanged and no other unmatched row or record shares it.
+RECORD_FALLBACK_KEYS = {"flashcards": "back", "quiz_questions": "explanation"}
+
+
+def _record_hash(record: dict) -> str:
+    return hashlib.sha256(json.dumps(record, sort_keys=True).encode()).hexdigest()
+
+
+def _record_values(record: dict, columns: tuple[str, ...], subtopic_ids: dict[str, int]) -> tuple:
+    return tuple(subtopic_ids.get(record["subtopic"]) if c == "subtopic_id" else record[c] for c in columns)
+
+
+def _insert_records(conn, table: str, columns: tuple[str, ...], records: list[dict], subtopic_ids) -> None:
+    placeholders = ", ".join("?" * (len(columns) + 1))
+    conn.executemany(
+        f"INSERT INTO {table} ({', '.join(columns)}, content_hash, source) VALUES ({placeholders}, 'seeded')",
+        (_record_values(r, columns, subtopic_ids) + (_record_hash(r),) for r in records),
+    )
 
 
 def seed_flashcards(db_path: str) -> None:
     """Insert flashcards from flashcards.json."""
     data = json.loads((CONTENT_DIR / "flashcards.json").read_text())
-    conn = get_connection(db_path)
-    for card in data["flashcards"]:
-        # Look up subtopic_id by name
-        row = conn.execute(
-            "SELECT id FROM subtopics WHERE name = ?", (card["subtopic"],)
-        ).fetchone()
-        subtopic_id = row["id"] if row else None
-        conn.execute(
-            "INSERT INTO flashcards (domain_id, subtopic_id, front, back, source) VALUES (?, ?, ?, ?, 'seeded')",
-            (card["domain_id"], subtopic_id, card["front"], card["back"]),
-        )
-    conn.commit()
-    conn.close()
+    with connect(db_path) as conn:
+        _insert_records(conn, "flashcards", FLASHCARD_COLUMNS, data["flashcards"], _subtopic_ids(conn))
 
 
 def seed_questions(db_path: str) -> None:
     """Insert quiz questions from questions.json."""
     data = json.loads((CONTENT_DIR / "questions.json").read_text())
-    conn = get_connection(db_path)
-    for q in data["questions"]:
-        row = conn.execute(
-            "SELECT id FROM subtopics WHERE name = ?", (q["subtopic"],)
-        ).fetchone()
-        subtopic_id = row["id"] if row else None
+    with connect(db_path) as conn:
+        _insert_records(conn, "quiz_questions", QUESTION_COLUMNS, data["questions"], _subtopic_ids(conn))
+
+
+def content_hash() -> str:
+    """Hash of the content files and schema version: the content version."""
+    digest = hashlib.sha256(f"schema {SCHEMA_VERSION}\n".encode())
+    for path in sorted(CONTENT_DIR.glob("*.json")):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def content_stamp() -> str:
+    """Schema version plus the name, size and modification time of each content file.
+
+    Costs a directory listing instead of reading the files; a sync records
+    it next to the content hash.
+    """
+    parts = [f"schema {SCHEMA_VERSION}"]
+    for path in sorted(CONTENT_DIR.glob("*.json")):
+        stat = path.stat()
+        parts.append(f"{path.name} {stat.st_size} {stat.st_mtime_ns}")
+    return "\n".join(parts)
+
+
+def applied_content_hash(db_path: str) -> str | None:
+    """The content version last seeded or synced into ``db_path``."""
+    with connect(db_path) as conn:
+        row = conn.execute("SELECT content_hash FROM content_syncs ORDER BY id DESC LIMIT 1").fetchone()
+    return row[0] if row else None
+
+
+def is_current(db_path: str) -> bool:
+    """Whether ``db_path`` exists at the current schema and content version.
+
+    One query, so startup can skip migrations, seeding and syncing when
+    nothing changed. The content files are only hashed when their sizes or
+    modification times differ from those recorded by the last sync.
+    """
+    if not Path(db_path).exists():
+        return False
+    with connect(db_path) as conn:
+        try:
+            version, applied, stamp = conn.execute(
+                """SELECT (SELECT user_version FROM pragma_user_version),
+                (SELECT content_hash FROM content_syncs ORDER BY id DESC LIMIT 1),
+                (SELECT source_stamp FROM content_syncs ORDER BY id DESC LIMIT 1)"""
+            ).fetchone()
+        except sqlite3.OperationalError:  # from before content versions
+            return False
+    if version != SCHEMA_VERSION or applied is None:
+        return False
+    return stamp == content_stamp() or applied == content_hash()
+
+
+def _sync_domains(conn) -> None:
+    data = json.loads((CONTENT_DIR / "domains.json").read_text())
+    conn.executemany(
+        """INSERT INTO domains (id, name, section_number, exam_weight, description) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (id) DO UPDATE SET name = excluded.name, section_number = excluded.section_number,
+            exam_weight = excluded.exam_weight, description = excluded.description
+        WHERE (name, section_number, exam_weight, description)
+            IS NOT (excluded.name, excluded.section_number, excluded.exam_weight, excluded.description)""",
+        (
+            (d["id"], d["name"], d["section_number"], d["exam_weight"], d["description"])
+            for d in data["domains"]
+        ),
+    )
+    existing = {
+        (row["domain_id"], row["name"]): row for row in conn.execute("SELECT * FROM subtopics ORDER BY id DESC")
+    }
+    inserts, updates = [], []
+    for d in data["domains"]:
+        for st in d["subtopics"]:
+            row = existing.get((d["id"], st["name"]))
+            if row is None:
+                inserts.append((d["id"], st["name"], st["description"]))
+            elif row["description"] != st["description"]:
+                updates.append((st["description"], row["id"]))
+    conn.executemany("INSERT INTO subtopics (domain_id, name, description) VALUES (?, ?, ?)", inserts)
+    conn.executemany("UPDATE subtopics SET description = ? WHERE id = ?", updates)
+
+
+def _unique_by(field: str, items) -> dict:
+    """Map ``field`` value -> item, for values only one of ``items`` has."""
+    by_value: dict = {}
+    for item in items:
+        by_value[item[field]] = item if item[field] not in by_value else None
+    return {value: item for value, item in by_value.items() if item is not None}
+
+
+def _sync_records(conn, table: str, columns: tuple[str, ...], records: list[dict], subtopic_ids) -> tuple:
+    """Diff ``records`` against the seeded rows of ``table`` by record hash.
+
+    Records are matched to rows by RECORD_KEYS, then by RECORD_FALLBACK_KEYS,
+    so editing a card's front updates it in place. Returns (inserted,
+    updated, retired, moved), where ``moved`` says whether an updated row
+    changed domain or subtopic.
+    """
+    key, fallback = RECORD_KEYS[table], RECORD_FALLBACK_KEYS[table]
+    rows = conn.execute(
+        f"""SELECT id, {key}, {fallback}, domain_id, subtopic_id, content_hash, retired
+        FROM {table} WHERE source = 'seeded'"""
+    ).fetchall()
+    existing = {row[key]: row for row in rows}
+    matched = [(record, existing.get(record[key])) for record in records]
+    claimed = {row["id"] for _, row in matched if row is not None}
+    spare_rows = _unique_by(fallback, (row for row in rows if row["id"] not in claimed))
+    edited = _unique_by(fallback, (record for record, row in matched if row is None))
+    inserts, updates, seen = [], [], set()
+    moved = False
+    for record, row in matched:
+        if row is None and edited.get(record[fallback]) is record:
+            row = spare_rows.get(record[fallback])
+        if row is None:
+            inserts.append(record)
+            continue
+        seen.add(row["id"])
+        record_hash = _record_hash(record)
+        if row["content_hash"] != record_hash or row["retired"]:
+            values = _record_values(record, columns, subtopic_ids)
+            updates.append(values + (record_hash, row["id"]))
+            moved = moved or (row["domain_id"], row["subtopic_id"]) != values[:2]
+    retired = [(row["id"],) for row in existing.values() if row["id"] not in seen and not row["retired"]]
+    assignments = ", ".join(f"{c} = ?" for c in columns)
+    conn.executemany(f"UPDATE {table} SET {assignments}, content_hash = ?, retired = 0 WHERE id = ?", updates)
+    conn.executemany(f"UPDATE {table} SET retired = 1 WHERE id = ?", retired)
+    _insert_records(conn, table, columns, inserts, subtopic_ids)
+    return len(inserts), len(updates), len(retired), moved
+
+
+def _record_sync(conn, version: str, inserted: int = 0, updated: int = 0, retired: int = 0) -> None:
+    conn.execute(
+        """INSERT INTO content_syncs (content_hash, applied_at, inserted, updated, retired, source_stamp)
+        VALUES (?, ?, ?, ?, ?, ?)""",
+        (version, datetime.now().isoformat(), inserted, updated, retired, content_stamp()),
+    )
+
+
+def sync_content(db_path: str) -> dict | None:
+    """Apply changes in ``content/*.json`` to an already seeded database.
+
+    Each seeded flashcard and question is matched to its record by front or
+    stem and rewritten only if the record's hash changed; new records are
+    inserted and records no longer present are retired, so learners' card
+    state and results are kept. Returns the inserted/updated/retired counts,
+    or None if the content version was already applied.
+    """
+    version = content_hash()
+    with connect(db_path) as conn:
+        if applied_content_hash(db_path) == version:
+            # Same content in files touched since (say, by a reinstall).
+            conn.execute(
+                """UPDATE content_syncs SET source_stamp = ?1
+                WHERE id = (SELECT MAX(id) FROM content_syncs) AND source_stamp IS NOT ?1""",
+                (content_stamp(),),
+            )
+            return None
+        _sync_domains(conn)
+        reading = _load_reading_content()
+        for (domain_id,) in conn.execute("SELECT DISTINCT domain_id FROM study_days").fetchall():
+            blob_id = _reading_blob_id(conn, reading.get(str(domain_id), reading.get("review")))
+            conn.execute(
+                "UPDATE study_days SET reading_blob_id = ? WHERE domain_id IS ? AND reading_blob_id IS NOT ?",
+                (blob_id, domain_id, blob_id),
+            )
         conn.execute(
-            """INSERT INTO quiz_questions
-            (domain_id, subtopic_id, stem, choice_a, choice_b, choice_c, choice_d, correct_answer, explanation, source)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'seeded')""",
-            (q["domain_id"], subtopic_id, q["stem"], q["choice_a"], q["choice_b"], q["choice_c"], q["choice_d"], q["correct_answer"], q["explanation"]),
+            """DELETE FROM reading_blobs WHERE id NOT IN
+               (SELECT reading_blob_id FROM study_days WHERE reading_blob_id IS NOT NULL)"""
         )
-    conn.commit()
-    conn.close()
+        subtopic_ids = _subtopic_ids(conn)
+        counts = {"inserted": 0, "updated": 0, "retired": 0}
+        moved = False
+        for table, columns, file, field in (
+            ("flashcards", FLASHCARD_COLUMNS, "flashcards.json", "flashcards"),
+            ("quiz_questions", QUESTION_COLUMNS, "questions.json", "questions"),
+        ):
+            records = json.loads((CONTENT_DIR / file).read_text())[field]
+            inserted, updated, retired, table_moved = _sync_records(conn, table, columns, records, subtopic_ids)
+            counts["inserted"] += inserted
+            counts["updated"] += updated
+            counts["retired"] += retired
+            moved = moved or table_moved
+        if moved:
+            rebuild_score_totals(db_path)
+        _record_sync(conn, version, **counts)
+    return counts
 
 
 def seed_all(db_path: str) -> None:
-    """Run all seed functions in order."""
-    if not is_seeded(db_path):
-        seed_domains(db_path)
-        seed_study_plan(db_path)
-        seed_flashcards(db_path)
-        seed_questions(db_path)
-    ensure_reading_content(db_path)
+    """Seed a new database, or sync an existing one to the current content.
+
+    Runs in one transaction, so an interrupted first run leaves nothing
+    behind and the next start seeds from scratch instead of finding a
+    half-seeded database. Progress databases are left alone; their content
+    database is rebuilt with ``build_content_db`` instead.
+    """
+    with connect(db_path) as conn:
+        if linked_content_path(db_path) is not None:
+            return
+        if not is_seeded(db_path):
+            seed_domains(db_path)
+            seed_study_plan(db_path)
+            seed_flashcards(db_path)
+            seed_questions(db_path)
+            seeded = sum(conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in RECORD_KEYS)
+            _record_sync(conn, content_hash(), inserted=seeded)
+        else:
+            sync_content(db_path)
+        ensure_reading_content(db_path)
+
+
+def _seeded_build(final_path: str, previous: str | None = None) -> str:
+    """Create and seed a scratch database next to ``final_path``; return its path.
+
+    Content rows of ``previous`` are copied first, so its ids carry over and
+    only the changes since are applied.
+    """
+    build_path = f"{final_path}.build"
+    for path in (build_path, f"{build_path}-wal", f"{build_path}-shm"):
+        Path(path).unlink(missing_ok=True)
+    init_db(build_path)
+    if previous is not None:
+        with connect(build_path) as conn:
+            conn.execute("ATTACH DATABASE ? AS previous", (_read_only_uri(previous),))
+            for table in CONTENT_TABLES:
+                new_columns = [row["name"] for row in conn.execute(f"PRAGMA main.table_info({table})")]
+                old_columns = {row["name"] for row in conn.execute(f"PRAGMA previous.table_info({table})")}
+                columns = ", ".join(c for c in new_columns if c in old_columns)
+                if columns:
+                    conn.execute(f"INSERT INTO main.{table} ({columns}) SELECT {columns} FROM previous.{table}")
+            conn.commit()
+            conn.execute("DETACH DATABASE previous")
+    seed_all(build_path)
+    return build_path
+
+
+def _publish_build(build_path: str, final_path: str) -> None:
+    """Compact ``build_path`` into a single rollback-journal file and move it into place."""
+    close_connection(build_path)
+    conn = get_connection(build_path)
+    conn.execute("PRAGMA journal_mode = delete")
+    conn.execute("VACUUM")
+    conn.close()
+    os.replace(build_path, final_path)
+
+
+def _read_only_uri(path: str) -> str:
+    return f"file:{quote(os.path.abspath(path))}?mode=ro&immutable=1"
+
+
+def _file_content_hash(path: str) -> str | None:
+    """Content version of the database file at ``path``, read without opening it for writing."""
+    if not Path(path).exists():
+        return None
+    try:
+        conn = sqlite3.connect(_read_only_uri(path), uri=True)
+    except sqlite3.Error:
+        return None
+    try:
+        row = conn.execute("SELECT content_hash FROM content_syncs ORDER BY id DESC LIMIT 1").fetchone()
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+def _is_content_table(name: str) -> bool:
+    """True for content tables and their search indexes, including FTS5 shadow tables."""
+    return name in CONTENT_TABLES or any(
+        name == index or name.startswith(f"{index}_") for index in CONTENT_SEARCH_INDEXES
+    )
+
+
+def build_content_db(content_path: str) -> None:
+    """Build or refresh the shared, read-only content database for progress databases.
+
+    It holds only the seeded content tables, vacuumed and in rollback-journal
+    mode so it is a single file that can be opened ``immutable``. Nothing is
+    done if it already holds the current content. An existing file is
+    rebuilt from its own rows plus the content changes, keeping ids stable
+    for the progress databases using it, and replaced atomically, so
+    processes that still have the old one attached keep reading it. The
+    empty progress database new learners start from is built alongside it.
+    See ``gcp_tutor.db.init_progress_db``.
+    """
+    build_progress_template(progress_template_path(content_path))
+    if _file_content_hash(content_path) == content_hash():
+        return
+    previous = content_path if Path(content_path).exists() else None
+    build_path = _seeded_build(content_path, previous)
+    with connect(build_path) as conn:
+        conn.execute("PRAGMA foreign_keys = OFF")
+        objects = conn.execute(
+            """SELECT type, name FROM sqlite_master
+               WHERE type IN ('table', 'view', 'trigger') AND name NOT LIKE 'sqlite_%'"""
+        ).fetchall()
+        for kind, name in objects:
+            if kind == "trigger" or not _is_content_table(name):
+                conn.execute(f"DROP {kind.upper()} IF EXISTS {name}")
+    _publish_build(build_path, content_path)
+
+
+def build_template(template_path: str = TEMPLATE_PATH) -> None:
+    """Build the ready-seeded database that ``install_template`` copies on first run.
+
+    Run at build time (``python -m gcp_tutor.seed``) after changing content
+    or the schema; a stale template is ignored in favour of live seeding.
+    """
+    _publish_build(_seeded_build(template_path), template_path)
+
+
+def install_template(db_path: str, template_path: str | None = None) -> bool:
+    """Create ``db_path`` as a copy of the prebuilt template (``TEMPLATE_PATH`` by default).
+
+    Returns False, leaving ``db_path`` alone, when the database already
+    exists or the template is missing or was built from other content or
+    another schema version; the caller then seeds live with ``seed_all``.
+    """
+    template_path = template_path or TEMPLATE_PATH
+    if Path(db_path).exists() or _file_content_hash(template_path) != content_hash():
+        return False
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    copy_path = f"{db_path}.copy"
+    shutil.copyfile(template_path, copy_path)
+    os.replace(copy_path, db_path)
+    return True
+
+
+if __name__ == "__main__":
+    build_template()
+    print(f"Wrote {TEMPLATE_PATH}")
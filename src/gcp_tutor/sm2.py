@@ -1,4 +1,22 @@
 """SM-2 spaced repetition algorithm."""
+from array import array
+
+# NumPy takes longer to import than the rest of the app, so it is loaded on
+# the first batch call (see load_numpy); None means it is not installed.
+NOT_LOADED = object()
+np = NOT_LOADED
+
+
+def load_numpy():
+    """Import NumPy on first use and return it, or None if it is not installed."""
+    global np
+    if np is NOT_LOADED:
+        try:
+            import numpy
+        except ImportError:  # pragma: no cover - exercised when NumPy is absent
+            numpy = None
+        np = numpy
+    return np
 
 
 def sm2_update(
@@ -41,3 +59,61 @@ def sm2_update(
         "repetitions": new_repetitions,
         "ease_factor": round(new_ef, 2),
     }
+
+
+def batch_array(values, typecode: str):
+    """Return ``values`` as a batch array: NumPy when available, else ``array``.
+
+    ``typecode`` is ``"i"`` for integers or ``"d"`` for floats.
+    """
+    if load_numpy() is not None:
+        return np.asarray(values, dtype=np.int64 if typecode == "i" else np.float64)
+    return array(typecode, values)
+
+
+def sm2_update_batch(quality, repetitions, ease_factor, interval) -> tuple:
+    """Vectorized ``sm2_update`` over parallel sequences of card state.
+
+    Args:
+        quality: Ratings 0-5, one per card
+        repetitions: Consecutive correct reviews per card
+        ease_factor: Current ease factors
+        interval: Current intervals in days
+
+    Returns:
+        Tuple of (interval, repetitions, ease_factor) batch arrays, matching
+        what ``sm2_update`` would return for each card.
+    """
+    if load_numpy() is not None:
+        return _sm2_batch_numpy(quality, repetitions, ease_factor, interval)
+    return _sm2_batch_array(quality, repetitions, ease_factor, interval)
+
+
+def _sm2_batch_numpy(quality, repetitions, ease_factor, interval) -> tuple:
+    q = np.asarray(quality, dtype=np.int64)
+    reps = np.asarray(repetitions, dtype=np.int64)
+    ef = np.asarray(ease_factor, dtype=np.float64)
+    ivl = np.asarray(interval, dtype=np.int64)
+
+    miss = 5 - q
+    new_ef = np.maximum(1.3, ef + (0.1 - miss * (0.08 + miss * 0.02)))
+    # np.round and round() both round half to even
+    grown = np.round(ivl * ef).astype(np.int64)
+    new_interval = np.where(reps == 0, 1, np.where(reps == 1, 6, grown))
+    correct = q >= 3
+    new_interval = np.where(correct, new_interval, 1)
+    new_reps = np.where(correct, reps + 1, 0)
+    return new_interval, new_reps, np.round(new_ef, 2)
+
+
+def _sm2_batch_array(quality, repetitions, ease_factor, interval) -> tuple:
+    n = len(quality)
+    new_interval = array("i", [0]) * n
+    new_reps = array("i", [0]) * n
+    new_ef = array("d", [0.0]) * n
+    for i in range(n):
+        result = sm2_update(quality[i], repetitions[i], ease_factor[i], interval[i])
+        new_interval[i] = result["interval"]
+        new_reps[i] = result["repetitions"]
+        new_ef[i] = result["ease_factor"]
+    return new_interval, new_reps, new_ef
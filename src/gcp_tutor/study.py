@@ -1,177 +1,185 @@
 """Study session management and progress tracking."""
 from datetime import date, datetime
-from gcp_tutor.db import get_connection
+from gcp_tutor.db import DEFAULT_USER_ID, connect
 
 
-def get_setting(db_path: str, key: str, default: str = None) -> str | None:
-    conn = get_connection(db_path)
-    row = conn.execute("SELECT value FROM user_settings WHERE key = ?", (key,)).fetchone()
-    conn.close()
+# Settings that track progress through the plan, cleared by reset_all_progress.
+PROGRESS_SETTINGS = ("start_date", "current_session_day")
+
+
+def get_setting(db_path: str, key: str, default: str = None, user_id: int = DEFAULT_USER_ID) -> str | None:
+    with connect(db_path) as conn:
+        row = conn.execute(
+            "SELECT value FROM user_settings WHERE user_id = ? AND key = ?", (user_id, key),
+        ).fetchone()
     return row["value"] if row else default
 
 
-def set_setting(db_path: str, key: str, value: str) -> None:
-    conn = get_connection(db_path)
-    conn.execute(
-        "INSERT INTO user_settings (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value=?",
-        (key, value, value),
-    )
-    conn.commit()
-    conn.close()
+def set_setting(db_path: str, key: str, value: str, user_id: int = DEFAULT_USER_ID) -> None:
+    with connect(db_path) as conn:
+        conn.execute(
+            """INSERT INTO user_settings (user_id, key, value) VALUES (?, ?, ?)
+            ON CONFLICT(user_id, key) DO UPDATE SET value=excluded.value""",
+            (user_id, key, value),
+        )
 
 
-def get_start_date(db_path: str) -> str | None:
-    return get_setting(db_path, "start_date")
+def get_start_date(db_path: str, user_id: int = DEFAULT_USER_ID) -> str | None:
+    return get_setting(db_path, "start_date", user_id=user_id)
 
 
-def get_current_session_day(db_path: str) -> int:
-    return int(get_setting(db_path, "current_session_day", "1"))
+def get_current_session_day(db_path: str, user_id: int = DEFAULT_USER_ID) -> int:
+    return int(get_setting(db_path, "current_session_day", "1", user_id=user_id))
 
 
 def get_total_sessions(db_path: str) -> int:
-    conn = get_connection(db_path)
-    count = conn.execute("SELECT COUNT(*) FROM study_days").fetchone()[0]
-    conn.close()
-    return count
-
-
-def get_todays_plan(db_path: str) -> dict | None:
-    day = get_current_session_day(db_path)
-    conn = get_connection(db_path)
-    plan = conn.execute(
-        """SELECT sd.*, d.name as domain_name
-        FROM study_days sd
-        LEFT JOIN domains d ON sd.domain_id = d.id
-        WHERE sd.day_number = ?""",
-        (day,),
-    ).fetchone()
-    conn.close()
+    with connect(db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM study_days").fetchone()[0]
+
+
+def get_todays_plan(db_path: str, user_id: int = DEFAULT_USER_ID) -> dict | None:
+    day = get_current_session_day(db_path, user_id)
+    with connect(db_path) as conn:
+        plan = conn.execute(
+            """SELECT sd.*, d.name as domain_name, rb.body as reading_content
+            FROM study_days sd
+            LEFT JOIN domains d ON sd.domain_id = d.id
+            LEFT JOIN reading_blobs rb ON rb.id = sd.reading_blob_id
+            WHERE sd.day_number = ?""",
+            (day,),
+        ).fetchone()
     return dict(plan) if plan else None
 
 
-def start_new_session(db_path: str) -> dict:
-    day = get_current_session_day(db_path)
-    if not get_start_date(db_path):
-        set_setting(db_path, "start_date", date.today().isoformat())
-    conn = get_connection(db_path)
-    existing = conn.execute("SELECT * FROM user_progress WHERE session_day = ?", (day,)).fetchone()
-    if existing:
-        conn.close()
-        return dict(existing)
-    conn.execute(
-        "INSERT INTO user_progress (session_day, calendar_date) VALUES (?, ?)",
-        (day, date.today().isoformat()),
-    )
-    conn.commit()
-    progress = conn.execute("SELECT * FROM user_progress WHERE session_day = ?", (day,)).fetchone()
-    conn.close()
+def start_new_session(db_path: str, user_id: int = DEFAULT_USER_ID) -> dict:
+    day = get_current_session_day(db_path, user_id)
+    if not get_start_date(db_path, user_id):
+        set_setting(db_path, "start_date", date.today().isoformat(), user_id=user_id)
+    with connect(db_path) as conn:
+        existing = conn.execute(
+            "SELECT * FROM user_progress WHERE user_id = ? AND session_day = ?", (user_id, day),
+        ).fetchone()
+        if existing:
+            return dict(existing)
+        conn.execute(
+            "INSERT INTO user_progress (user_id, session_day, calendar_date) VALUES (?, ?, ?)",
+            (user_id, day, date.today().isoformat()),
+        )
+        progress = conn.execute(
+            "SELECT * FROM user_progress WHERE user_id = ? AND session_day = ?", (user_id, day),
+        ).fetchone()
     return dict(progress)
 
 
-def complete_session_component(db_path: str, session_day: int, component: str) -> None:
+def complete_session_component(
+    db_path: str, session_day: int, component: str, user_id: int = DEFAULT_USER_ID,
+) -> None:
     valid = {"reading": "reading_done", "flashcards": "flashcards_done", "quiz": "quiz_done"}
     column = valid[component]
-    conn = get_connection(db_path)
-    conn.execute(
-        f"UPDATE user_progress SET {column} = 1 WHERE session_day = ?",
-        (session_day,),
-    )
-    # Check if all components done
-    progress = conn.execute("SELECT * FROM user_progress WHERE session_day = ?", (session_day,)).fetchone()
-    if progress["reading_done"] and progress["flashcards_done"] and progress["quiz_done"]:
-        conn.execute(
-            "UPDATE user_progress SET completed_at = ? WHERE session_day = ?",
-            (datetime.now().isoformat(), session_day),
-        )
-        # Advance session day
+    with connect(db_path) as conn:
         conn.execute(
-            "INSERT INTO user_settings (key, value) VALUES ('current_session_day', ?) ON CONFLICT(key) DO UPDATE SET value=?",
-            (str(session_day + 1), str(session_day + 1)),
+            f"UPDATE user_progress SET {column} = 1 WHERE user_id = ? AND session_day = ?",
+            (user_id, session_day),
         )
-    conn.commit()
-    conn.close()
-
-
-def complete_reading(db_path: str, session_day: int) -> None:
+        # Check if all components done
+        progress = conn.execute(
+            "SELECT * FROM user_progress WHERE user_id = ? AND session_day = ?", (user_id, session_day),
+        ).fetchone()
+        if progress["reading_done"] and progress["flashcards_done"] and progress["quiz_done"]:
+            conn.execute(
+                "UPDATE user_progress SET completed_at = ? WHERE user_id = ? AND session_day = ?",
+                (datetime.now().isoformat(), user_id, session_day),
+            )
+            # Advance session day
+            set_setting(db_path, "current_session_day", str(session_day + 1), user_id=user_id)
+
+
+def complete_reading(db_path: str, session_day: int, user_id: int = DEFAULT_USER_ID) -> None:
     """Convenience wrapper for completing the reading component."""
-    complete_session_component(db_path, session_day, "reading")
+    complete_session_component(db_path, session_day, "reading", user_id=user_id)
 
 
-def get_calendar_days_elapsed(db_path: str) -> int:
-    start = get_start_date(db_path)
+def get_calendar_days_elapsed(db_path: str, user_id: int = DEFAULT_USER_ID) -> int:
+    start = get_start_date(db_path, user_id)
     if not start:
         return 0
     start_date = date.fromisoformat(start)
     return (date.today() - start_date).days + 1
 
 
-def get_completed_sessions(db_path: str) -> int:
-    conn = get_connection(db_path)
-    count = conn.execute("SELECT COUNT(*) FROM user_progress WHERE completed_at IS NOT NULL").fetchone()[0]
-    conn.close()
-    return count
-
-
-def reset_all_progress(db_path: str) -> None:
-    """Reset all user progress back to day 1."""
-    conn = get_connection(db_path)
-    conn.execute("DELETE FROM user_progress")
-    conn.execute("DELETE FROM quiz_results")
-    conn.execute("DELETE FROM flashcard_results")
-    conn.execute("DELETE FROM session_items")
-    conn.execute("DELETE FROM user_settings")
-    conn.execute(
-        "UPDATE flashcards SET ease_factor = 2.5, interval = 0, repetitions = 0, next_review = NULL"
-    )
-    conn.commit()
-    conn.close()
-
-
-def record_session_item(db_path: str, session_day: int, component: str, item_id: int) -> None:
-    conn = get_connection(db_path)
-    conn.execute(
-        "INSERT OR IGNORE INTO session_items (session_day, component, item_id) VALUES (?, ?, ?)",
-        (session_day, component, item_id),
-    )
-    conn.commit()
-    conn.close()
-
-
-def get_completed_session_items(db_path: str, session_day: int, component: str) -> set[int]:
-    conn = get_connection(db_path)
-    rows = conn.execute(
-        "SELECT item_id FROM session_items WHERE session_day = ? AND component = ?",
-        (session_day, component),
-    ).fetchall()
-    conn.close()
+def get_completed_sessions(db_path: str, user_id: int = DEFAULT_USER_ID) -> int:
+    with connect(db_path) as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM user_progress WHERE user_id = ? AND completed_at IS NOT NULL", (user_id,),
+        ).fetchone()[0]
+
+
+def reset_all_progress(db_path: str, user_id: int = DEFAULT_USER_ID) -> None:
+    """Reset a user's progress back to day 1.
+
+    Preferences such as the scheduler and its FSRS weights are kept.
+    """
+    with connect(db_path) as conn:
+        for table in ("user_progress", "quiz_results", "flashcard_results", "session_items"):
+            conn.execute(f"DELETE FROM {table} WHERE user_id = ?", (user_id,))
+        conn.execute(
+            f"DELETE FROM user_settings WHERE user_id = ? AND key IN ({', '.join('?' * len(PROGRESS_SETTINGS))})",
+            (user_id, *PROGRESS_SETTINGS),
+        )
+        conn.execute(
+            """UPDATE card_state SET ease_factor = 2.5, interval = 0, repetitions = 0, next_review = NULL,
+            stability = NULL, difficulty = NULL WHERE user_id = ?""",
+            (user_id,),
+        )
+
+
+def record_session_item(
+    db_path: str, session_day: int, component: str, item_id: int, user_id: int = DEFAULT_USER_ID,
+) -> None:
+    with connect(db_path) as conn:
+        conn.execute(
+            """INSERT OR IGNORE INTO session_items (user_id, session_day, component, item_id)
+            VALUES (?, ?, ?, ?)""",
+            (user_id, session_day, component, item_id),
+        )
+
+
+def get_completed_session_items(
+    db_path: str, session_day: int, component: str, user_id: int = DEFAULT_USER_ID,
+) -> set[int]:
+    with connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT item_id FROM session_items WHERE user_id = ? AND session_day = ? AND component = ?",
+            (user_id, session_day, component),
+        ).fetchall()
     return {row["item_id"] for row in rows}
 
 
-def clear_session_items(db_path: str, session_day: int) -> None:
-    conn = get_connection(db_path)
-    conn.execute("DELETE FROM session_items WHERE session_day = ?", (session_day,))
-    conn.commit()
-    conn.close()
+def clear_session_items(db_path: str, session_day: int, user_id: int = DEFAULT_USER_ID) -> None:
+    with connect(db_path) as conn:
+        conn.execute(
+            "DELETE FROM session_items WHERE user_id = ? AND session_day = ?", (user_id, session_day),
+        )
 
 
-def restart_session(db_path: str, session_day: int) -> None:
-    conn = get_connection(db_path)
-    conn.execute(
-        "UPDATE user_progress SET reading_done = 0, flashcards_done = 0, quiz_done = 0, completed_at = NULL WHERE session_day = ?",
-        (session_day,),
-    )
-    conn.execute("DELETE FROM session_items WHERE session_day = ?", (session_day,))
-    conn.commit()
-    conn.close()
+def restart_session(db_path: str, session_day: int, user_id: int = DEFAULT_USER_ID) -> None:
+    with connect(db_path) as conn:
+        conn.execute(
+            """UPDATE user_progress SET reading_done = 0, flashcards_done = 0, quiz_done = 0, completed_at = NULL
+            WHERE user_id = ? AND session_day = ?""",
+            (user_id, session_day),
+        )
+        conn.execute(
+            "DELETE FROM session_items WHERE user_id = ? AND session_day = ?", (user_id, session_day),
+        )
 
 
-def is_session_incomplete(db_path: str) -> bool:
-    day = get_current_session_day(db_path)
-    conn = get_connection(db_path)
-    progress = conn.execute(
-        "SELECT * FROM user_progress WHERE session_day = ?", (day,)
-    ).fetchone()
-    conn.close()
+def is_session_incomplete(db_path: str, user_id: int = DEFAULT_USER_ID) -> bool:
+    day = get_current_session_day(db_path, user_id)
+    with connect(db_path) as conn:
+        progress = conn.execute(
+            "SELECT * FROM user_progress WHERE user_id = ? AND session_day = ?", (user_id, day)
+        ).fetchone()
     if not progress:
         return False
     return not (progress["reading_done"] and progress["flashcards_done"] and progress["quiz_done"])
@@ -0,0 +1,51 @@
+"""Learner accounts.
+
+Every progress, result and card-state row belongs to a user. Functions
+across the package take ``user_id`` (default: the built-in ``default``
+user, id 1), so a single-learner install never needs to create one.
+"""
+from datetime import datetime
+
+from gcp_tutor.db import DEFAULT_USER_ID, connect
+
+
+def create_user(db_path: str, name: str) -> int:
+    """Add a learner and return their id. Raises ValueError if the name is taken."""
+    with connect(db_path) as conn:
+        if conn.execute("SELECT 1 FROM users WHERE name = ?", (name,)).fetchone():
+            raise ValueError(f"User already exists: {name}")
+        cursor = conn.execute(
+            "INSERT INTO users (name, created_at) VALUES (?, ?)", (name, datetime.now().isoformat()),
+        )
+        return cursor.lastrowid
+
+
+def get_user_id(db_path: str, name: str) -> int | None:
+    with connect(db_path) as conn:
+        row = conn.execute("SELECT id FROM users WHERE name = ?", (name,)).fetchone()
+    return row["id"] if row else None
+
+
+def get_or_create_user(db_path: str, name: str) -> int:
+    user_id = get_user_id(db_path, name)
+    return user_id if user_id is not None else create_user(db_path, name)
+
+
+def list_users(db_path: str) -> list:
+    with connect(db_path) as conn:
+        return conn.execute("SELECT * FROM users ORDER BY id").fetchall()
+
+
+def delete_user(db_path: str, user_id: int) -> None:
+    """Remove a learner and all of their progress. The default user cannot be removed."""
+    if user_id == DEFAULT_USER_ID:
+        raise ValueError("The default user cannot be deleted")
+    with connect(db_path) as conn:
+        # Progress databases run without foreign keys (see db.init_progress_db),
+        # so nothing is left to cascade.
+        for table in (
+            "quiz_results", "flashcard_results", "user_progress", "card_state", "user_settings",
+            "session_items", "quiz_score_totals", "flashcard_score_totals", "result_counters",
+        ):
+            conn.execute(f"DELETE FROM {table} WHERE user_id = ?", (user_id,))
+        conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
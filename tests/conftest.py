@@ -1,9 +1,47 @@
 import os
 import sqlite3
+import subprocess
+import sys
 import pytest
+from gcp_tutor.cache import clear_cache
+from gcp_tutor.db import close_connections, init_db
+from gcp_tutor.seed import seed_all
 
 @pytest.fixture
 def tmp_db(tmp_path):
     """Provide a temporary SQLite database path for tests."""
     db_path = str(tmp_path / "test_tutor.db")
-    return db_path
+    yield db_path
+    close_connections()
+    clear_cache()
+
+
+@pytest.fixture
+def seeded_db(tmp_db):
+    """``tmp_db`` initialized and seeded with the bundled domains, cards, questions and reading."""
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    return tmp_db
+
+
+def import_times(module: str) -> dict[str, int]:
+    """Cumulative import time in microseconds per module for ``import module``, from ``python -X importtime``.
+
+    Also used by benchmarks/bench_startup.py.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines()[1:]:
+        _self, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.fixture(name="import_times")
+def import_times_fixture():
+    """``import_times`` for tests measuring startup cost."""
+    return import_times
+
@@ -1,3 +1,5 @@
+import subprocess
+import sys
 import pytest
 from unittest.mock import patch
 from gcp_tutor.app import SessionExitRequested, session_prompt, session_int_prompt
@@ -201,3 +203,97 @@ def test_cmd_study_restart_clears_progress(tmp_db):
     # Reading should have been reset (not done)
     progress = start_new_session(tmp_db)
     assert not progress["reading_done"]
+
+
+def test_run_flashcard_session_with_recorder_flushes_on_exit(tmp_db):
+    """Buffered results reach the DB when the user quits mid-session."""
+    from gcp_tutor.recorder import ResultRecorder
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    start_new_session(tmp_db)
+    conn = get_connection(tmp_db)
+    cards = [dict(c) for c in conn.execute("SELECT * FROM flashcards LIMIT 2").fetchall()]
+    conn.close()
+
+    with ResultRecorder(tmp_db) as recorder:
+        with patch("gcp_tutor.app.Prompt.ask", side_effect=["", "4", "q"]):
+            with pytest.raises(SessionExitRequested):
+                run_flashcard_session(tmp_db, cards, session_day=1, recorder=recorder)
+        assert recorder.pending == 0
+
+    done = get_completed_session_items(tmp_db, 1, "flashcard")
+    assert done == {cards[0]["id"]}
+
+
+def test_cmd_search_highlights_matches(tmp_db):
+    from gcp_tutor.app import cmd_search, console
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    with patch("gcp_tutor.app.Prompt.ask", return_value="pub/sub"), console.capture() as capture:
+        cmd_search(tmp_db)
+    output = capture.get()
+    assert "Pub" in output and "\x02" not in output
+
+
+def test_cmd_import_folder_reports_errors(tmp_db, tmp_path):
+    from gcp_tutor.app import cmd_import, console
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    (tmp_path / "a.txt").write_text("IAM roles")
+    (tmp_path / "b.json").write_text("{broken")
+    with patch("gcp_tutor.app.Prompt.ask", return_value=str(tmp_path)), console.capture() as capture:
+        cmd_import(tmp_db)
+    output = capture.get()
+    assert "Imported 1 of 2 files" in output and "b.json" in output
+    with patch("gcp_tutor.app.Prompt.ask", return_value=str(tmp_path)), console.capture() as capture:
+        cmd_import(tmp_db)
+    assert "Skipped 1 already imported" in capture.get()
+
+
+def test_cmd_import_makes_flashcards(tmp_db, tmp_path):
+    from gcp_tutor.app import cmd_import, console
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    note = tmp_path / "vpc.md"
+    note.write_text("- **VPC peering**: connects two VPC networks over internal IPs.\n")
+    with patch("gcp_tutor.app.Prompt.ask", return_value=str(note)), console.capture() as capture:
+        cmd_import(tmp_db)
+    assert "Made 1 flashcards" in capture.get()
+
+
+# Generous enough for a slow CI machine; a regression such as importing
+# NumPy or an import-format parser at startup roughly doubles the time.
+STARTUP_IMPORT_BUDGET_MS = 400
+
+
+def test_app_import_stays_off_heavy_modules(import_times):
+    times = import_times("gcp_tutor.app")
+    for heavy in ("numpy", "yaml", "PyPDF2", "docx", "bs4", "rich.table", "rich.progress"):
+        assert heavy not in times, f"{heavy} is imported at startup"
+    assert times["gcp_tutor.app"] / 1000 < STARTUP_IMPORT_BUDGET_MS
+
+
+def test_app_import_defers_command_modules():
+    deferred = ["cardgen", "importer", "linking", "recorder", "search", "users"]
+    code = "import sys, gcp_tutor.app; print(' '.join(sorted(sys.modules)))"
+    loaded = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.split()
+    assert [name for name in deferred if f"gcp_tutor.{name}" in loaded] == []
+
+
+@pytest.mark.parametrize("built", [False, True])
+def test_first_launch_with_or_without_template(tmp_path, monkeypatch, built):
+    from gcp_tutor import seed
+    from gcp_tutor.app import main
+    from gcp_tutor.seed import build_template, is_seeded
+    template = str(tmp_path / "template.db")
+    if built:
+        build_template(template)
+    monkeypatch.setattr(seed, "TEMPLATE_PATH", template)
+    db_path = str(tmp_path / "tutor.db")
+    with patch("gcp_tutor.app.Prompt.ask", return_value="quit"):
+        with patch("gcp_tutor.seed.seed_domains", wraps=seed.seed_domains) as seed_domains:
+            main(["--db", db_path])
+    assert is_seeded(db_path)
+    # Seeded live from the JSON files only when there is no template to copy
+    assert seed_domains.called is not built
+
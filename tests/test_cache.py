@@ -0,0 +1,157 @@
+"""Tests for the generation-keyed result cache."""
+from gcp_tutor import dashboard
+from gcp_tutor.cache import cached
+from gcp_tutor.db import init_db, get_connection, connect
+from gcp_tutor.seed import seed_all
+from gcp_tutor.study import start_new_session, complete_session_component, reset_all_progress
+from gcp_tutor.quiz import get_quiz_questions, record_quiz_answer, get_quiz_score
+from gcp_tutor.flashcards import get_due_cards, record_flashcard_result
+from gcp_tutor.dashboard import get_dashboard_snapshot
+from gcp_tutor.review import get_weak_domains
+
+
+def _count_calls(monkeypatch):
+    calls = []
+    original = dashboard._domain_totals
+
+    def counting(conn, table, user_id):
+        calls.append(table)
+        return original(conn, table, user_id)
+
+    monkeypatch.setattr(dashboard, "_domain_totals", counting)
+    return calls
+
+
+def test_repeat_view_is_served_from_cache(tmp_db, monkeypatch):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    calls = _count_calls(monkeypatch)
+    first = get_dashboard_snapshot(tmp_db)
+    second = get_dashboard_snapshot(tmp_db)
+    assert first == second
+    assert len(calls) == 2  # quiz + flashcard totals, computed once
+
+
+def test_cached_result_cannot_be_mutated(tmp_db):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    get_dashboard_snapshot(tmp_db).domain_scores.clear()
+    assert get_dashboard_snapshot(tmp_db).domain_scores
+
+
+def test_quiz_answer_invalidates(tmp_db):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    assert get_quiz_score(tmp_db) == 0.0
+    assert get_weak_domains(tmp_db) == []
+    q = get_quiz_questions(tmp_db, count=1)[0]
+    record_quiz_answer(tmp_db, q["id"], "Z" if q["correct_answer"] != "Z" else "A")
+    assert get_quiz_score(tmp_db) == 0.0
+    assert len(get_weak_domains(tmp_db)) == 1
+    record_quiz_answer(tmp_db, q["id"], q["correct_answer"])
+    assert get_quiz_score(tmp_db) == 50.0
+
+
+def test_flashcard_result_invalidates(tmp_db):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    assert get_dashboard_snapshot(tmp_db).flashcards_reviewed == 0
+    card = get_due_cards(tmp_db, limit=1)[0]
+    record_flashcard_result(tmp_db, card["id"], 5)
+    assert get_dashboard_snapshot(tmp_db).flashcards_reviewed == 1
+
+
+def test_session_progress_and_reset_invalidate(tmp_db):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    start_new_session(tmp_db)
+    assert get_dashboard_snapshot(tmp_db).sessions_completed == 0
+    for component in ("reading", "flashcards", "quiz"):
+        complete_session_component(tmp_db, 1, component)
+    snap = get_dashboard_snapshot(tmp_db)
+    assert snap.sessions_completed == 1
+    assert snap.session_day == 2
+    reset_all_progress(tmp_db)
+    snap = get_dashboard_snapshot(tmp_db)
+    assert snap.sessions_completed == 0
+    assert snap.session_day == 1
+
+
+def test_write_from_other_connection_invalidates(tmp_db):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    assert get_quiz_score(tmp_db) == 0.0
+    conn = get_connection(tmp_db)
+    conn.execute(
+        "INSERT INTO quiz_results (quiz_question_id, user_answer, is_correct, answered_at) VALUES (1, 'A', 1, 'now')"
+    )
+    conn.commit()
+    conn.close()
+    assert get_quiz_score(tmp_db) == 100.0
+
+
+def test_uncommitted_reads_are_not_cached(tmp_db):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    calls = []
+
+    @cached
+    def read(db_path):
+        calls.append(1)
+        return get_quiz_score.__wrapped__(db_path)
+
+    try:
+        with connect(tmp_db) as conn:
+            conn.execute(
+                "INSERT INTO quiz_results (quiz_question_id, user_answer, is_correct, answered_at) VALUES (1, 'A', 1, 'x')"
+            )
+            assert read(tmp_db) == 100.0
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert read(tmp_db) == 0.0
+    assert len(calls) == 2
+
+
+def test_review_forecast_is_cached_until_card_state_changes(tmp_db, monkeypatch):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    calls = []
+    original = dashboard.forecast_reviews
+
+    def counting(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(dashboard, "forecast_reviews", counting)
+    first = dashboard.get_review_forecast(tmp_db)
+    assert dashboard.get_review_forecast(tmp_db) == first
+    assert len(calls) == 1
+    conn = get_connection(tmp_db)
+    conn.execute("UPDATE card_state SET next_review = '2000-01-01' WHERE flashcard_id = 1")
+    conn.commit()
+    conn.close()
+    dashboard.get_review_forecast(tmp_db)
+    assert len(calls) == 2
+
+
+def test_cache_keeps_only_the_most_recently_used_results(tmp_db, monkeypatch):
+    from gcp_tutor import cache
+    init_db(tmp_db)
+    monkeypatch.setattr(cache, "MAX_RESULTS", 3)
+    calls = []
+
+    @cached
+    def read(db_path, n):
+        calls.append(n)
+        return n
+
+    for n in range(5):
+        read(tmp_db, n)
+    assert len(cache._results) == 3
+    read(tmp_db, 2)  # still cached, and now the most recently used
+    read(tmp_db, 5)
+    read(tmp_db, 2)
+    read(tmp_db, 3)  # evicted by 5
+    assert calls == [0, 1, 2, 3, 4, 5, 3]
+    assert len(cache._results) == 3
@@ -0,0 +1,83 @@
+import pytest
+from gcp_tutor import cardgen, importer
+from gcp_tutor.db import init_progress_db, connect
+from gcp_tutor.seed import build_content_db, sync_content
+from gcp_tutor.importer import import_file
+from gcp_tutor.cardgen import extract_cards, front_key, generate_flashcards
+
+NOTES = """# Networking
+
+- **Cloud NAT gateway**: lets instances without external IPs reach the internet.
+* VPC peering - connects two VPC networks so they share internal routing.
+1. Firewall rules: are stateful and applied by network tags or service accounts.
+Note: check quotas before the exam.
+See https://cloud.google.com/vpc for details.
+
+**Private Google Access** allows VMs with only internal IPs to reach Google APIs. Use **Cloud Router** to exchange routes over BGP.
+- **Sole-tenant node in Compute Engine**: a physical server dedicated to your project's VMs.
+"""
+
+
+def test_extract_cards_finds_definitions_and_clozes():
+    cards = [(front, back) for _offset, front, back in extract_cards(NOTES)]
+    assert cards == [
+        ("What is Cloud NAT gateway?", "Lets instances without external IPs reach the internet."),
+        ("What is VPC peering?", "Connects two VPC networks so they share internal routing."),
+        ("What are Firewall rules?", "Are stateful and applied by network tags or service accounts."),
+        ("What is Sole-tenant node in Compute Engine?", "A physical server dedicated to your project's VMs."),
+        ("What is Private Google Access?",
+         "Private Google Access allows VMs with only internal IPs to reach Google APIs."),
+        ("Fill in the blank: Use _____ to exchange routes over BGP.", "Cloud Router"),
+    ]
+
+
+def test_front_key_ignores_case_punctuation_and_articles():
+    assert front_key("What is a Sole-tenant node?") == front_key("what is sole tenant node")
+    assert front_key("What is Cloud NAT?") != front_key("What is Cloud DNS?")
+
+
+def test_generate_flashcards_streams_chunks_and_dedupes(seeded_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(importer, "CHUNK_CHARS", 120)
+    monkeypatch.setattr(cardgen, "CARD_BATCH_SIZE", 2)
+    note = tmp_path / "networking.md"
+    note.write_text(NOTES)
+    imported = import_file(seeded_db, str(note))
+    assert imported["chunks"] > 1
+    counts = generate_flashcards(seeded_db, [imported["id"]])
+    # The sole-tenant card duplicates a seeded front.
+    assert counts == {"created": 5, "duplicates": 1, "uncategorized": 0}
+    with connect(seeded_db) as conn:
+        cards = conn.execute("SELECT * FROM flashcards WHERE source = 'imported' ORDER BY id").fetchall()
+        states = conn.execute(
+            "SELECT COUNT(*) FROM card_state WHERE flashcard_id IN (SELECT id FROM flashcards WHERE source = 'imported')"
+        ).fetchone()[0]
+    assert [card["front"] for card in cards] == [
+        "What is Cloud NAT gateway?", "What is VPC peering?", "What are Firewall rules?",
+        "What is Private Google Access?", "Fill in the blank: Use _____ to exchange routes over BGP.",
+    ]
+    assert all(card["domain_id"] for card in cards)
+    assert any(card["subtopic_id"] for card in cards)
+    assert states == len(cards)
+
+    assert generate_flashcards(seeded_db) == {"created": 0, "duplicates": 6, "uncategorized": 0}
+
+
+def test_content_sync_keeps_imported_cards(seeded_db, tmp_path, monkeypatch):
+    note = tmp_path / "networking.md"
+    note.write_text(NOTES)
+    import_file(seeded_db, str(note))
+    created = generate_flashcards(seeded_db)["created"]
+    with connect(seeded_db) as conn:
+        conn.execute("DELETE FROM content_syncs")
+    sync_content(seeded_db)
+    with connect(seeded_db) as conn:
+        live = conn.execute("SELECT COUNT(*) FROM flashcards WHERE source = 'imported' AND NOT retired").fetchone()[0]
+    assert live == created
+
+
+def test_progress_database_cannot_take_cards(tmp_db, tmp_path):
+    content_db = str(tmp_path / "content.db")
+    build_content_db(content_db)
+    init_progress_db(tmp_db, content_db)
+    with pytest.raises(RuntimeError, match="shared content database"):
+        generate_flashcards(tmp_db)
@@ -1,12 +1,15 @@
 # tests/test_dashboard.py
 from gcp_tutor.db import init_db, get_connection
 from gcp_tutor.seed import seed_all
-from gcp_tutor.study import start_new_session, complete_session_component
+from gcp_tutor.study import (
+    start_new_session, complete_session_component,
+    get_current_session_day, get_total_sessions, get_calendar_days_elapsed,
+)
 from gcp_tutor.quiz import record_quiz_answer, get_quiz_questions
 from gcp_tutor.flashcards import get_due_cards, record_flashcard_result
 from gcp_tutor.dashboard import (
     calc_readiness_score, get_readiness_label, get_domain_scores,
-    get_study_stats,
+    get_study_stats, get_dashboard_snapshot,
 )
 
 def test_readiness_score_zero_with_no_data(tmp_db):
@@ -47,3 +50,34 @@ def test_get_study_stats(tmp_db):
     assert "sessions_completed" in stats
     assert "flashcards_reviewed" in stats
     assert "quizzes_taken" in stats
+
+def test_dashboard_snapshot_matches_individual_functions(tmp_db):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    start_new_session(tmp_db)
+    complete_session_component(tmp_db, 1, "reading")
+    for i, q in enumerate(get_quiz_questions(tmp_db, count=8)):
+        record_quiz_answer(tmp_db, q["id"], q["correct_answer"] if i % 3 else "Z")
+    for i, card in enumerate(get_due_cards(tmp_db, limit=6)):
+        record_flashcard_result(tmp_db, card["id"], 4 if i % 2 else 2)
+    snap = get_dashboard_snapshot(tmp_db)
+    stats = get_study_stats(tmp_db)
+    assert snap.readiness_score == calc_readiness_score(tmp_db)
+    assert snap.readiness_label == get_readiness_label(snap.readiness_score)
+    assert snap.domain_scores == get_domain_scores(tmp_db)
+    assert snap.session_day == get_current_session_day(tmp_db)
+    assert snap.total_sessions == get_total_sessions(tmp_db)
+    assert snap.calendar_days == get_calendar_days_elapsed(tmp_db)
+    assert snap.sessions_completed == stats["sessions_completed"]
+    assert snap.flashcards_reviewed == stats["flashcards_reviewed"]
+    assert snap.quizzes_taken == stats["quizzes_taken"]
+    assert snap.avg_quiz_score == stats["avg_quiz_score"]
+
+
+def test_dashboard_snapshot_empty(tmp_db):
+    init_db(tmp_db)
+    snap = get_dashboard_snapshot(tmp_db)
+    assert snap.readiness_score == 0.0
+    assert snap.session_day == 1
+    assert snap.calendar_days == 0
+    assert snap.domain_scores == []
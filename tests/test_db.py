@@ -1,5 +1,14 @@
 """Tests for database initialization and connection management."""
-from gcp_tutor.db import init_db, get_connection
+import os
+
+import pytest
+from gcp_tutor.db import (
+    init_db, get_connection, connect, close_connections,
+    get_schema_version, migrate, MIGRATIONS, SCHEMA_VERSION,
+    ConnectionProfile, DEFAULT_PROFILE, LEGACY_PROFILE, MIN_CACHE_KIB,
+    set_connection_profile, rebuild_score_totals, init_progress_db, CONTENT_TABLES,
+    pack_text, unpack_text, storage_report, PROGRESS_PAGE_SIZE, progress_template_path,
+)
 
 
 def test_init_db_creates_tables(tmp_db):
@@ -44,3 +53,427 @@ def test_get_connection_returns_row_factory(tmp_db):
     row = conn.execute("SELECT key, value FROM user_settings WHERE key='test'").fetchone()
     assert row["key"] == "test"
     conn.close()
+
+
+def test_connect_reuses_connection_per_thread(tmp_db):
+    init_db(tmp_db)
+    with connect(tmp_db) as first:
+        pass
+    with connect(tmp_db) as second:
+        assert second is first
+
+
+def test_connect_uses_separate_connection_per_thread(tmp_db):
+    import threading
+    init_db(tmp_db)
+    with connect(tmp_db) as main_conn:
+        pass
+    seen = []
+
+    def worker():
+        with connect(tmp_db) as conn:
+            seen.append(conn)
+            conn.execute("INSERT INTO user_settings (key, value) VALUES ('thread', 'yes')")
+        close_connections()
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+    assert seen[0] is not main_conn
+    with connect(tmp_db) as conn:
+        row = conn.execute("SELECT value FROM user_settings WHERE key = 'thread'").fetchone()
+    assert row["value"] == "yes"
+
+
+def test_connect_rolls_back_on_error(tmp_db):
+    init_db(tmp_db)
+    try:
+        with connect(tmp_db) as conn:
+            conn.execute("INSERT INTO user_settings (key, value) VALUES ('a', '1')")
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    with connect(tmp_db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM user_settings").fetchone()[0] == 0
+
+
+def test_connect_nested_blocks_share_transaction(tmp_db):
+    init_db(tmp_db)
+    try:
+        with connect(tmp_db) as outer:
+            with connect(tmp_db) as inner:
+                inner.execute("INSERT INTO user_settings (key, value) VALUES ('a', '1')")
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    with connect(tmp_db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM user_settings").fetchone()[0] == 0
+
+
+def test_close_connections_opens_fresh_connection(tmp_db):
+    init_db(tmp_db)
+    with connect(tmp_db) as first:
+        pass
+    close_connections()
+    with connect(tmp_db) as second:
+        assert second is not first
+
+
+def test_init_db_sets_schema_version(tmp_db):
+    init_db(tmp_db)
+    conn = get_connection(tmp_db)
+    assert get_schema_version(conn) == SCHEMA_VERSION
+    conn.close()
+
+
+def test_init_db_creates_hot_path_indexes(tmp_db):
+    init_db(tmp_db)
+    conn = get_connection(tmp_db)
+    indexes = {
+        row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")
+    }
+    assert {
+        "idx_card_state_user_next_review", "idx_card_state_user_domain_next_review",
+        "idx_quiz_questions_domain", "idx_quiz_questions_subtopic",
+        "idx_quiz_results_question", "idx_flashcard_results_card",
+    }.issubset(indexes)
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM quiz_questions WHERE domain_id = 3"
+    ).fetchall()
+    assert any("idx_quiz_questions_domain" in row[3] for row in plan)
+    plan = conn.execute(
+        """EXPLAIN QUERY PLAN SELECT flashcard_id, next_review FROM card_state
+        WHERE user_id = 1 AND retired = 0 AND (next_review IS NULL OR next_review <= '2026-01-01')
+        ORDER BY next_review LIMIT 15"""
+    ).fetchall()
+    assert any("idx_card_state_user_next_review" in row[3] for row in plan)
+    assert not any("TEMP B-TREE" in row[3] for row in plan)
+    conn.close()
+
+
+def test_migrate_adopts_unversioned_database(tmp_db):
+    """A database created before versioning keeps its data and gains indexes."""
+    conn = get_connection(tmp_db)
+    conn.executescript(MIGRATIONS[0])
+    conn.execute("INSERT INTO user_settings (key, value) VALUES ('keep', 'me')")
+    conn.commit()
+    assert get_schema_version(conn) == 0
+    applied = migrate(conn)
+    assert applied == SCHEMA_VERSION
+    assert get_schema_version(conn) == SCHEMA_VERSION
+    row = conn.execute("SELECT value FROM user_settings WHERE key = 'keep'").fetchone()
+    assert row["value"] == "me"
+    assert migrate(conn) == 0
+    conn.close()
+
+
+def test_migrate_rejects_newer_database(tmp_db):
+    conn = get_connection(tmp_db)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+    with pytest.raises(RuntimeError):
+        migrate(conn)
+    conn.close()
+
+
+def _seed_results(db_path):
+    from gcp_tutor.seed import seed_all
+    from gcp_tutor.quiz import get_quiz_questions, record_quiz_answer
+    from gcp_tutor.flashcards import get_due_cards, record_flashcard_result
+    seed_all(db_path)
+    for i, q in enumerate(get_quiz_questions(db_path, count=6, seed=1)):
+        record_quiz_answer(db_path, q["id"], q["correct_answer"] if i % 2 else "Z")
+    for i, card in enumerate(get_due_cards(db_path, limit=5, seed=1)):
+        record_flashcard_result(db_path, card["id"], 5 if i % 2 else 1)
+
+
+def _totals(db_path):
+    with connect(db_path) as conn:
+        return {
+            table: sorted(tuple(r) for r in conn.execute(f"SELECT * FROM {table} WHERE attempts > 0"))
+            for table in ("quiz_score_totals", "flashcard_score_totals")
+        }
+
+
+def test_score_totals_track_results(tmp_db):
+    init_db(tmp_db)
+    _seed_results(tmp_db)
+    with connect(tmp_db) as conn:
+        quiz = conn.execute("SELECT SUM(attempts), SUM(correct) FROM quiz_score_totals").fetchone()
+        flash = conn.execute("SELECT SUM(attempts), SUM(correct) FROM flashcard_score_totals").fetchone()
+    assert tuple(quiz) == (6, 3)
+    assert tuple(flash) == (5, 2)
+
+
+def test_score_totals_follow_deletes(tmp_db):
+    init_db(tmp_db)
+    _seed_results(tmp_db)
+    with connect(tmp_db) as conn:
+        conn.execute("DELETE FROM quiz_results")
+        conn.execute("DELETE FROM flashcard_results")
+    assert _totals(tmp_db) == {"quiz_score_totals": [], "flashcard_score_totals": []}
+
+
+def test_rebuild_score_totals_matches_triggers(tmp_db):
+    init_db(tmp_db)
+    _seed_results(tmp_db)
+    expected = _totals(tmp_db)
+    with connect(tmp_db) as conn:
+        conn.execute("UPDATE quiz_score_totals SET attempts = 99")
+    rebuild_score_totals(tmp_db)
+    assert _totals(tmp_db) == expected
+
+
+def test_quizzes_taken_counter_counts_distinct_times(tmp_db):
+    from gcp_tutor.seed import seed_all
+    init_db(tmp_db)
+    seed_all(tmp_db)
+
+    def taken():
+        with connect(tmp_db) as conn:
+            return conn.execute(
+                "SELECT value FROM result_counters WHERE user_id = 1 AND name = 'quizzes_taken'"
+            ).fetchone()[0]
+
+    with connect(tmp_db) as conn:
+        for at in ("2026-01-01T10:00", "2026-01-01T10:00", "2026-01-02T10:00", None):
+            conn.execute(
+                "INSERT INTO quiz_results (quiz_question_id, user_answer, is_correct, answered_at) VALUES (1, 'A', 1, ?)",
+                (at,),
+            )
+    assert taken() == 2
+    with connect(tmp_db) as conn:
+        conn.execute("DELETE FROM quiz_results WHERE id = 1")
+    assert taken() == 2
+    with connect(tmp_db) as conn:
+        conn.execute("DELETE FROM quiz_results WHERE id = 2")
+    assert taken() == 1
+
+
+def test_migration_moves_single_learner_data_to_default_user(tmp_db):
+    """A version 4 database keeps its progress, now owned by user 1, with totals backfilled."""
+    conn = get_connection(tmp_db)
+    for version, script in enumerate(MIGRATIONS[:4], start=1):
+        conn.executescript(f"BEGIN; {script}; PRAGMA user_version = {version}; COMMIT;")
+    conn.executescript("""
+        INSERT INTO domains (id, name, section_number, exam_weight) VALUES (1, 'D', 1, 1.0);
+        INSERT INTO quiz_questions (id, domain_id, stem, choice_a, choice_b, choice_c, choice_d, correct_answer)
+            VALUES (1, 1, 'Q', 'a', 'b', 'c', 'd', 'A');
+        INSERT INTO flashcards (id, domain_id, front, back, interval, repetitions, next_review)
+            VALUES (1, 1, 'F', 'B', 6, 2, '2030-01-01');
+        INSERT INTO quiz_results (quiz_question_id, user_answer, is_correct, answered_at)
+            VALUES (1, 'A', 1, 't1'), (1, 'B', 0, 't2');
+        INSERT INTO flashcard_results (flashcard_id, rating, reviewed_at) VALUES (1, 4, '2029-12-26');
+        INSERT INTO user_settings (key, value) VALUES ('current_session_day', '3');
+    """)
+    migrate(conn)
+    state = conn.execute("SELECT * FROM card_state WHERE user_id = 1 AND flashcard_id = 1").fetchone()
+    assert (state["interval"], state["repetitions"], state["next_review"]) == (6, 2, "2030-01-01")
+    assert tuple(conn.execute(
+        "SELECT attempts, correct FROM quiz_score_totals WHERE user_id = 1"
+    ).fetchone()) == (2, 1)
+    assert tuple(conn.execute(
+        "SELECT attempts, correct FROM flashcard_score_totals WHERE user_id = 1"
+    ).fetchone()) == (1, 1)
+    assert conn.execute(
+        "SELECT value FROM result_counters WHERE user_id = 1 AND name = 'quizzes_taken'"
+    ).fetchone()[0] == 2
+    assert conn.execute(
+        "SELECT value FROM user_settings WHERE user_id = 1 AND key = 'current_session_day'"
+    ).fetchone()[0] == "3"
+    conn.close()
+
+
+def test_default_profile_enables_wal(tmp_db):
+    init_db(tmp_db)
+    conn = get_connection(tmp_db)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == DEFAULT_PROFILE.busy_timeout_ms
+    assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+    conn.close()
+
+
+def test_profile_can_be_overridden(tmp_db):
+    conn = get_connection(tmp_db, profile=LEGACY_PROFILE)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 2  # FULL
+    conn.close()
+
+
+def test_set_connection_profile(tmp_db):
+    custom = ConnectionProfile(busy_timeout_ms=1234)
+    set_connection_profile(custom)
+    try:
+        conn = get_connection(tmp_db)
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 1234
+        conn.close()
+    finally:
+        set_connection_profile(DEFAULT_PROFILE)
+
+
+def test_cache_size_scales_with_database(tmp_db):
+    init_db(tmp_db)
+    conn = get_connection(tmp_db)
+    # A tiny database gets the minimum cache
+    assert conn.execute("PRAGMA cache_size").fetchone()[0] == -MIN_CACHE_KIB
+    conn.close()
+
+
+@pytest.fixture
+def content_db(tmp_path):
+    from gcp_tutor.seed import build_content_db
+    path = str(tmp_path / "content.db")
+    build_content_db(path)
+    return path
+
+
+def test_progress_db_reads_content_from_attached_db(tmp_db, content_db):
+    init_progress_db(tmp_db, content_db)
+    close_connections()
+    conn = get_connection(tmp_db)
+    tables = {row[0] for row in conn.execute("SELECT name FROM main.sqlite_master WHERE type = 'table'")}
+    assert tables.isdisjoint(CONTENT_TABLES)
+    assert conn.execute("SELECT COUNT(*) FROM domains").fetchone()[0] == 5
+    cards = conn.execute("SELECT COUNT(*) FROM flashcards").fetchone()[0]
+    assert conn.execute("SELECT COUNT(*) FROM card_state WHERE user_id = 1").fetchone()[0] == cards
+    conn.close()
+
+
+def test_progress_db_keeps_content_read_only(tmp_db, content_db):
+    import sqlite3
+    init_progress_db(tmp_db, content_db)
+    with pytest.raises(sqlite3.OperationalError):
+        with connect(tmp_db) as conn:
+            conn.execute("UPDATE flashcards SET front = 'changed'")
+
+
+def test_progress_db_triggers_span_databases(tmp_db, content_db):
+    from gcp_tutor.quiz import record_quiz_answer
+    from gcp_tutor.users import create_user
+    init_progress_db(tmp_db, content_db)
+    record_quiz_answer(tmp_db, 1, "A")
+    user_id = create_user(tmp_db, "alice")
+    close_connections()
+    conn = get_connection(tmp_db)
+    assert conn.execute("SELECT SUM(attempts) FROM quiz_score_totals").fetchone()[0] == 1
+    cards = conn.execute("SELECT COUNT(*) FROM flashcards").fetchone()[0]
+    assert conn.execute("SELECT COUNT(*) FROM card_state WHERE user_id = ?", (user_id,)).fetchone()[0] == cards
+    conn.close()
+
+
+def test_new_progress_db_is_a_small_copy_of_the_template(tmp_db, content_db):
+    init_progress_db(tmp_db, content_db)
+    close_connections()
+    # Includes the card state of the default learner for every flashcard.
+    assert os.path.getsize(tmp_db) <= 80 * 1024
+    conn = get_connection(tmp_db)
+    assert conn.execute("PRAGMA page_size").fetchone()[0] == PROGRESS_PAGE_SIZE
+    conn.close()
+
+
+def test_progress_db_without_template_gets_the_same_schema(tmp_path, content_db):
+    def schema(path):
+        conn = get_connection(path)
+        rows = set(conn.execute("SELECT type, name, sql FROM main.sqlite_master"))
+        conn.close()
+        return rows
+
+    copied, migrated = str(tmp_path / "copied.db"), str(tmp_path / "migrated.db")
+    init_progress_db(copied, content_db)
+    os.remove(progress_template_path(content_db))
+    init_progress_db(migrated, content_db)
+    close_connections()
+    assert schema(copied) == schema(migrated)
+
+
+def test_init_progress_db_refuses_seeded_db(tmp_db, content_db):
+    from gcp_tutor.seed import seed_all
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    with pytest.raises(ValueError):
+        init_progress_db(tmp_db, content_db)
+
+
+def test_progress_db_migrations_skip_content_tables(tmp_db, content_db):
+    """A progress database split at schema version 8 upgrades without its content tables."""
+    import sqlite3
+    conn = sqlite3.connect(tmp_db)
+    for version, script in enumerate(MIGRATIONS[:8], start=1):
+        conn.executescript(f"BEGIN; {script}; PRAGMA user_version = {version}; COMMIT;")
+    conn.executescript("""
+        CREATE TABLE content_link (
+            id INTEGER PRIMARY KEY CHECK (id = 1), path TEXT NOT NULL, synced_through INTEGER NOT NULL DEFAULT 0
+        );
+        DROP TRIGGER trg_quiz_results_insert;
+        DROP TRIGGER trg_quiz_results_delete;
+        DROP TRIGGER trg_flashcard_results_insert;
+        DROP TRIGGER trg_flashcard_results_delete;
+        DROP TRIGGER trg_users_insert_card_state;
+        DROP TABLE quiz_questions;
+        DROP TABLE flashcards;
+        DROP TABLE study_days;
+        DROP TABLE subtopics;
+        DROP TABLE domains;
+    """)
+    # Before schema 9, synced_through held the highest flashcard id seen; any
+    # value may match the content database's latest content_syncs id.
+    conn.execute("INSERT INTO content_link (id, path, synced_through) VALUES (1, ?, 1)", (content_db,))
+    conn.commit()
+    conn.close()
+    init_db(tmp_db)
+    conn = get_connection(tmp_db)
+    assert get_schema_version(conn) == SCHEMA_VERSION
+    cards = conn.execute("SELECT COUNT(*) FROM flashcards").fetchone()[0]
+    assert cards >= 190
+    assert conn.execute("SELECT COUNT(*) FROM card_state WHERE user_id = 1").fetchone()[0] == cards
+    tables = {row[0] for row in conn.execute("SELECT name FROM main.sqlite_master WHERE type = 'table'")}
+    assert tables.isdisjoint(CONTENT_TABLES)
+    conn.close()
+
+
+def test_pack_text_compresses_only_large_text(monkeypatch):
+    assert pack_text("short") == "short"
+    large = "gcloud compute instances list\n" * 200
+    packed = pack_text(large)
+    assert isinstance(packed, bytes) and len(packed) < len(large) // 10
+    assert unpack_text(packed) == large
+    assert unpack_text("short") == "short" and unpack_text(None) is None
+    monkeypatch.setattr("gcp_tutor.db.COMPRESS_MIN_BYTES", None)
+    assert pack_text(large) == large
+
+
+def test_migration_shares_reading_and_compresses_chunks(tmp_db):
+    """A version 13 database keeps each reading text once and packs its large chunks."""
+    from gcp_tutor.search import search
+    conn = get_connection(tmp_db)
+    for version, script in enumerate(MIGRATIONS[:13], start=1):
+        conn.executescript(f"BEGIN; {script}; PRAGMA user_version = {version}; COMMIT;")
+    large = "Cloud NAT gives private instances outbound access. " * 100
+    conn.executescript(f"""
+        INSERT INTO domains (id, name, section_number, exam_weight) VALUES (1, 'D', 1, 1.0);
+        INSERT INTO study_days (day_number, domain_id, reading_content) VALUES
+            (1, 1, 'Quokka reading'), (2, 1, 'Quokka reading'), (3, NULL, 'Review reading'), (4, NULL, NULL);
+        INSERT INTO imported_content (id, filename) VALUES (1, 'notes.md');
+        INSERT INTO imported_chunks (import_id, seq, text) VALUES (1, 0, 'small'), (1, 1, '{large}');
+    """)
+    migrate(conn)
+    assert [row[0] for row in conn.execute("SELECT body FROM reading_blobs ORDER BY id")] == [
+        "Quokka reading", "Review reading",
+    ]
+    assert [tuple(row) for row in conn.execute("SELECT day_number, reading_blob_id FROM study_days ORDER BY id")] == [
+        (1, 1), (2, 1), (3, 2), (4, None),
+    ]
+    assert [row[0] for row in conn.execute("SELECT typeof(text) FROM imported_chunks ORDER BY seq")] == ["text", "blob"]
+    assert conn.execute("SELECT unpack_text(text) FROM imported_chunks WHERE seq = 1").fetchone()[0] == large
+    conn.close()
+    assert [(hit["source"], hit["id"]) for hit in search(tmp_db, "quokka")] == [("reading", 1)]
+    assert [hit["part"] for hit in search(tmp_db, "outbound")] == [1]
+
+
+def test_storage_report_groups_indexes_under_tables(tmp_db):
+    init_db(tmp_db)
+    report = storage_report(tmp_db)
+    assert "imported_chunks_fts" in report and "reading_blobs_fts" in report
+    assert not any(name.startswith("imported_chunks_fts_") for name in report)
+    assert not any(name.startswith("idx_") for name in report)
+    assert list(report.values()) == sorted(report.values(), reverse=True)
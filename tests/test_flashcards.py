@@ -2,7 +2,7 @@
 from datetime import date, timedelta
 from gcp_tutor.db import init_db, get_connection
 from gcp_tutor.seed import seed_domains, seed_flashcards
-from gcp_tutor.flashcards import get_due_cards, get_cards_for_domain, record_flashcard_result
+from gcp_tutor.flashcards import get_due_cards, get_cards_for_domain, record_flashcard_result, reschedule_deck
 
 
 def test_get_due_cards_returns_new_cards(tmp_db):
@@ -31,7 +31,7 @@ def test_record_flashcard_result_updates_sm2(tmp_db):
     card_id = cards[0]["id"]
     record_flashcard_result(tmp_db, card_id, rating=4)
     conn = get_connection(tmp_db)
-    updated = conn.execute("SELECT * FROM flashcards WHERE id = ?", (card_id,)).fetchone()
+    updated = conn.execute("SELECT * FROM card_state WHERE user_id = 1 AND flashcard_id = ?", (card_id,)).fetchone()
     assert updated["repetitions"] == 1
     assert updated["interval"] == 1
     result = conn.execute("SELECT * FROM flashcard_results WHERE flashcard_id = ?", (card_id,)).fetchone()
@@ -57,7 +57,7 @@ def test_get_due_cards_all_reviewed_future(tmp_db):
     # Set all cards to have a future review date
     future = (date.today() + timedelta(days=30)).isoformat()
     conn = get_connection(tmp_db)
-    conn.execute("UPDATE flashcards SET next_review = ?", (future,))
+    conn.execute("UPDATE card_state SET next_review = ?", (future,))
     conn.commit()
     conn.close()
     cards = get_due_cards(tmp_db, limit=10)
@@ -73,8 +73,8 @@ def test_get_due_cards_past_review_date_included(tmp_db):
     future = (date.today() + timedelta(days=30)).isoformat()
     past = (date.today() - timedelta(days=1)).isoformat()
     conn = get_connection(tmp_db)
-    conn.execute("UPDATE flashcards SET next_review = ?", (future,))
-    conn.execute("UPDATE flashcards SET next_review = ? WHERE id = 1", (past,))
+    conn.execute("UPDATE card_state SET next_review = ?", (future,))
+    conn.execute("UPDATE card_state SET next_review = ? WHERE flashcard_id = 1", (past,))
     conn.commit()
     conn.close()
     cards = get_due_cards(tmp_db, limit=10)
@@ -90,8 +90,8 @@ def test_get_due_cards_today_review_date_included(tmp_db):
     future = (date.today() + timedelta(days=30)).isoformat()
     today = date.today().isoformat()
     conn = get_connection(tmp_db)
-    conn.execute("UPDATE flashcards SET next_review = ?", (future,))
-    conn.execute("UPDATE flashcards SET next_review = ? WHERE id = 1", (today,))
+    conn.execute("UPDATE card_state SET next_review = ?", (future,))
+    conn.execute("UPDATE card_state SET next_review = ? WHERE flashcard_id = 1", (today,))
     conn.commit()
     conn.close()
     cards = get_due_cards(tmp_db, limit=10)
@@ -123,7 +123,7 @@ def test_get_cards_for_domain_respects_review_date(tmp_db):
     seed_flashcards(tmp_db)
     future = (date.today() + timedelta(days=30)).isoformat()
     conn = get_connection(tmp_db)
-    conn.execute("UPDATE flashcards SET next_review = ? WHERE domain_id = 3", (future,))
+    conn.execute("UPDATE card_state SET next_review = ? WHERE domain_id = 3", (future,))
     conn.commit()
     conn.close()
     cards = get_cards_for_domain(tmp_db, domain_id=3, limit=5)
@@ -142,7 +142,7 @@ def test_record_flashcard_result_rating_zero_resets(tmp_db):
     # Second review (blackout)
     record_flashcard_result(tmp_db, card_id, rating=0)
     conn = get_connection(tmp_db)
-    updated = conn.execute("SELECT * FROM flashcards WHERE id = ?", (card_id,)).fetchone()
+    updated = conn.execute("SELECT * FROM card_state WHERE user_id = 1 AND flashcard_id = ?", (card_id,)).fetchone()
     assert updated["repetitions"] == 0
     assert updated["interval"] == 1
     conn.close()
@@ -157,7 +157,7 @@ def test_record_flashcard_result_rating_five_increases_ease(tmp_db):
     card_id = cards[0]["id"]
     record_flashcard_result(tmp_db, card_id, rating=5)
     conn = get_connection(tmp_db)
-    updated = conn.execute("SELECT * FROM flashcards WHERE id = ?", (card_id,)).fetchone()
+    updated = conn.execute("SELECT * FROM card_state WHERE user_id = 1 AND flashcard_id = ?", (card_id,)).fetchone()
     assert updated["ease_factor"] > 2.5
     conn.close()
 
@@ -173,19 +173,19 @@ def test_record_flashcard_multiple_reviews_updates_interval(tmp_db):
     # Review 1: interval should be 1
     record_flashcard_result(tmp_db, card_id, rating=4)
     conn = get_connection(tmp_db)
-    c = conn.execute("SELECT * FROM flashcards WHERE id = ?", (card_id,)).fetchone()
+    c = conn.execute("SELECT * FROM card_state WHERE user_id = 1 AND flashcard_id = ?", (card_id,)).fetchone()
     assert c["interval"] == 1
     assert c["repetitions"] == 1
 
     # Review 2: interval should be 6
     record_flashcard_result(tmp_db, card_id, rating=4)
-    c = conn.execute("SELECT * FROM flashcards WHERE id = ?", (card_id,)).fetchone()
+    c = conn.execute("SELECT * FROM card_state WHERE user_id = 1 AND flashcard_id = ?", (card_id,)).fetchone()
     assert c["interval"] == 6
     assert c["repetitions"] == 2
 
     # Review 3: interval = round(6 * ease_factor)
     record_flashcard_result(tmp_db, card_id, rating=4)
-    c = conn.execute("SELECT * FROM flashcards WHERE id = ?", (card_id,)).fetchone()
+    c = conn.execute("SELECT * FROM card_state WHERE user_id = 1 AND flashcard_id = ?", (card_id,)).fetchone()
     assert c["interval"] > 6
     assert c["repetitions"] == 3
     conn.close()
@@ -220,7 +220,7 @@ def test_record_flashcard_result_sets_next_review(tmp_db):
     card_id = cards[0]["id"]
     record_flashcard_result(tmp_db, card_id, rating=4)
     conn = get_connection(tmp_db)
-    updated = conn.execute("SELECT next_review FROM flashcards WHERE id = ?", (card_id,)).fetchone()
+    updated = conn.execute("SELECT next_review FROM card_state WHERE user_id = 1 AND flashcard_id = ?", (card_id,)).fetchone()
     expected = (date.today() + timedelta(days=1)).isoformat()
     assert updated["next_review"] == expected
     conn.close()
@@ -235,3 +235,46 @@ def test_get_cards_for_each_domain_returns_correct_domain(tmp_db):
         cards = get_cards_for_domain(tmp_db, domain_id=domain_id, limit=3)
         assert len(cards) > 0, f"Domain {domain_id} should have cards"
         assert all(c["domain_id"] == domain_id for c in cards)
+
+
+def test_reschedule_deck_replays_history(tmp_db):
+    """Replaying history reproduces the state built up one rating at a time."""
+    init_db(tmp_db)
+    seed_domains(tmp_db)
+    seed_flashcards(tmp_db)
+    for rating in (4, 5, 3, 1, 4):
+        record_flashcard_result(tmp_db, 1, rating)
+    record_flashcard_result(tmp_db, 2, 5)
+    conn = get_connection(tmp_db)
+    before = {
+        row["flashcard_id"]: tuple(row) for row in conn.execute(
+            "SELECT flashcard_id, ease_factor, interval, repetitions, next_review FROM card_state"
+        )
+    }
+    conn.execute("UPDATE card_state SET ease_factor = 9, interval = 99, repetitions = 9, next_review = '2000-01-01'")
+    conn.commit()
+    conn.close()
+
+    updated = reschedule_deck(tmp_db)
+
+    conn = get_connection(tmp_db)
+    after = {
+        row["flashcard_id"]: tuple(row) for row in conn.execute(
+            "SELECT flashcard_id, ease_factor, interval, repetitions, next_review FROM card_state"
+        )
+    }
+    conn.close()
+    assert updated == len(before)
+    assert after == before
+
+
+def test_reschedule_deck_empty_history_resets_cards(tmp_db):
+    init_db(tmp_db)
+    seed_domains(tmp_db)
+    seed_flashcards(tmp_db)
+    conn = get_connection(tmp_db)
+    conn.execute("UPDATE card_state SET repetitions = 3, next_review = '2999-01-01' WHERE flashcard_id = 1")
+    conn.commit()
+    conn.close()
+    reschedule_deck(tmp_db)
+    assert any(c["id"] == 1 for c in get_due_cards(tmp_db, limit=1000))
@@ -0,0 +1,83 @@
+# tests/test_forecast.py
+from datetime import date, timedelta
+import pytest
+from gcp_tutor.db import get_connection
+from gcp_tutor.flashcards import record_flashcard_result
+from gcp_tutor.scheduler import set_scheduler
+from gcp_tutor.forecast import estimate_recall_probabilities, forecast_reviews
+
+
+def test_estimate_recall_probabilities_smooths_to_prior(seeded_db):
+    record_flashcard_result(seeded_db, 1, rating=5)
+    record_flashcard_result(seeded_db, 2, rating=0)
+    probs = estimate_recall_probabilities(seeded_db)
+    assert probs[0] == pytest.approx(0.5)
+    assert 0.5 < probs[1] < 1
+    assert 0 < probs[2] < 0.5
+
+
+def test_forecast_shape(seeded_db):
+    forecast = forecast_reviews(seeded_db, days=10, trials=20, seed=1)
+    assert len(forecast) == 10
+    assert forecast[0]["date"] == date.today().isoformat()
+    for day in forecast:
+        assert day["low"] <= day["high"]
+
+
+def test_forecast_new_cards_introduced_gradually(seeded_db):
+    forecast = forecast_reviews(seeded_db, days=3, trials=10, new_per_day=5, seed=1)
+    # Day 0 only sees the first batch of new cards
+    assert forecast[0]["expected"] == 5
+
+
+def test_forecast_ignores_cards_due_after_horizon(seeded_db):
+    conn = get_connection(seeded_db)
+    far = (date.today() + timedelta(days=365)).isoformat()
+    conn.execute("UPDATE card_state SET next_review = ?, interval = 100, repetitions = 5", (far,))
+    conn.commit()
+    conn.close()
+    forecast = forecast_reviews(seeded_db, days=30, trials=10, seed=1)
+    assert all(day["expected"] == 0 for day in forecast)
+
+
+def test_forecast_counts_due_card_on_its_day(seeded_db):
+    conn = get_connection(seeded_db)
+    far = (date.today() + timedelta(days=365)).isoformat()
+    conn.execute("UPDATE card_state SET next_review = ?, interval = 100, repetitions = 5", (far,))
+    soon = (date.today() + timedelta(days=3)).isoformat()
+    conn.execute("UPDATE card_state SET next_review = ? WHERE flashcard_id = 1", (soon,))
+    conn.commit()
+    conn.close()
+    forecast = forecast_reviews(seeded_db, days=5, trials=50, seed=1)
+    assert forecast[3]["expected"] == 1
+    assert sum(day["expected"] for day in forecast[:3]) == 0
+
+
+def test_forecast_scalar_path_matches_expectations(seeded_db, monkeypatch):
+    """Without NumPy (or with a non-SM-2 scheduler) the scalar path is used."""
+    import gcp_tutor.forecast as forecast_mod
+    monkeypatch.setattr(forecast_mod, "np", None)
+    forecast = forecast_reviews(seeded_db, days=3, trials=5, new_per_day=5, seed=1)
+    assert forecast[0]["expected"] == 5
+
+
+def test_forecast_with_fsrs_scheduler(seeded_db):
+    set_scheduler(seeded_db, "fsrs")
+    forecast = forecast_reviews(seeded_db, days=3, trials=5, new_per_day=5, seed=1)
+    assert forecast[0]["expected"] == 5
+
+
+@pytest.mark.parametrize("recall", [0.0, 1.0])
+def test_forecast_numpy_path_matches_scheduler_when_outcomes_are_certain(seeded_db, monkeypatch, recall):
+    import gcp_tutor.forecast as forecast_mod
+    conn = get_connection(seeded_db)
+    conn.execute(
+        """UPDATE card_state SET next_review = date('now', '+' || (flashcard_id % 9) || ' days'),
+        interval = flashcard_id % 7 + 1, repetitions = flashcard_id % 4, ease_factor = 1.3 + (flashcard_id % 5) * 0.3"""
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(forecast_mod, "estimate_recall_probabilities", lambda db_path, user_id: {0: recall})
+    vectorized = forecast_reviews(seeded_db, days=30, trials=3, seed=1)
+    monkeypatch.setattr(forecast_mod, "np", None)
+    assert forecast_reviews(seeded_db, days=30, trials=3, seed=1) == vectorized
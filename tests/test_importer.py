@@ -1,8 +1,13 @@
 # tests/test_importer.py
+import os
 from pathlib import Path
+import pytest
 from gcp_tutor.db import init_db, get_connection
 from gcp_tutor.seed import seed_domains
-from gcp_tutor.importer import read_file_content, categorize_content, import_file
+from gcp_tutor.importer import (
+    CLASSIFIER, KeywordCategorizer, read_file_content, categorize_content, classify_content,
+    import_file, iter_import_chunks,
+)
 
 def test_read_txt_file(tmp_path):
     f = tmp_path / "notes.txt"
@@ -32,6 +37,29 @@ def test_categorize_iam_content():
     domain_id = categorize_content(text)
     assert domain_id == 5  # Access & security
 
+def test_categorize_weights_keyword_frequency():
+    text = "kubectl " * 20 + "IAM service account"
+    assert categorize_content(text) == 3
+    scores = classify_content(text)
+    assert list(scores) == [3, 5]
+    assert sum(scores.values()) == pytest.approx(1)
+
+def test_categorize_matches_keywords_at_word_start():
+    assert classify_content("William submits a proposal") == {}
+    assert categorize_content("Grant custom roles to the team") == 5
+    assert classify_content("nothing relevant here") == {}
+
+def test_keyword_counts_leave_longer_keywords_whole():
+    counts = CLASSIFIER.count("Custom roles, a role and Cloud Run on a cloudy day")
+    assert counts == {"custom role": 1, "role": 1, "cloud run": 1}
+
+def test_keyword_counts_cover_the_whole_document():
+    categorizer = KeywordCategorizer()
+    categorizer.feed("kubectl " * 1000)
+    categorizer.feed("IAM service account " * 1000)
+    assert categorizer.counts == {"kubectl": 1000, "iam": 1000, "service account": 1000}
+    assert categorizer.domain_id == 5
+
 def test_import_file(tmp_path, tmp_db):
     init_db(tmp_db)
     seed_domains(tmp_db)
@@ -41,5 +69,218 @@ def test_import_file(tmp_path, tmp_db):
     conn = get_connection(tmp_db)
     imported = conn.execute("SELECT * FROM imported_content").fetchall()
     assert len(imported) == 1
-    assert "Cloud Monitoring" in imported[0]["content_text"]
+    chunks = conn.execute("SELECT text FROM imported_chunks WHERE import_id = ?", (imported[0]["id"],)).fetchall()
+    assert "Cloud Monitoring" in chunks[0]["text"]
+    conn.close()
+
+def test_large_chunks_are_stored_compressed(tmp_path, tmp_db):
+    init_db(tmp_db)
+    seed_domains(tmp_db)
+    f = tmp_path / "study.txt"
+    text = "Cloud Monitoring alerts help ensure operational success.\n" * 100
+    f.write_text(text)
+    imported = import_file(tmp_db, str(f))
+    conn = get_connection(tmp_db)
+    stored = conn.execute("SELECT text FROM imported_chunks").fetchone()[0]
     conn.close()
+    assert isinstance(stored, bytes) and len(stored) < len(text) // 10
+    assert "".join(iter_import_chunks(tmp_db, imported["id"])) == text
+
+from gcp_tutor.importer import find_import_files, import_directory
+
+
+def _notes_dir(tmp_path):
+    notes = tmp_path / "notes"
+    (notes / "gke").mkdir(parents=True)
+    (notes / "iam.txt").write_text("IAM roles and service accounts control access.")
+    (notes / "gke" / "pools.md").write_text("kubectl and GKE node pools autoscale with kubernetes.")
+    (notes / "broken.json").write_text("{not json")
+    (notes / "photo.png").write_bytes(b"\x89PNG")
+    return notes
+
+
+def test_find_import_files_walks_directories_and_globs(tmp_path):
+    notes = _notes_dir(tmp_path)
+    assert [p.name for p in find_import_files(str(notes))] == ["broken.json", "pools.md", "iam.txt"]
+    assert [p.name for p in find_import_files(str(notes / "**" / "*.md"))] == ["pools.md"]
+
+
+def test_import_directory_parallel(tmp_path, tmp_db):
+    init_db(tmp_db)
+    seed_domains(tmp_db)
+    notes = _notes_dir(tmp_path)
+    seen = []
+    result = import_directory(tmp_db, str(notes), workers=2, batch_size=1, progress=seen.append)
+    assert sorted(r["filename"] for r in result["imported"]) == ["gke/pools.md", "iam.txt"]
+    assert [e["filename"] for e in result["errors"]] == ["broken.json"]
+    assert "JSONDecodeError" in result["errors"][0]["error"]
+    assert len(seen) == 3
+    conn = get_connection(tmp_db)
+    rows = dict(conn.execute("SELECT filename, domain_id FROM imported_content").fetchall())
+    conn.close()
+    assert rows == {"gke/pools.md": 3, "iam.txt": 5}
+
+
+def test_import_directory_serial_matches_parallel(tmp_path, tmp_db):
+    init_db(tmp_db)
+    seed_domains(tmp_db)
+    notes = _notes_dir(tmp_path)
+    parallel_db = str(tmp_path / "parallel.db")
+    init_db(parallel_db)
+    seed_domains(parallel_db)
+    serial = import_directory(tmp_db, str(notes), workers=1)
+    parallel = import_directory(parallel_db, str(notes), workers=3)
+    summary = lambda result: sorted((r["filename"], r["domain_id"], r["length"], r["chunks"]) for r in result["imported"])
+    assert summary(serial) == summary(parallel)
+    assert serial["errors"] == parallel["errors"]
+
+
+def test_reimport_directory_skips_unchanged_and_replaces_changed(tmp_path, tmp_db, monkeypatch):
+    init_db(tmp_db)
+    seed_domains(tmp_db)
+    notes = _notes_dir(tmp_path)
+    first = import_directory(tmp_db, str(notes), workers=1)
+    ids = {r["filename"]: r["id"] for r in first["imported"]}
+    assert {r["status"] for r in first["imported"]} == {"new"}
+
+    parsed = []
+    real_parse = importer._parse_file
+    monkeypatch.setattr(importer, "_parse_file", lambda *job: parsed.append(job[0]["filename"]) or real_parse(*job))
+    (notes / "iam.txt").write_text("Cloud Monitoring alerts and log router sinks")
+    again = import_directory(tmp_db, str(notes), workers=1)
+    assert parsed == ["broken.json", "iam.txt"]
+    assert [(r["filename"], r["status"], r["id"], r["domain_id"]) for r in again["imported"]] == [
+        ("iam.txt", "updated", ids["iam.txt"], 4)
+    ]
+    assert [(r["filename"], r["status"]) for r in again["skipped"]] == [("gke/pools.md", "unchanged")]
+    assert list(iter_import_chunks(tmp_db, ids["iam.txt"])) == ["Cloud Monitoring alerts and log router sinks"]
+
+    conn = get_connection(tmp_db)
+    assert conn.execute("SELECT COUNT(*) FROM imported_content").fetchone()[0] == 2
+    conn.close()
+
+
+def test_reimport_file_uses_stat_then_hash(tmp_path, tmp_db):
+    init_db(tmp_db)
+    seed_domains(tmp_db)
+    note = tmp_path / "vpc.md"
+    note.write_text("VPC subnets and firewall rules")
+    first = import_file(tmp_db, str(note))
+    assert first["status"] == "new"
+    assert import_file(tmp_db, str(note)) == {
+        "id": first["id"], "filename": "vpc.md", "domain_id": 3, "status": "unchanged"
+    }
+    os.utime(note, ns=(0, 0))  # touched, content unchanged
+    assert import_file(tmp_db, str(note))["status"] == "unchanged"
+    assert import_file(tmp_db, str(note))["status"] == "unchanged"
+    copy = tmp_path / "copy.md"
+    copy.write_bytes(note.read_bytes())
+    assert import_file(tmp_db, str(copy)) == {
+        "id": first["id"], "filename": "copy.md", "domain_id": 3, "status": "duplicate"
+    }
+    note.write_text("VPC subnets, firewall rules and Cloud NAT")
+    updated = import_file(tmp_db, str(note))
+    assert (updated["id"], updated["status"], updated["length"]) == (first["id"], "updated", 41)
+
+
+from gcp_tutor import importer
+from gcp_tutor.importer import KeywordCategorizer, iter_file_chunks, iter_import_chunks
+
+
+def _write_pdf(path, pages):
+    """A minimal PDF with one line of text per page."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        kids.append(f"{len(objects) + 1} 0 R")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> "
+            f"/Contents {len(objects) + 2} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode()
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(out))
+
+
+def _write_docx(path, paragraphs):
+    import zipfile
+    ns = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+    body = "".join(f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>" for text in paragraphs)
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("word/document.xml", f'<w:document xmlns:w="{ns}"><w:body>{body}</w:body></w:document>')
+
+
+def test_text_is_chunked_between_lines(tmp_path, monkeypatch):
+    monkeypatch.setattr(importer, "CHUNK_CHARS", 100)
+    monkeypatch.setattr(importer, "READ_BLOCK_CHARS", 64)
+    text = "".join(f"line {i} about gke node pools\n" for i in range(50))
+    f = tmp_path / "long.txt"
+    f.write_text(text)
+    chunks = list(iter_file_chunks(str(f)))
+    assert len(chunks) > 10
+    assert all(chunk.endswith("\n") and len(chunk) <= 100 for chunk in chunks)
+    assert "".join(chunks) == text
+
+
+def test_pdf_yields_one_chunk_per_page(tmp_path):
+    f = tmp_path / "guide.pdf"
+    _write_pdf(f, ["Cloud Storage nearline", "IAM custom roles", "GKE autoscaling"])
+    chunks = list(iter_file_chunks(str(f)))
+    assert len(chunks) == 3
+    assert "IAM custom roles" in chunks[1]
+
+
+def test_docx_and_html_are_streamed(tmp_path):
+    docx = tmp_path / "notes.docx"
+    _write_docx(docx, ["First paragraph", "Second paragraph"])
+    assert read_file_content(str(docx)) == "First paragraph\nSecond paragraph\n"
+    html = tmp_path / "page.html"
+    html.write_text("<html><script>var x = 1;</script><p>Cloud &amp; IAM</p><p>Roles</p></html>")
+    assert read_file_content(str(html)).split() == ["Cloud", "&", "IAM", "Roles"]
+
+
+def test_streaming_categorizer_matches_whole_text():
+    parts = ["kubectl apply", " then gcloud compute", " and an IAM role"]
+    categorizer = KeywordCategorizer()
+    for part in parts:
+        categorizer.feed(part)
+    assert categorizer.domain_id == categorize_content("".join(parts)) == 3
+    assert KeywordCategorizer().domain_id is None
+
+
+def test_import_file_stores_chunks_and_pages_through_them(tmp_path, tmp_db, monkeypatch):
+    init_db(tmp_db)
+    seed_domains(tmp_db)
+    monkeypatch.setattr(importer, "CHUNK_CHARS", 200)
+    monkeypatch.setattr(importer, "CHUNK_BATCH_SIZE", 3)
+    text = "".join(f"{i}: service account keys and IAM roles\n" for i in range(100))
+    f = tmp_path / "iam.md"
+    f.write_text(text)
+    result = import_file(tmp_db, str(f))
+    assert result["domain_id"] == 5 and result["length"] == len(text) and result["chunks"] > 3
+    assert "".join(iter_import_chunks(tmp_db, result["id"])) == text
+    conn = get_connection(tmp_db)
+    conn.execute("DELETE FROM imported_content")
+    conn.commit()
+    assert conn.execute("SELECT COUNT(*) FROM imported_chunks").fetchone()[0] == 0
+    conn.close()
+
+
+def test_import_directory_streams_large_files(tmp_path, tmp_db, monkeypatch):
+    init_db(tmp_db)
+    seed_domains(tmp_db)
+    notes = _notes_dir(tmp_path)
+    monkeypatch.setattr(importer, "STREAM_FILE_BYTES", 47)  # only pools.md is larger
+    result = import_directory(tmp_db, str(notes), workers=2)
+    assert sorted(r["filename"] for r in result["imported"]) == ["gke/pools.md", "iam.txt"]
+    assert [e["filename"] for e in result["errors"]] == ["broken.json"]
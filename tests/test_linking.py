@@ -0,0 +1,87 @@
+import pytest
+from gcp_tutor import linking
+from gcp_tutor.db import init_progress_db, connect
+from gcp_tutor.seed import build_content_db
+from gcp_tutor.importer import import_file
+from gcp_tutor.linking import SubtopicIndex, get_subtopic_notes, link_imports, split_passages, terms
+
+NOTES = """# Billing
+
+Set up budgets and alerts on the billing account, and export billing data to BigQuery.
+
+# Networking
+
+Create a custom mode VPC with regional subnets. Firewall rules apply by network tag. Use VPC peering to connect two VPCs.
+"""
+
+
+def _subtopic_id(db_path, name):
+    with connect(db_path) as conn:
+        return conn.execute("SELECT id FROM subtopics WHERE name = ?", (name,)).fetchone()[0]
+
+
+def test_terms_drop_stopwords_and_plurals():
+    assert terms("The roles of service accounts, and IAM") == ["role", "service", "account", "iam"]
+
+
+def test_split_passages_prefers_paragraph_breaks():
+    text = "alpha beta.\n\ngamma delta. epsilon\nzeta eta theta"
+    passages = [text[start:end] for start, end in split_passages(text, size=20)]
+    assert passages == ["alpha beta.", "gamma delta.", "epsilon", "zeta eta theta"]
+    assert list(split_passages("  \n\n ")) == []
+
+
+def test_index_ranks_by_cosine_with_and_without_numpy(monkeypatch):
+    documents = {7: "vpc subnet firewall peering", 8: "billing budget alert export", 9: "iam role"}
+    texts = ["firewall rules for the vpc", "budget alerts", "nothing relevant"]
+    with_numpy = SubtopicIndex(documents).best(texts, k=2)
+    monkeypatch.setattr(linking, "np", None)
+    without_numpy = SubtopicIndex(documents).best(texts, k=2)
+    assert [[subtopic for subtopic, _ in best] for best in with_numpy] == [[7], [8], []]
+    flatten = lambda results: [pair for best in results for pair in best]
+    assert [s for s, _ in flatten(with_numpy)] == [s for s, _ in flatten(without_numpy)]
+    assert [c for _, c in flatten(with_numpy)] == pytest.approx([c for _, c in flatten(without_numpy)])
+    assert 0 < with_numpy[0][0][1] <= 1
+
+
+def test_import_links_passages_to_subtopics(seeded_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(linking, "PASSAGE_CHARS", 200)
+    note = tmp_path / "notes.md"
+    note.write_text(NOTES)
+    imported = import_file(seeded_db, str(note))
+    billing = _subtopic_id(seeded_db, "Managing billing configuration")
+    networking = _subtopic_id(seeded_db, "Deploying networking resources")
+    notes = get_subtopic_notes(seeded_db, [billing, networking], limit=1)
+    assert notes[billing][0]["text"].startswith("# Billing")
+    assert "VPC peering" in notes[networking][0]["text"]
+    assert notes[networking][0]["import_id"] == imported["id"]
+
+    note.write_text("Nothing but unrelated prose here.")
+    import_file(seeded_db, str(note))
+    assert get_subtopic_notes(seeded_db, [billing]) == {billing: []}
+
+
+def test_link_imports_relinks_everything(seeded_db, tmp_path):
+    note = tmp_path / "notes.md"
+    note.write_text(NOTES)
+    import_file(seeded_db, str(note))
+    with connect(seeded_db) as conn:
+        links = conn.execute("SELECT * FROM imported_passage_links ORDER BY chunk_id, start, subtopic_id").fetchall()
+        conn.execute("DELETE FROM imported_passage_links")
+    assert links
+    assert link_imports(seeded_db) == len(links)
+    with connect(seeded_db) as conn:
+        assert conn.execute("SELECT * FROM imported_passage_links ORDER BY chunk_id, start, subtopic_id").fetchall() == links
+        conn.execute("DELETE FROM imported_content")
+        assert conn.execute("SELECT COUNT(*) FROM imported_passage_links").fetchone()[0] == 0
+
+
+def test_links_in_progress_database(tmp_db, tmp_path):
+    content_db = str(tmp_path / "content.db")
+    build_content_db(content_db)
+    init_progress_db(tmp_db, content_db)
+    note = tmp_path / "notes.md"
+    note.write_text(NOTES)
+    import_file(tmp_db, str(note))
+    billing = _subtopic_id(tmp_db, "Managing billing configuration")
+    assert get_subtopic_notes(tmp_db, [billing])[billing]
@@ -1,5 +1,5 @@
 """Tests for data model classes."""
-from gcp_tutor.models import Domain, Subtopic, Flashcard, QuizQuestion, StudyDay, UserProgress
+from gcp_tutor.models import Domain, Subtopic, Flashcard, CardState, QuizQuestion, StudyDay, UserProgress
 
 
 def test_domain_creation():
@@ -24,19 +24,24 @@ def test_subtopic_creation():
 
 def test_flashcard_defaults():
     f = Flashcard(id=1, domain_id=1, front="Q?", back="A")
-    assert f.ease_factor == 2.5
-    assert f.interval == 0
-    assert f.repetitions == 0
     assert f.subtopic_id is None
     assert f.source == "seeded"
-    assert f.next_review is None
 
 
-def test_flashcard_with_values():
-    f = Flashcard(id=2, domain_id=1, front="Q?", back="A", ease_factor=3.0, interval=5, repetitions=2)
-    assert f.ease_factor == 3.0
-    assert f.interval == 5
-    assert f.repetitions == 2
+def test_card_state_defaults():
+    s = CardState(user_id=1, flashcard_id=1, domain_id=1)
+    assert s.ease_factor == 2.5
+    assert s.interval == 0
+    assert s.repetitions == 0
+    assert s.next_review is None
+    assert s.retired is False
+
+
+def test_card_state_with_values():
+    s = CardState(user_id=1, flashcard_id=2, domain_id=1, ease_factor=3.0, interval=5, repetitions=2)
+    assert s.ease_factor == 3.0
+    assert s.interval == 5
+    assert s.repetitions == 2
 
 
 def test_quiz_question_creation():
@@ -0,0 +1,168 @@
+# tests/test_recorder.py
+import pytest
+from unittest.mock import patch
+from gcp_tutor.db import init_db, get_connection
+from gcp_tutor.seed import seed_all
+from gcp_tutor.study import get_completed_session_items, start_new_session
+from gcp_tutor.recorder import ResultRecorder, replay_journals
+
+
+def _count(db_path, table):
+    conn = get_connection(db_path)
+    n = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    conn.close()
+    return n
+
+
+def _first_question(db_path):
+    conn = get_connection(db_path)
+    q = dict(conn.execute("SELECT * FROM quiz_questions ORDER BY id LIMIT 1").fetchone())
+    conn.close()
+    return q
+
+
+def test_recorder_buffers_until_flush(tmp_db):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    recorder = ResultRecorder(tmp_db, flush_every=100)
+    recorder.record_flashcard_result(1, 4)
+    recorder.record_flashcard_result(2, 5)
+    assert recorder.pending == 2
+    assert _count(tmp_db, "flashcard_results") == 0
+    recorder.flush()
+    assert recorder.pending == 0
+    assert _count(tmp_db, "flashcard_results") == 2
+    conn = get_connection(tmp_db)
+    card = conn.execute("SELECT * FROM card_state WHERE user_id = 1 AND flashcard_id = 1").fetchone()
+    conn.close()
+    assert card["repetitions"] == 1
+    recorder.close()
+
+
+def test_recorder_flushes_every_n_items(tmp_db):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    with ResultRecorder(tmp_db, flush_every=3) as recorder:
+        for card_id in (1, 2, 3):
+            recorder.record_flashcard_result(card_id, 4)
+        assert recorder.pending == 0
+        assert _count(tmp_db, "flashcard_results") == 3
+
+
+def test_recorder_flushes_after_interval(tmp_db):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    with ResultRecorder(tmp_db, flush_every=100, flush_interval=0) as recorder:
+        recorder.record_flashcard_result(1, 4)
+        assert _count(tmp_db, "flashcard_results") == 1
+
+
+def test_recorder_flushes_on_a_timer_while_idle(tmp_db):
+    import time
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    with ResultRecorder(tmp_db, flush_every=100, flush_interval=0.05) as recorder:
+        recorder.record_flashcard_result(1, 4)
+        deadline = time.monotonic() + 5
+        while recorder.pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert recorder.pending == 0
+        assert _count(tmp_db, "flashcard_results") == 1
+
+
+def test_recorder_syncs_each_journal_append(tmp_db):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    with ResultRecorder(tmp_db, flush_every=100) as recorder:
+        with patch("gcp_tutor.recorder.os.fsync") as fsync:
+            recorder.record_flashcard_result(1, 4)
+            recorder.record_flashcard_result(2, 4)
+        assert fsync.call_count == 2
+
+
+def test_recorder_grades_quiz_answers(tmp_db):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    q = _first_question(tmp_db)
+    wrong = "b" if q["correct_answer"] != "b" else "c"
+    with ResultRecorder(tmp_db) as recorder:
+        assert recorder.record_quiz_answer(q, q["correct_answer"], session_day=1) is True
+        assert recorder.record_quiz_answer(q, wrong) is False
+    assert _count(tmp_db, "quiz_results") == 2
+    assert get_completed_session_items(tmp_db, 1, "quiz") == {q["id"]}
+
+
+def test_close_removes_journal(tmp_db):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    recorder = ResultRecorder(tmp_db)
+    recorder.record_flashcard_result(1, 4)
+    assert recorder.journal_path.exists()
+    recorder.close()
+    assert not recorder.journal_path.exists()
+    assert _count(tmp_db, "journal_state") == 0
+
+
+def test_replay_applies_journal_from_crashed_process(tmp_db):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    recorder = ResultRecorder(tmp_db, flush_every=100)
+    recorder.record_flashcard_result(1, 4, session_day=1)
+    recorder.record_flashcard_result(2, 0, session_day=1)
+    recorder._journal.close()  # simulate a crash: nothing flushed
+    with patch("gcp_tutor.recorder._pid_alive", return_value=False):
+        assert replay_journals(tmp_db) == 2
+        assert replay_journals(tmp_db) == 0
+    assert _count(tmp_db, "flashcard_results") == 2
+    assert get_completed_session_items(tmp_db, 1, "flashcard") == {1, 2}
+    assert not recorder.journal_path.exists()
+
+
+def test_replay_drops_results_for_retired_items(tmp_db):
+    """A journal naming a card or question retired since still replays, and is removed."""
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    question = _first_question(tmp_db)
+    recorder = ResultRecorder(tmp_db, flush_every=100)
+    recorder.record_flashcard_result(1, 4)
+    recorder.record_flashcard_result(2, 4)
+    recorder.record_quiz_answer(question, "A")
+    recorder._journal.close()
+    conn = get_connection(tmp_db)
+    conn.execute("UPDATE flashcards SET retired = 1 WHERE id = 1")
+    conn.execute("UPDATE quiz_questions SET retired = 1 WHERE id = ?", (question["id"],))
+    conn.commit()
+    conn.close()
+    with patch("gcp_tutor.recorder._pid_alive", return_value=False):
+        assert replay_journals(tmp_db) == 1
+    assert _count(tmp_db, "flashcard_results") == 1
+    assert _count(tmp_db, "quiz_results") == 0
+    assert not recorder.journal_path.exists()
+
+
+def test_replay_skips_entries_already_flushed(tmp_db):
+    """A crash between commit and journal truncation must not double-apply."""
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    recorder = ResultRecorder(tmp_db, flush_every=100)
+    recorder.record_flashcard_result(1, 4)
+    lines = recorder.journal_path.read_text()
+    recorder.flush()
+    recorder.record_flashcard_result(2, 4)
+    recorder._journal.close()
+    # Restore the already-flushed entry as if truncation never happened
+    recorder.journal_path.write_text(lines + recorder.journal_path.read_text())
+    with patch("gcp_tutor.recorder._pid_alive", return_value=False):
+        assert replay_journals(tmp_db) == 1
+    assert _count(tmp_db, "flashcard_results") == 2
+
+
+def test_replay_leaves_live_process_journal(tmp_db):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    recorder = ResultRecorder(tmp_db, flush_every=100)
+    recorder.record_flashcard_result(1, 4)
+    assert replay_journals(tmp_db) == 0
+    assert recorder.journal_path.exists()
+    recorder.close()
+    assert _count(tmp_db, "flashcard_results") == 1
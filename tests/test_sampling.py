@@ -0,0 +1,114 @@
+# tests/test_sampling.py
+from datetime import date, timedelta
+from gcp_tutor.db import get_connection
+from gcp_tutor.quiz import get_quiz_questions, get_questions_for_domain, get_questions_for_subtopic
+from gcp_tutor.flashcards import get_due_cards, get_cards_for_domain
+
+
+def _ids(rows):
+    return [r["id"] for r in rows]
+
+
+def test_seeded_question_draws_are_reproducible(seeded_db):
+    first = _ids(get_quiz_questions(seeded_db, count=10, seed=42))
+    second = _ids(get_quiz_questions(seeded_db, count=10, seed=42))
+    other = _ids(get_quiz_questions(seeded_db, count=10, seed=7))
+    assert first == second
+    assert first != other
+    assert len(set(first)) == 10
+
+
+def test_question_draw_larger_than_pool_returns_pool(seeded_db):
+    conn = get_connection(seeded_db)
+    pool = conn.execute("SELECT COUNT(*) FROM quiz_questions WHERE domain_id = 1").fetchone()[0]
+    conn.close()
+    questions = get_questions_for_domain(seeded_db, 1, count=pool + 50)
+    assert len(questions) == pool
+    assert all(q["domain_id"] == 1 for q in questions)
+
+
+def test_subtopic_draws_match_filter(seeded_db):
+    questions = get_questions_for_subtopic(seeded_db, 1, count=3)
+    assert questions
+    assert all(q["subtopic_id"] == 1 for q in questions)
+
+
+def test_id_index_sees_new_questions(seeded_db):
+    get_questions_for_domain(seeded_db, 2, count=5)  # build the index
+    conn = get_connection(seeded_db)
+    conn.execute("DELETE FROM quiz_questions WHERE domain_id = 2")
+    conn.execute(
+        """INSERT INTO quiz_questions (domain_id, stem, choice_a, choice_b, choice_c, choice_d, correct_answer)
+        VALUES (2, 'new', 'a', 'b', 'c', 'd', 'a')"""
+    )
+    conn.commit()
+    conn.close()
+    questions = get_questions_for_domain(seeded_db, 2, count=5)
+    assert [q["stem"] for q in questions] == ["new"]
+
+
+def test_id_index_recovers_from_deleted_rows(seeded_db):
+    get_questions_for_domain(seeded_db, 3, count=5)
+    conn = get_connection(seeded_db)
+    # Delete without changing MAX(id)
+    conn.execute("DELETE FROM quiz_questions WHERE domain_id = 3 AND id < (SELECT MAX(id) FROM quiz_questions)")
+    conn.commit()
+    remaining = conn.execute("SELECT COUNT(*) FROM quiz_questions WHERE domain_id = 3").fetchone()[0]
+    conn.close()
+    questions = get_questions_for_domain(seeded_db, 3, count=50)
+    assert len(questions) == remaining
+
+
+def test_id_index_rebuilds_after_content_sync(seeded_db):
+    pool = len(get_questions_for_domain(seeded_db, 2, count=500))
+    conn = get_connection(seeded_db)
+    # A sync moving a question between domains changes no MAX(id) and leaves
+    # every row already in the domain 2 index valid.
+    moved = conn.execute("SELECT MIN(id) FROM quiz_questions WHERE domain_id = 1").fetchone()[0]
+    conn.execute("UPDATE quiz_questions SET domain_id = 2 WHERE id = ?", (moved,))
+    conn.execute(
+        "INSERT INTO content_syncs (content_hash, applied_at, inserted, updated, retired) VALUES ('x', '', 0, 1, 0)"
+    )
+    conn.commit()
+    conn.close()
+    questions = get_questions_for_domain(seeded_db, 2, count=500)
+    assert len(questions) == pool + 1
+    assert moved in _ids(questions)
+
+
+def test_due_cards_prefer_overdue_in_due_order(seeded_db):
+    today = date.today()
+    future = (today + timedelta(days=30)).isoformat()
+    conn = get_connection(seeded_db)
+    conn.execute("UPDATE card_state SET next_review = ?", (future,))
+    conn.execute("UPDATE card_state SET next_review = ? WHERE flashcard_id IN (1, 2)", ((today - timedelta(days=1)).isoformat(),))
+    conn.execute("UPDATE card_state SET next_review = ? WHERE flashcard_id = 3", ((today - timedelta(days=5)).isoformat(),))
+    conn.execute("UPDATE card_state SET next_review = NULL WHERE flashcard_id = 4")
+    conn.commit()
+    conn.close()
+    ids = _ids(get_due_cards(seeded_db, limit=10))
+    assert ids[0] == 4  # never reviewed first
+    assert ids[1] == 3  # then most overdue
+    assert set(ids[2:]) == {1, 2}
+
+
+def test_due_cards_sample_the_cutoff_tie_group(seeded_db):
+    """All seeded cards are new; different seeds pick different cards."""
+    a = _ids(get_due_cards(seeded_db, limit=5, seed=1))
+    b = _ids(get_due_cards(seeded_db, limit=5, seed=2))
+    assert a == _ids(get_due_cards(seeded_db, limit=5, seed=1))
+    assert a != b
+    assert len(set(a)) == 5
+
+
+def test_domain_due_cards_sample_small_tie_group(seeded_db):
+    """A tie group too sparse for rejection sampling falls back to an index scan."""
+    future = (date.today() + timedelta(days=30)).isoformat()
+    conn = get_connection(seeded_db)
+    conn.execute("UPDATE card_state SET next_review = ?", (future,))
+    conn.execute("UPDATE card_state SET next_review = NULL WHERE flashcard_id IN (SELECT id FROM flashcards WHERE domain_id = 5 LIMIT 3)")
+    conn.commit()
+    conn.close()
+    cards = get_cards_for_domain(seeded_db, 5, limit=2, seed=3)
+    assert len(cards) == 2
+    assert all(c["domain_id"] == 5 and c["next_review"] is None for c in cards)
@@ -0,0 +1,148 @@
+# tests/test_scheduler.py
+import random
+from datetime import date, timedelta
+import pytest
+from gcp_tutor.db import init_db, get_connection
+from gcp_tutor.seed import seed_domains, seed_flashcards
+from gcp_tutor.flashcards import record_flashcard_result, reschedule_deck
+from gcp_tutor.scheduler import (
+    Scheduler, SM2Scheduler, FSRSScheduler, FSRS_DEFAULT_WEIGHTS, get_scheduler, set_scheduler,
+    fsrs_grade, optimize_fsrs_weights,
+)
+
+NEW_CARD = {"ease_factor": 2.5, "interval": 0, "repetitions": 0, "next_review": None,
+            "stability": None, "difficulty": None}
+
+
+def test_default_scheduler_is_sm2(tmp_db):
+    init_db(tmp_db)
+    assert isinstance(get_scheduler(tmp_db), SM2Scheduler)
+
+
+def test_scheduler_without_review_cannot_be_created():
+    class Incomplete(Scheduler):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_set_scheduler_fsrs_with_weights(tmp_db):
+    init_db(tmp_db)
+    weights = [w * 1.1 for w in FSRS_DEFAULT_WEIGHTS]
+    set_scheduler(tmp_db, "fsrs", weights)
+    scheduler = get_scheduler(tmp_db)
+    assert isinstance(scheduler, FSRSScheduler)
+    assert scheduler.w == pytest.approx(tuple(weights))
+
+
+def test_set_scheduler_rejects_unknown(tmp_db):
+    init_db(tmp_db)
+    with pytest.raises(ValueError):
+        set_scheduler(tmp_db, "leitner")
+
+
+def test_sm2_scheduler_sets_next_review():
+    today = date(2026, 3, 1)
+    result = SM2Scheduler().review(NEW_CARD, 4, today)
+    assert result["interval"] == 1
+    assert result["next_review"] == "2026-03-02"
+
+
+def test_fsrs_grade_mapping():
+    assert [fsrs_grade(r) for r in range(6)] == [1, 1, 1, 2, 3, 4]
+
+
+def test_fsrs_first_review_uses_initial_stability():
+    today = date(2026, 3, 1)
+    scheduler = FSRSScheduler()
+    good = scheduler.review(NEW_CARD, 4, today)
+    easy = scheduler.review(NEW_CARD, 5, today)
+    assert good["stability"] == FSRS_DEFAULT_WEIGHTS[2]
+    assert easy["interval"] > good["interval"]
+
+
+def test_fsrs_lapse_shrinks_stability():
+    scheduler = FSRSScheduler()
+    start = date(2026, 3, 1)
+    card = dict(NEW_CARD, **scheduler.review(NEW_CARD, 4, start))
+    review_day = start + timedelta(days=card["interval"])
+    recalled = scheduler.review(card, 4, review_day)
+    forgot = scheduler.review(card, 0, review_day)
+    assert recalled["stability"] > card["stability"] > forgot["stability"]
+    assert forgot["repetitions"] == 0
+
+
+def test_fsrs_higher_retention_means_shorter_intervals():
+    relaxed = FSRSScheduler(desired_retention=0.8)
+    strict = FSRSScheduler(desired_retention=0.95)
+    assert strict.next_interval(20.0) < relaxed.next_interval(20.0)
+
+
+def test_record_flashcard_result_uses_configured_scheduler(tmp_db):
+    init_db(tmp_db)
+    seed_domains(tmp_db)
+    seed_flashcards(tmp_db)
+    set_scheduler(tmp_db, "fsrs")
+    record_flashcard_result(tmp_db, 1, rating=4)
+    conn = get_connection(tmp_db)
+    card = conn.execute("SELECT * FROM card_state WHERE user_id = 1 AND flashcard_id = 1").fetchone()
+    conn.close()
+    assert card["stability"] == pytest.approx(FSRS_DEFAULT_WEIGHTS[2])
+    assert card["difficulty"] is not None
+
+
+def test_reschedule_deck_with_fsrs(tmp_db):
+    init_db(tmp_db)
+    seed_domains(tmp_db)
+    seed_flashcards(tmp_db)
+    set_scheduler(tmp_db, "fsrs")
+    record_flashcard_result(tmp_db, 1, rating=4)
+    record_flashcard_result(tmp_db, 1, rating=5)
+    conn = get_connection(tmp_db)
+    before = tuple(conn.execute("SELECT stability, difficulty, next_review FROM card_state WHERE user_id = 1 AND flashcard_id = 1").fetchone())
+    conn.execute("UPDATE card_state SET stability = NULL, difficulty = NULL, next_review = NULL")
+    conn.commit()
+    conn.close()
+    reschedule_deck(tmp_db)
+    conn = get_connection(tmp_db)
+    after = tuple(conn.execute("SELECT stability, difficulty, next_review FROM card_state WHERE user_id = 1 AND flashcard_id = 1").fetchone())
+    conn.close()
+    assert after[0] == pytest.approx(before[0])
+    assert after[1] == pytest.approx(before[1])
+    assert after[2] == before[2]
+
+
+def test_optimize_fsrs_weights_reduces_loss(tmp_db):
+    pytest.importorskip("numpy")
+    init_db(tmp_db)
+    seed_domains(tmp_db)
+    seed_flashcards(tmp_db)
+    # Synthetic history: reviews spaced 1-20 days apart, mostly forgotten
+    # after long gaps, which the default weights underestimate.
+    rng = random.Random(1)
+    rows = []
+    for card_id in range(1, 61):
+        day = date(2026, 1, 1)
+        for _ in range(5):
+            gap = rng.randint(1, 20)
+            day += timedelta(days=gap)
+            rating = 4 if rng.random() < 1 / (1 + gap / 4) else 1
+            rows.append((card_id, rating, day.isoformat()))
+    conn = get_connection(tmp_db)
+    conn.executemany("INSERT INTO flashcard_results (flashcard_id, rating, reviewed_at) VALUES (?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+    _, baseline = optimize_fsrs_weights(tmp_db, iterations=0)
+    weights, loss = optimize_fsrs_weights(tmp_db, iterations=30)
+    assert len(weights) == len(FSRS_DEFAULT_WEIGHTS)
+    assert loss < baseline
+
+
+def test_optimize_fsrs_weights_without_history(tmp_db):
+    pytest.importorskip("numpy")
+    init_db(tmp_db)
+    weights, loss = optimize_fsrs_weights(tmp_db)
+    assert weights == list(FSRS_DEFAULT_WEIGHTS)
+    assert loss == 0.0
@@ -0,0 +1,115 @@
+from gcp_tutor.db import init_progress_db, connect, get_connection, MIGRATIONS, migrate
+from gcp_tutor.seed import build_content_db
+from gcp_tutor.importer import import_file
+from gcp_tutor.search import match_query, search
+
+
+def test_match_query_quotes_words():
+    assert match_query("pub/sub") == '"pub" "sub"'
+    assert match_query('autoscal* "x') == '"autoscal"* "x"'
+    assert match_query("  --  ") == ""
+
+
+def test_search_finds_cards_and_questions(seeded_db):
+    hits = search(seeded_db, "service account impersonation")
+    sources = {hit["source"] for hit in hits}
+    assert {"flashcard", "question"} <= sources
+    assert all(hit["score"] <= next_hit["score"] for hit, next_hit in zip(hits, hits[1:]))
+    assert "[impersonation]" in " ".join(hit["snippet"].lower() for hit in hits)
+
+
+def test_search_stems_words(seeded_db):
+    assert search(seeded_db, "autoscaled")
+    assert search(seeded_db, "autoscal*")
+
+
+def test_search_empty_or_unmatched(seeded_db):
+    assert search(seeded_db, "") == []
+    assert search(seeded_db, '"(*') == []
+    assert search(seeded_db, "zzzyqx") == []
+
+
+def test_search_filters_by_domain(seeded_db):
+    hits = search(seeded_db, "gcloud", limit=50, domain_id=5)
+    assert hits and all(hit["domain_id"] == 5 for hit in hits)
+
+
+def test_search_reports_each_reading_once(seeded_db):
+    with connect(seeded_db) as conn:
+        text, domain_id = conn.execute(
+            """SELECT rb.body, sd.domain_id FROM study_days sd JOIN reading_blobs rb ON rb.id = sd.reading_blob_id
+               WHERE sd.domain_id = 5 LIMIT 1"""
+        ).fetchone()
+        days = conn.execute("SELECT COUNT(*) FROM study_days WHERE domain_id = 5").fetchone()[0]
+    assert days > 1
+    word = max(text.split(), key=len).strip(".,:;()*`")
+    readings = [hit for hit in search(seeded_db, word, limit=100) if hit["source"] == "reading"]
+    assert len([hit for hit in readings if hit["domain_id"] == domain_id]) == 1
+
+
+def test_search_skips_retired_rows(seeded_db):
+    card = search(seeded_db, "impersonation")[0]
+    table = "flashcards" if card["source"] == "flashcard" else "quiz_questions"
+    with connect(seeded_db) as conn:
+        conn.execute(f"UPDATE {table} SET retired = 1 WHERE id = ?", (card["id"],))
+    assert (card["source"], card["id"]) not in {(h["source"], h["id"]) for h in search(seeded_db, "impersonation")}
+
+
+def test_index_follows_imports_edits_and_deletes(seeded_db, tmp_path):
+    note = tmp_path / "notes.md"
+    note.write_text("Shared VPC lets a host project share subnets with quokka service projects.")
+    import_file(seeded_db, str(note))
+    hits = search(seeded_db, "quokka")
+    assert [(hit["source"], hit["title"]) for hit in hits] == [("import", "notes.md")]
+    with connect(seeded_db) as conn:
+        conn.execute("UPDATE imported_chunks SET text = 'wombat' WHERE import_id = ?", (hits[0]["id"],))
+    assert search(seeded_db, "quokka") == []
+    assert search(seeded_db, "wombat")
+    with connect(seeded_db) as conn:
+        conn.execute("DELETE FROM imported_content")
+    assert search(seeded_db, "wombat") == []
+
+
+def test_compressed_imports_can_be_written_without_custom_functions(seeded_db, tmp_path):
+    """Plain sqlite3 connections (the CLI, scripts) can add and remove compressed chunks."""
+    import sqlite3
+    import zlib
+    note = tmp_path / "notes.md"
+    note.write_text("Quokka notes on VPC peering.\n" * 200)
+    import_file(seeded_db, str(note))
+    assert [hit["title"] for hit in search(seeded_db, "quokka")] == ["notes.md"]
+    conn = sqlite3.connect(seeded_db)
+    conn.execute("DELETE FROM imported_content")
+    import_id = conn.execute("INSERT INTO imported_content (filename) VALUES ('raw.md')").lastrowid
+    conn.execute(
+        "INSERT INTO imported_chunks (import_id, seq, text) VALUES (?, 0, ?)",
+        (import_id, zlib.compress(("Wombat burrows. " * 300).encode())),
+    )
+    conn.commit()
+    conn.close()
+    assert search(seeded_db, "quokka") == []
+    assert [hit["title"] for hit in search(seeded_db, "wombat")] == ["raw.md"]
+
+
+def test_migration_indexes_existing_rows(tmp_db):
+    conn = get_connection(tmp_db)
+    for version, script in enumerate(MIGRATIONS[:10], start=1):
+        conn.executescript(f"BEGIN; {script}; PRAGMA user_version = {version}; COMMIT;")
+    conn.execute(
+        "INSERT INTO imported_content (filename, content_text) VALUES ('old.txt', 'platypus notes')"
+    )
+    conn.commit()
+    migrate(conn)
+    conn.close()
+    assert [hit["title"] for hit in search(tmp_db, "platypus")] == ["old.txt"]
+
+
+def test_search_spans_content_and_progress_databases(tmp_db, tmp_path):
+    content_db = str(tmp_path / "content.db")
+    build_content_db(content_db)
+    init_progress_db(tmp_db, content_db)
+    note = tmp_path / "iam.txt"
+    note.write_text("Custom impersonation checklist")
+    import_file(tmp_db, str(note))
+    sources = {hit["source"] for hit in search(tmp_db, "impersonation", limit=50)}
+    assert {"flashcard", "question", "import"} <= sources
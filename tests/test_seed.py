@@ -1,5 +1,19 @@
+import json
+import shutil
+import sqlite3
+from pathlib import Path
+
+import pytest
 from gcp_tutor.db import init_db, get_connection
-from gcp_tutor.seed import seed_domains, seed_study_plan, is_seeded, seed_flashcards, seed_questions, seed_all
+from gcp_tutor import seed
+from gcp_tutor.db import CONTENT_SEARCH_INDEXES, CONTENT_TABLES, SCHEMA_VERSION, close_connections, init_progress_db
+from gcp_tutor.seed import (
+    seed_domains, seed_study_plan, is_seeded, seed_flashcards, seed_questions, seed_all, build_content_db,
+    build_template, install_template, sync_content, applied_content_hash, is_current, ensure_reading_content,
+)
+from gcp_tutor.flashcards import get_due_cards, record_flashcard_result
+from gcp_tutor.quiz import get_quiz_questions, record_quiz_answer
+from gcp_tutor.users import create_user
 
 
 def test_seed_domains(tmp_db):
@@ -23,6 +37,25 @@ def test_seed_study_plan(tmp_db):
     # First 6 days should be domain 3 (heaviest weight)
     assert days[0]["domain_id"] == 3
     assert days[5]["domain_id"] == 3
+    # Days on one domain share its reading text, stored once.
+    assert len({day["reading_blob_id"] for day in days}) == 6
+    assert conn.execute("SELECT COUNT(*) FROM reading_blobs").fetchone()[0] == 6
+    conn.close()
+
+
+def test_ensure_reading_content_backfills_shared_blobs(tmp_db):
+    init_db(tmp_db)
+    seed_domains(tmp_db)
+    seed_study_plan(tmp_db)
+    conn = get_connection(tmp_db)
+    conn.execute("UPDATE study_days SET reading_blob_id = NULL")
+    conn.execute("DELETE FROM reading_blobs")
+    conn.commit()
+    ensure_reading_content(tmp_db)
+    days = conn.execute("SELECT * FROM study_days").fetchall()
+    assert all(day["reading_blob_id"] is not None for day in days)
+    assert len({day["reading_blob_id"] for day in days}) == 6
+    assert conn.execute("SELECT COUNT(*) FROM reading_blobs").fetchone()[0] == 6
     conn.close()
 
 
@@ -63,3 +96,290 @@ def test_seed_all_idempotent(tmp_db):
     conn = get_connection(tmp_db)
     assert conn.execute("SELECT COUNT(*) FROM domains").fetchone()[0] == 5
     conn.close()
+
+
+def test_build_content_db_holds_only_content(tmp_path):
+    content_db = tmp_path / "content.db"
+    build_content_db(str(content_db))
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["content.db", "content.progress.db"]
+    # Rollback-journal mode, so the single file can be opened immutable.
+    assert content_db.read_bytes()[18:20] == b"\x01\x01"
+    conn = sqlite3.connect(f"file:{content_db}?mode=ro&immutable=1", uri=True)
+    objects = conn.execute(
+        "SELECT type, name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name NOT LIKE 'sqlite_%'"
+    ).fetchall()
+    shadow = {(k, n) for k, n in objects if any(n.startswith(f"{index}_") for index in CONTENT_SEARCH_INDEXES)}
+    assert set(objects) - shadow == {("table", t) for t in CONTENT_TABLES + CONTENT_SEARCH_INDEXES}
+    assert conn.execute("SELECT COUNT(*) FROM flashcards").fetchone()[0] >= 190
+    conn.close()
+
+
+def test_install_template_copies_seeded_database(tmp_path):
+    template = str(tmp_path / "template.db")
+    build_template(template)
+    db_path = str(tmp_path / "tutor.db")
+    assert install_template(db_path, template)
+    conn = get_connection(db_path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    assert conn.execute("SELECT COUNT(*) FROM flashcards").fetchone()[0] >= 190
+    assert conn.execute("SELECT COUNT(*) FROM card_state").fetchone()[0] >= 190
+    assert not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'seed_info'").fetchone()
+    conn.close()
+    assert is_seeded(db_path)
+
+
+def test_install_template_falls_back_when_stale_or_missing(tmp_path, monkeypatch):
+    template = str(tmp_path / "template.db")
+    db_path = str(tmp_path / "tutor.db")
+    assert not install_template(db_path, template)
+    build_template(template)
+    monkeypatch.setattr(seed, "content_hash", lambda: "changed")
+    assert not install_template(db_path, template)
+    assert not (tmp_path / "tutor.db").exists()
+
+
+def test_install_template_leaves_existing_database(tmp_db, tmp_path):
+    template = str(tmp_path / "template.db")
+    build_template(template)
+    init_db(tmp_db)
+    assert not install_template(tmp_db, template)
+    assert not is_seeded(tmp_db)
+
+
+def test_built_wheel_contains_current_template(tmp_path):
+    """setup.py's build_py hook writes the template into every wheel."""
+    import subprocess
+    import sys
+    import zipfile
+    pytest.importorskip("wheel")
+    root = Path(__file__).resolve().parents[1]
+    project = tmp_path / "project"
+    shutil.copytree(
+        root / "src", project / "src",
+        ignore=shutil.ignore_patterns("__pycache__", "*.egg-info", "template.db"),
+    )
+    for name in ("pyproject.toml", "setup.py", "README.md"):
+        shutil.copy(root / name, project / name)
+    subprocess.run(
+        [sys.executable, "-m", "pip", "wheel", "--no-deps", "--no-build-isolation", "-q", "-w", str(tmp_path), "."],
+        cwd=project, check=True, capture_output=True,
+    )
+    (wheel,) = tmp_path.glob("*.whl")
+    with zipfile.ZipFile(wheel) as archive:
+        template = tmp_path / "template.db"
+        template.write_bytes(archive.read("gcp_tutor/content/template.db"))
+    assert install_template(str(tmp_path / "tutor.db"), str(template))
+
+
+@pytest.fixture
+def content_dir(tmp_path, monkeypatch):
+    """A writable copy of the content files, used by the seed module."""
+    content = tmp_path / "content"
+    shutil.copytree(seed.CONTENT_DIR, content, ignore=shutil.ignore_patterns("*.db"))
+    monkeypatch.setattr(seed, "CONTENT_DIR", content)
+    return content
+
+
+def _edit(content_dir, name, fn):
+    path = content_dir / name
+    data = json.loads(path.read_text())
+    fn(data)
+    path.write_text(json.dumps(data))
+
+
+def test_sync_content_applies_only_the_diff(tmp_db, content_dir):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    conn = get_connection(tmp_db)
+    card = conn.execute("SELECT * FROM flashcards ORDER BY id LIMIT 1").fetchone()
+    question = conn.execute("SELECT * FROM quiz_questions ORDER BY id LIMIT 1").fetchone()
+    conn.close()
+    record_flashcard_result(tmp_db, card["id"], 5)
+    record_quiz_answer(tmp_db, question["id"], "A")
+    assert sync_content(tmp_db) is None
+
+    def edit_cards(data):
+        data["flashcards"][0]["back"] = "Corrected answer"
+        data["flashcards"].append({"domain_id": 1, "subtopic": None, "front": "New card", "back": "New back"})
+    _edit(content_dir, "flashcards.json", edit_cards)
+    _edit(content_dir, "questions.json", lambda data: data["questions"].pop(0))
+
+    assert sync_content(tmp_db) == {"inserted": 1, "updated": 1, "retired": 1}
+    assert applied_content_hash(tmp_db) == seed.content_hash()
+    assert sync_content(tmp_db) is None
+    conn = get_connection(tmp_db)
+    updated = conn.execute("SELECT * FROM flashcards WHERE id = ?", (card["id"],)).fetchone()
+    assert updated["back"] == "Corrected answer"
+    state = conn.execute("SELECT repetitions FROM card_state WHERE flashcard_id = ?", (card["id"],)).fetchone()
+    assert state["repetitions"] == 1
+    new = conn.execute("SELECT id FROM flashcards WHERE front = 'New card'").fetchone()
+    assert conn.execute("SELECT 1 FROM card_state WHERE flashcard_id = ?", (new["id"],)).fetchone()
+    assert conn.execute("SELECT retired FROM quiz_questions WHERE id = ?", (question["id"],)).fetchone()[0] == 1
+    assert conn.execute("SELECT COUNT(*) FROM quiz_results").fetchone()[0] == 1
+    conn.close()
+    assert all(q["id"] != question["id"] for q in get_quiz_questions(tmp_db, count=200))
+
+
+def test_sync_content_replaces_changed_reading(tmp_db, content_dir):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    _edit(content_dir, "reading.json", lambda data: data["domains"].update({"1": "Revised reading"}))
+    sync_content(tmp_db)
+    conn = get_connection(tmp_db)
+    bodies = conn.execute(
+        """SELECT DISTINCT rb.body FROM study_days sd JOIN reading_blobs rb ON rb.id = sd.reading_blob_id
+           WHERE sd.domain_id = 1"""
+    ).fetchall()
+    assert [row[0] for row in bodies] == ["Revised reading"]
+    assert conn.execute("SELECT COUNT(*) FROM reading_blobs").fetchone()[0] == 6
+    conn.close()
+
+
+def test_sync_content_retires_cards_from_every_learner(tmp_db, content_dir):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    create_user(tmp_db, "alice")
+    _edit(content_dir, "flashcards.json", lambda data: data["flashcards"].pop(0))
+    assert sync_content(tmp_db)["retired"] == 1
+    conn = get_connection(tmp_db)
+    retired = conn.execute("SELECT id FROM flashcards WHERE retired").fetchone()[0]
+    flags = conn.execute("SELECT retired FROM card_state WHERE flashcard_id = ?", (retired,)).fetchall()
+    assert [row[0] for row in flags] == [1, 1]
+    conn.close()
+    bob = create_user(tmp_db, "bob")
+    for user_id in (1, bob):
+        assert all(c["id"] != retired for c in get_due_cards(tmp_db, limit=500, user_id=user_id))
+
+
+def test_sync_content_keeps_card_state_of_edited_and_restored_cards(tmp_db, content_dir):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    conn = get_connection(tmp_db)
+    first, second = conn.execute("SELECT id, front FROM flashcards ORDER BY id LIMIT 2").fetchall()
+    conn.close()
+    for card_id in (first["id"], second["id"]):
+        record_flashcard_result(tmp_db, card_id, 5)
+    original = json.loads((content_dir / "flashcards.json").read_text())
+
+    def edit(data):
+        data["flashcards"][0]["front"] = "Reworded front"
+        data["flashcards"].pop(1)
+    _edit(content_dir, "flashcards.json", edit)
+    assert sync_content(tmp_db) == {"inserted": 0, "updated": 1, "retired": 1}
+    (content_dir / "flashcards.json").write_text(json.dumps(original))
+    assert sync_content(tmp_db) == {"inserted": 0, "updated": 2, "retired": 0}
+
+    conn = get_connection(tmp_db)
+    rows = conn.execute(
+        """SELECT f.id, f.front, s.repetitions, s.retired FROM flashcards f
+        JOIN card_state s ON s.flashcard_id = f.id WHERE f.id IN (?, ?) ORDER BY f.id""",
+        (first["id"], second["id"]),
+    ).fetchall()
+    conn.close()
+    assert [tuple(row) for row in rows] == [
+        (first["id"], first["front"], 1, 0), (second["id"], second["front"], 1, 0),
+    ]
+
+
+def test_sync_content_moves_scores_with_their_question(tmp_db, content_dir):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    conn = get_connection(tmp_db)
+    question = conn.execute("SELECT * FROM quiz_questions WHERE domain_id = 1 LIMIT 1").fetchone()
+    conn.close()
+    record_quiz_answer(tmp_db, question["id"], question["correct_answer"])
+
+    def move(data):
+        for q in data["questions"]:
+            if q["stem"] == question["stem"]:
+                q["domain_id"] = 2
+    _edit(content_dir, "questions.json", move)
+    sync_content(tmp_db)
+    conn = get_connection(tmp_db)
+    totals = conn.execute("SELECT domain_id, SUM(attempts) FROM quiz_score_totals GROUP BY domain_id").fetchall()
+    conn.close()
+    assert {domain: attempts for domain, attempts in totals} == {2: 1}
+
+
+def test_sync_content_upgrades_unhashed_rows_in_place(tmp_db):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    conn = get_connection(tmp_db)
+    conn.execute("UPDATE flashcards SET content_hash = NULL")
+    conn.execute("UPDATE quiz_questions SET content_hash = NULL")
+    conn.execute("DELETE FROM content_syncs")
+    conn.commit()
+    ids = [row[0] for row in conn.execute("SELECT id FROM flashcards ORDER BY id")]
+    conn.close()
+    counts = sync_content(tmp_db)
+    assert counts["inserted"] == 0 and counts["retired"] == 0
+    conn = get_connection(tmp_db)
+    assert [row[0] for row in conn.execute("SELECT id FROM flashcards ORDER BY id")] == ids
+    assert not conn.execute("SELECT 1 FROM flashcards WHERE content_hash IS NULL").fetchone()
+    conn.close()
+
+
+def test_build_content_db_refresh_keeps_ids(tmp_path, content_dir):
+    content_db = str(tmp_path / "content.db")
+    build_content_db(content_db)
+    before = (tmp_path / "content.db").stat().st_mtime_ns
+    build_content_db(content_db)  # current: nothing to do
+    assert (tmp_path / "content.db").stat().st_mtime_ns == before
+    _edit(content_dir, "flashcards.json", lambda data: data["flashcards"].pop(0))
+    build_content_db(content_db)
+    conn = sqlite3.connect(f"file:{content_db}?mode=ro&immutable=1", uri=True)
+    assert conn.execute("SELECT id, retired FROM flashcards ORDER BY id LIMIT 2").fetchall() == [(1, 1), (2, 0)]
+    conn.close()
+
+
+def test_progress_db_follows_refreshed_content(tmp_path, content_dir):
+    content_db = str(tmp_path / "content.db")
+    progress_db = str(tmp_path / "progress.db")
+    build_content_db(content_db)
+    init_progress_db(progress_db, content_db)
+    close_connections()
+
+    def edit_cards(data):
+        data["flashcards"].pop(0)
+        data["flashcards"].append({"domain_id": 1, "subtopic": None, "front": "New card", "back": "New back"})
+    _edit(content_dir, "flashcards.json", edit_cards)
+    build_content_db(content_db)
+    ids = {c["id"] for c in get_due_cards(progress_db, limit=500)}
+    assert 1 not in ids
+    conn = get_connection(progress_db)
+    new = conn.execute("SELECT id FROM flashcards WHERE front = 'New card'").fetchone()[0]
+    assert conn.execute("SELECT retired FROM card_state WHERE flashcard_id = 1").fetchone()[0] == 1
+    conn.close()
+    assert new in ids
+
+
+def test_is_current_tracks_schema_and_content(tmp_db, content_dir):
+    assert not is_current(tmp_db)
+    init_db(tmp_db)
+    assert not is_current(tmp_db)
+    seed_all(tmp_db)
+    assert is_current(tmp_db)
+    _edit(content_dir, "flashcards.json", lambda data: data["flashcards"].pop())
+    assert not is_current(tmp_db)
+    seed_all(tmp_db)
+    assert is_current(tmp_db)
+
+
+def test_is_current_hashes_content_only_when_files_change(tmp_db, content_dir, monkeypatch):
+    import os
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    hashes = []
+    real_hash = seed.content_hash
+    monkeypatch.setattr(seed, "content_hash", lambda: hashes.append(1) or real_hash())
+    assert is_current(tmp_db)
+    assert hashes == []
+    # Touched but unchanged: hashed once, then the new stamp is recorded.
+    path = content_dir / "domains.json"
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 10**9))
+    assert is_current(tmp_db)
+    assert len(hashes) == 1
+    seed_all(tmp_db)
+    hashes.clear()
+    assert is_current(tmp_db)
+    assert hashes == []
@@ -1,5 +1,5 @@
 # tests/test_sm2.py
-from gcp_tutor.sm2 import sm2_update
+from gcp_tutor.sm2 import sm2_update, sm2_update_batch
 
 def test_sm2_first_review_correct():
     """First correct answer: interval=1, repetitions=1."""
@@ -35,3 +35,33 @@ def test_sm2_easy_increases_ease():
     """Quality 5 increases ease factor."""
     result = sm2_update(quality=5, repetitions=2, ease_factor=2.5, interval=6)
     assert result["ease_factor"] > 2.5
+
+def test_sm2_update_batch_matches_scalar():
+    """Batch results agree with sm2_update for every rating and state."""
+    cases = [
+        (q, reps, ef, ivl)
+        for q in range(6)
+        for reps, ivl in ((0, 0), (1, 1), (2, 6), (5, 40))
+        for ef in (1.3, 1.96, 2.5, 2.8)
+    ]
+    quality, repetitions, ease_factor, interval = (list(col) for col in zip(*cases))
+    new_interval, new_reps, new_ef = sm2_update_batch(quality, repetitions, ease_factor, interval)
+    for i, (q, reps, ef, ivl) in enumerate(cases):
+        expected = sm2_update(quality=q, repetitions=reps, ease_factor=ef, interval=ivl)
+        assert new_interval[i] == expected["interval"]
+        assert new_reps[i] == expected["repetitions"]
+        assert abs(new_ef[i] - expected["ease_factor"]) < 1e-9
+
+def test_sm2_update_batch_array_fallback(monkeypatch):
+    """Without NumPy the batch API still works using the array module."""
+    from array import array
+    import gcp_tutor.sm2 as sm2
+    monkeypatch.setattr(sm2, "np", None)
+    new_interval, new_reps, new_ef = sm2.sm2_update_batch([4, 1], [2, 3], [2.5, 2.5], [6, 30])
+    assert isinstance(new_interval, array)
+    assert list(new_interval) == [15, 1]
+    assert list(new_reps) == [3, 0]
+
+def test_sm2_update_batch_empty():
+    new_interval, new_reps, new_ef = sm2_update_batch([], [], [], [])
+    assert len(new_interval) == len(new_reps) == len(new_ef) == 0
@@ -1,5 +1,6 @@
 # tests/test_study.py
 from gcp_tutor.db import init_db, get_connection
+from gcp_tutor.scheduler import FSRS_DEFAULT_WEIGHTS, get_scheduler, set_scheduler
 from gcp_tutor.seed import seed_all
 from gcp_tutor.study import (
     get_current_session_day, get_todays_plan, complete_reading,
@@ -57,13 +58,25 @@ def test_reset_all_progress(tmp_db):
     assert conn.execute("SELECT COUNT(*) FROM quiz_results").fetchone()[0] == 0
     assert conn.execute("SELECT COUNT(*) FROM flashcard_results").fetchone()[0] == 0
     # SM-2 state reset
-    card = conn.execute("SELECT * FROM flashcards LIMIT 1").fetchone()
+    card = conn.execute("SELECT * FROM card_state WHERE user_id = 1 LIMIT 1").fetchone()
     assert card["ease_factor"] == 2.5
     assert card["interval"] == 0
     assert card["repetitions"] == 0
     assert card["next_review"] is None
     conn.close()
 
+def test_reset_all_progress_keeps_scheduler_settings(tmp_db):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    weights = [round(0.1 * i, 1) for i in range(len(FSRS_DEFAULT_WEIGHTS))]
+    set_scheduler(tmp_db, "fsrs", weights)
+    start_new_session(tmp_db)
+    reset_all_progress(tmp_db)
+    assert get_start_date(tmp_db) is None
+    scheduler = get_scheduler(tmp_db)
+    assert scheduler.name == "fsrs"
+    assert list(scheduler.w) == weights
+
 def test_record_and_get_session_items(tmp_db):
     init_db(tmp_db)
     seed_all(tmp_db)
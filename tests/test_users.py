@@ -0,0 +1,103 @@
+"""Tests for multiple learners sharing one database."""
+import pytest
+from gcp_tutor.db import init_db, get_connection, DEFAULT_USER_ID
+from gcp_tutor.seed import seed_all
+from gcp_tutor.users import create_user, get_user_id, get_or_create_user, list_users, delete_user
+from gcp_tutor.flashcards import get_due_cards, get_card, record_flashcard_result, reschedule_deck
+from gcp_tutor.quiz import get_quiz_questions, record_quiz_answer, get_quiz_score
+from gcp_tutor.study import start_new_session, complete_session_component, get_current_session_day, reset_all_progress
+from gcp_tutor.dashboard import get_dashboard_snapshot
+from gcp_tutor.recorder import ResultRecorder
+
+
+def test_default_user_exists(tmp_db):
+    init_db(tmp_db)
+    users = list_users(tmp_db)
+    assert [u["id"] for u in users] == [DEFAULT_USER_ID]
+
+
+def test_create_user(tmp_db):
+    init_db(tmp_db)
+    user_id = create_user(tmp_db, "alice")
+    assert get_user_id(tmp_db, "alice") == user_id
+    assert get_or_create_user(tmp_db, "alice") == user_id
+    with pytest.raises(ValueError):
+        create_user(tmp_db, "alice")
+
+
+def test_card_state_created_for_every_user_and_card(tmp_db):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    create_user(tmp_db, "alice")
+    conn = get_connection(tmp_db)
+    cards = conn.execute("SELECT COUNT(*) FROM flashcards").fetchone()[0]
+    conn.execute("INSERT INTO flashcards (domain_id, front, back) VALUES (1, 'new', 'card')")
+    conn.commit()
+    per_user = conn.execute("SELECT user_id, COUNT(*) FROM card_state GROUP BY user_id").fetchall()
+    conn.close()
+    assert [tuple(row) for row in per_user] == [(1, cards + 1), (2, cards + 1)]
+
+
+def test_reviews_are_per_user(tmp_db):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    alice = create_user(tmp_db, "alice")
+    card_id = get_due_cards(tmp_db, limit=1, user_id=alice)[0]["id"]
+    record_flashcard_result(tmp_db, card_id, 5, user_id=alice)
+    assert get_card(tmp_db, card_id, user_id=alice)["repetitions"] == 1
+    assert get_card(tmp_db, card_id)["repetitions"] == 0
+    assert get_dashboard_snapshot(tmp_db, user_id=alice).flashcards_reviewed == 1
+    assert get_dashboard_snapshot(tmp_db).flashcards_reviewed == 0
+    reschedule_deck(tmp_db)
+    assert get_card(tmp_db, card_id, user_id=alice)["repetitions"] == 1
+
+
+def test_quiz_scores_and_sessions_are_per_user(tmp_db):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    alice = create_user(tmp_db, "alice")
+    q = get_quiz_questions(tmp_db, count=1)[0]
+    record_quiz_answer(tmp_db, q["id"], q["correct_answer"], user_id=alice)
+    assert get_quiz_score(tmp_db, user_id=alice) == 100.0
+    assert get_quiz_score(tmp_db) == 0.0
+    start_new_session(tmp_db, user_id=alice)
+    for component in ("reading", "flashcards", "quiz"):
+        complete_session_component(tmp_db, 1, component, user_id=alice)
+    assert get_current_session_day(tmp_db, user_id=alice) == 2
+    assert get_current_session_day(tmp_db) == 1
+
+
+def test_reset_only_affects_one_user(tmp_db):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    alice = create_user(tmp_db, "alice")
+    q = get_quiz_questions(tmp_db, count=1)[0]
+    record_quiz_answer(tmp_db, q["id"], q["correct_answer"])
+    record_quiz_answer(tmp_db, q["id"], q["correct_answer"], user_id=alice)
+    reset_all_progress(tmp_db, user_id=alice)
+    assert get_quiz_score(tmp_db, user_id=alice) == 0.0
+    assert get_quiz_score(tmp_db) == 100.0
+
+
+def test_recorder_writes_for_its_user(tmp_db):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    alice = create_user(tmp_db, "alice")
+    with ResultRecorder(tmp_db, user_id=alice) as recorder:
+        recorder.record_flashcard_result(1, 4)
+    assert get_card(tmp_db, 1, user_id=alice)["repetitions"] == 1
+    assert get_card(tmp_db, 1)["repetitions"] == 0
+
+
+def test_delete_user_removes_their_data(tmp_db):
+    init_db(tmp_db)
+    seed_all(tmp_db)
+    alice = create_user(tmp_db, "alice")
+    record_flashcard_result(tmp_db, 1, 4, user_id=alice)
+    delete_user(tmp_db, alice)
+    conn = get_connection(tmp_db)
+    for table in ("card_state", "flashcard_results", "flashcard_score_totals"):
+        assert conn.execute(f"SELECT COUNT(*) FROM {table} WHERE user_id = ?", (alice,)).fetchone()[0] == 0
+    conn.close()
+    with pytest.raises(ValueError):
+        delete_user(tmp_db, DEFAULT_USER_ID)